@@ -16,8 +16,18 @@ uint8_t drive = 0;
 bool is_motor_on = false;
 double angle = 0;
 
-// WebSocket server address (ip address needs to be specified in wifi_credentials.h)
-const int WS_SERVER_PORT = 8765;
+// WebSocket server address (ip address needs to be specified in wifi_credentials.h).
+// The port can be set there too, if the game of this station runs with --port.
+#ifndef WS_SERVER_PORT
+#define WS_SERVER_PORT 8765
+#endif
+
+// Identifier sent to the server, scoped by the station if one is set in wifi_credentials.h
+#ifdef STATION_ID
+const char* CLIENT_ID = "KneeESP:" STATION_ID;
+#else
+const char* CLIENT_ID = "KneeESP";
+#endif
 
 // WebSocket client instance
 WebSocketsClient webSocket;
@@ -47,7 +57,7 @@ void webSocketEvent(WStype_t type, uint8_t * payload, size_t length) {
   if (type == WStype_CONNECTED) {
         // Send unique identifier when connected to server
         Serial.println("WebSocket connected!");
-        webSocket.sendTXT("KneeESP");
+        webSocket.sendTXT(CLIENT_ID);
         isWebSocketConnected = true;
   }
   if (type == WStype_DISCONNECTED) {
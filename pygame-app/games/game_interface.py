@@ -9,9 +9,11 @@ class GameInterface:
         self.game_screen_width = None
         self.game_screen_height = None
         self.shared_data = {}
+        # Source of the game time, a virtual clock when a logged game is replayed
+        self.clock = time.time
 
     def start(self):
-        self.manager.shared_data["start_time"] = time.time()
+        self.manager.shared_data["start_time"] = self.clock()
 
     def handle_event(self, event):
         pass
@@ -31,5 +33,5 @@ class GameInterface:
                 self.manager.shared_data.pop(key)
 
     def end_game(self):
-        self.manager.shared_data["end_time"] = time.time()
+        self.manager.shared_data["end_time"] = self.clock()
         self.game_ended = True
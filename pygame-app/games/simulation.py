@@ -0,0 +1,97 @@
+from abc import ABC, abstractmethod
+
+
+class SimulationSink:
+    """
+    Receives the events of a game simulation, e.g. to play a sound, turn the LEDs of
+    the board on and off or update the shared data of the game manager. A sink only
+    overrides the events it needs.
+    """
+
+    def on_start(self, simulation):
+        pass
+
+    def on_target_activated(self, simulation, target_id):
+        pass
+
+    def on_target_hit(self, simulation, target_id, time):
+        pass
+
+    def on_end(self, simulation, reason):
+        pass
+
+
+class GameSimulation(ABC):
+    def __init__(self, maximum_duration, sinks=()):
+        """
+        Rules of a game without pygame: the game is driven by timestamped input
+        samples, and everything else (rendering, audio, ESP messages) is attached as
+        a SimulationSink. Without sinks a simulation runs headless, e.g. thousands of
+        synthetic sessions to compare the difficulty of the levels.
+
+        :param maximum_duration: The game ends with "timeout" after this many seconds.
+        :param sinks: SimulationSinks notified about the events of the game.
+        """
+        self.maximum_duration = maximum_duration
+        self.sinks = list(sinks)
+        self.start_time = None
+        self.end_time = None
+        self.end_reason = None
+        self.ended = False
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def emit(self, event, *args):
+        for sink in self.sinks:
+            getattr(sink, event)(self, *args)
+
+    def start(self, time):
+        """Starts (or restarts) the game at the given time in seconds."""
+        self.start_time = time
+        self.end_time = None
+        self.end_reason = None
+        self.ended = False
+        self.emit("on_start")
+
+    @abstractmethod
+    def step(self, time, x, y, check_collision=True):
+        """
+        Advances the game with one input sample.
+
+        :param time: Time of the sample in seconds, on the clock of start().
+        :param x, y: Input position in screen pixels.
+        :param check_collision: False if the input only moved (e.g. the mouse button
+            is not pressed), the position is then not checked against the targets.
+        """
+        pass
+
+    def run(self, times, xs, ys, check_collision=None):
+        """
+        Advances the game with a sequence of input samples, until it ends.
+
+        :param check_collision: Sequence of bools per sample, None checks every sample.
+        """
+        for i in range(len(times)):
+            if self.ended:
+                break
+            self.step(
+                times[i],
+                xs[i],
+                ys[i],
+                True if check_collision is None else check_collision[i],
+            )
+        return self
+
+    def end(self, reason, time):
+        """
+        Ends the game once.
+
+        :param reason: "win", "timeout", or None if the game was aborted.
+        """
+        if self.ended:
+            return
+        self.ended = True
+        self.end_reason = reason
+        self.end_time = time
+        self.emit("on_end", reason)
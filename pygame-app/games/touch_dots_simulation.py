@@ -0,0 +1,253 @@
+import argparse
+import time
+
+import numpy as np
+
+from games.simulation import GameSimulation
+from utils.design_size import DESIGN_HEIGHT, DESIGN_WIDTH
+
+# Order in which the dots light up, per game mode and level
+LEVEL_ORDERS = {
+    ("Connect the Dots", "Level 1"): [9, 10, 11, 6, 7, 8, 3, 4, 5, 0, 1, 2],
+    ("Connect the Dots", "Level 2"): [9, 7, 5, 4, 3, 7, 11, 1, 9],
+    ("Connect the Dots", "Level 3"): [9, 7, 5, 4, 3, 6, 9, 10, 11, 8, 5, 1, 3, 7, 11],
+    ("Circle the Dots", "Level 1"): [7, 4, 8, 10, 6],
+    ("Circle the Dots", "Level 2"): [7, 4, 8, 10, 6, 3, 1, 5, 11, 9],
+    ("Circle the Dots", "Level 3"): [10, 7, 4, 0, 1, 2],
+}
+
+# The game area is 12 x 12 of this size, in design pixels
+DOT_GRID_SCALER = 50
+DOT_RADIUS = 20
+MAXIMUM_DURATION = 5 * 60  # in seconds
+
+
+def dot_positions(screen_width, screen_height, game_screen_width, game_screen_height):
+    """
+    Centers of the 12 dots (4 rows of 3), by dot id, in screen pixels. The dots are
+    placed in percent of the game area from the center of the screen.
+    """
+    dist_x = 1 / 3  # horizontal distance between dots, as ratio
+    dist_y = 1 / 4  # vertical distance between dots, as ratio
+    return [
+        (
+            (column - 1) * dist_x * game_screen_width + screen_width / 2,
+            (row - 3 / 2) * dist_y * game_screen_height + screen_height / 2,
+        )
+        for row in range(4)
+        for column in range(3)
+    ]
+
+
+class TouchDotsSimulation(GameSimulation):
+    def __init__(
+        self, order, positions, radius, maximum_duration=MAXIMUM_DURATION, sinks=()
+    ):
+        """
+        Rules of TouchDots: the dots light up one after the other in the order of the
+        level, and the game is won once the lit dot was touched for every entry of
+        the order.
+
+        :param order: Dot ids in the order they light up (see LEVEL_ORDERS).
+        :param positions: Center of each dot by id, in screen pixels (see dot_positions).
+        :param radius: Radius of the dots in screen pixels.
+        """
+        super().__init__(maximum_duration, sinks)
+        self.order = list(order)
+        self.positions = [(float(x), float(y)) for x, y in positions]
+        self.radius = radius
+        self.current_idx = 0
+        self.active_dot_id = None
+        self.press_times = []  # (time, dot id) of each touched dot
+
+    @classmethod
+    def for_level(cls, game_mode, level, screen_size=None, **kwargs):
+        """
+        Simulation of a level with the dots placed like on the screen.
+
+        :param screen_size: (width, height) of the window, the design size if None.
+            The game area and the dots are scaled like by the Layout.
+        """
+        width, height = screen_size or (DESIGN_WIDTH, DESIGN_HEIGHT)
+        scale = min(width / DESIGN_WIDTH, height / DESIGN_HEIGHT)
+        scaler = max(1, round(DOT_GRID_SCALER * scale))
+        radius = max(1, round(DOT_RADIUS * scale))
+        positions = dot_positions(width, height, 12 * scaler, 12 * scaler)
+        return cls(LEVEL_ORDERS[(game_mode, level)], positions, radius, **kwargs)
+
+    @property
+    def dots_pressed(self):
+        return len(self.press_times)
+
+    def start(self, time):
+        self.current_idx = 0
+        self.active_dot_id = None
+        self.press_times = []
+        super().start(time)
+        self._highlight_next()
+
+    def step(self, time, x, y, check_collision=True):
+        if self.ended or self.start_time is None or not check_collision:
+            return False
+        cx, cy = self.positions[self.active_dot_id]
+        hit = (x - cx) ** 2 + (y - cy) ** 2 <= self.radius**2
+        if hit:
+            self._press(time)
+        if not self.ended and time - self.start_time > self.maximum_duration:
+            self.end("timeout", time)
+        return hit
+
+    def run(self, times, xs, ys, check_collision=None):
+        """
+        Same result as calling step() for every sample, but each dot is searched in
+        all remaining samples at once with numpy.
+        """
+        if self.ended or self.start_time is None:
+            return self
+        times = np.asarray(times, dtype=float)
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        checked = (
+            np.ones(len(times), dtype=bool)
+            if check_collision is None
+            else np.asarray(check_collision, dtype=bool)
+        )
+        # The first checked sample after the maximum duration ends the game, unless
+        # it touches the last dot
+        late = np.flatnonzero(
+            checked & (times - self.start_time > self.maximum_duration)
+        )
+        timeout_idx = late[0] if len(late) else None
+        stop = len(times) if timeout_idx is None else timeout_idx + 1
+
+        start = 0
+        radius_sq = self.radius**2
+        while not self.ended and start < stop:
+            cx, cy = self.positions[self.active_dot_id]
+            inside = checked[start:stop] & (
+                (xs[start:stop] - cx) ** 2 + (ys[start:stop] - cy) ** 2 <= radius_sq
+            )
+            hits = np.flatnonzero(inside)
+            if not len(hits):
+                break
+            start += hits[0]
+            self._press(float(times[start]))
+            start += 1
+        if not self.ended and timeout_idx is not None:
+            self.end("timeout", float(times[timeout_idx]))
+        return self
+
+    def _press(self, time):
+        dot_id = self.active_dot_id
+        self.press_times.append((time, dot_id))
+        self.emit("on_target_hit", dot_id, time)
+        if self.dots_pressed >= len(self.order):
+            self.end("win", time)
+        else:
+            self._highlight_next()
+
+    def _highlight_next(self):
+        if self.current_idx >= len(self.order):
+            return
+        self.active_dot_id = self.order[self.current_idx]
+        self.current_idx += 1
+        self.emit("on_target_activated", self.active_dot_id)
+
+
+def synthetic_trajectory(
+    simulation,
+    rng,
+    rate=30,
+    reaction_time=0.35,
+    fitts_a=0.2,
+    fitts_b=0.15,
+    endpoint_spread=0.6,
+):
+    """
+    Generates a finger trajectory of a simulated player for the order of the
+    simulation. The player reacts to each lit dot, moves to it on a minimum-jerk path
+    whose duration follows Fitts' law, and corrects the movement if it ended next to
+    the dot.
+
+    :param rng: numpy Generator, e.g. np.random.default_rng(seed).
+    :param rate: Samples per second, like the finger tracking.
+    :param endpoint_spread: Standard deviation of the end of a movement around the
+        dot center, in dot radii.
+    :return: Sample times in seconds from the start, and x and y in screen pixels.
+    """
+    radius = simulation.radius
+    x, y = np.mean(simulation.positions, axis=0)
+    segments = []
+    t = 0.0
+    for dot_id in simulation.order:
+        target_x, target_y = simulation.positions[dot_id]
+        delay = max(0.1, rng.normal(reaction_time, reaction_time / 4))
+        # Corrective movements with less spread until the dot is touched
+        for attempt in range(5):
+            end_x, end_y = rng.normal(
+                (target_x, target_y), endpoint_spread * radius / (attempt + 1)
+            )
+            distance = np.hypot(end_x - x, end_y - y)
+            duration = fitts_a + fitts_b * np.log2(distance / (2 * radius) + 1)
+            sample_times = np.arange(t, t + delay + duration, 1 / rate)
+            tau = np.clip((sample_times - t - delay) / duration, 0, 1)
+            s = tau**3 * (10 - 15 * tau + 6 * tau**2)
+            segments.append((sample_times, x + (end_x - x) * s, y + (end_y - y) * s))
+            t = sample_times[-1] + 1 / rate
+            x, y = end_x, end_y
+            if (x - target_x) ** 2 + (y - target_y) ** 2 <= radius**2:
+                break
+            delay = 0.15
+    times, xs, ys = (np.concatenate(values) for values in zip(*segments))
+    return times, xs, ys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate TouchDots sessions with synthetic finger trajectories "
+        "to compare the difficulty of the levels."
+    )
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--spread",
+        type=float,
+        default=0.6,
+        help="Spread of the movement end points in dot radii (higher is less precise)",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for game_mode, level in LEVEL_ORDERS:
+        simulation = TouchDotsSimulation.for_level(game_mode, level)
+        trajectories = [
+            synthetic_trajectory(simulation, rng, endpoint_spread=args.spread)
+            for _ in range(args.sessions)
+        ]
+
+        # Both ways of running the rules have to agree
+        times, xs, ys = trajectories[0]
+        simulation.start(0.0)
+        for i in range(len(times)):
+            simulation.step(times[i], xs[i], ys[i])
+        stepped = simulation.press_times
+        simulation.start(0.0)
+        simulation.run(times, xs, ys)
+        assert simulation.press_times == stepped, "run() differs from step()"
+
+        durations = []
+        start = time.perf_counter()
+        for times, xs, ys in trajectories:
+            simulation.start(0.0)
+            simulation.run(times, xs, ys)
+            durations.append(simulation.end_time if simulation.ended else np.inf)
+        elapsed = time.perf_counter() - start
+
+        durations = np.array(durations)
+        p50, p90 = np.percentile(durations, (50, 90))
+        print(
+            f"{game_mode} {level}: {len(simulation.order)} dots, "
+            f"{np.mean(np.isfinite(durations)):.0%} finished, "
+            f"duration p50 {p50:.1f} s, p90 {p90:.1f} s "
+            f"({args.sessions / elapsed:.0f} sessions/s)"
+        )
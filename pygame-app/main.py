@@ -1,72 +1,59 @@
-import asyncio
+import time
+
+# Start of the program for --profile-startup, before the other imports
+PROGRAM_START = time.perf_counter()
+
+import argparse
+import importlib
 import json
 import pygame
 import sys
 import threading
-import websockets
 
-from screens.configuration_screen import ConfigurationScreen
 from games.game_interface import GameInterface
-from screens.game_selection_screen import GameSelectionScreen
-from screens.explanation_screen import ExplanationScreen
-from screens.end_of_game_screen import EndOfGameScreen
-from screens.feedback_screen import FeedbackScreen
-from screens.game_screen import GameScreen
-from screens.home_screen import HomeScreen
-from screens.repeat_screen import RepeatScreen
+from utils.knee_angle_frames import (
+    decode_binary_frame,
+    decode_json_batch,
+    seconds_before_last,
+)
+from utils.frame_profiler import FrameProfiler
+from utils.frame_scheduler import FrameScheduler
+from utils.layout import DESIGN_HEIGHT, DESIGN_WIDTH, Layout
 from utils.logger import Logger
-
-# Dictionary to store connected clients
-connected_clients = {}
+from utils.startup import HEAVY_MODULES, StartupProfiler, WarmUp, import_task
+from utils.websocket_server import (
+    DEFAULT_PORT,
+    DEFAULT_STATION,
+    WebSocketServer,
+    make_client_id,
+    parse_client_id,
+)
 
 
 def handle_message(client_id, message, game_manager):
-    print(f"Message from {client_id}: {message}")
+    # The server only routes messages of the game manager's own station here
+    device, _ = parse_client_id(client_id)
+
+    # Binary frames carry batches of knee angle samples
+    if isinstance(message, bytes):
+        if device == "KneeESP":
+            device_time_us, knee_angles = decode_binary_frame(message)
+            game_manager.logger.append_knee_angles(
+                knee_angles, seconds_before_last(device_time_us)
+            )
+        return
+
+    if game_manager.debug:
+        print(f"Message from {client_id}: {message}")
     message_json = json.loads(message)
-    if client_id == "KneeESP":
+    if device == "KneeESP":
         if message_json["field"] == "angle":
             game_manager.logger.append_knee_angle(message_json["value"])
-
-
-# WebSocket server logic
-async def handle_client(websocket, game_manager):
-    client_id = await websocket.recv()  # First message is the identifier
-    connected_clients[client_id] = websocket
-    print(f"Client connected: {client_id}")
-    try:
-        async for message in websocket:
-            handle_message(client_id, message, game_manager)
-    except websockets.ConnectionClosed:
-        print(f"Client disconnected: {client_id}")
-    finally:
-        connected_clients.pop(client_id, None)
-
-
-# WebSocket server setup
-async def websocket_server(game_manager):
-    server = await websockets.serve(
-        lambda ws: handle_client(ws, game_manager), "0.0.0.0", 8765
-    )
-    print("WebSocket server running on ws://0.0.0.0:8765")
-    await server.wait_closed()
-
-
-# Send a message to a specific client
-async def send_message(client_id, message):
-    if client_id in connected_clients:
-        websocket = connected_clients[client_id]
-        try:
-            await websocket.send(json.dumps(message))
-            print(f"Sent to {client_id}: {message}")
-        except websockets.ConnectionClosed:
-            print(f"Failed to send to {client_id}: Connection closed")
-    else:
-        print(f"Client {client_id} not found")
-
-
-# Thread wrapper for running the WebSocket server
-def start_websocket_server(game_manager):
-    asyncio.run(websocket_server(game_manager))
+        elif message_json["field"] == "angles":
+            device_time_us, knee_angles = decode_json_batch(message_json)
+            game_manager.logger.append_knee_angles(
+                knee_angles, seconds_before_last(device_time_us)
+            )
 
 
 # Screen name constants
@@ -79,27 +66,72 @@ FEEDBACK_SCREEN = "FEEDBACK_SCREEN"
 REPEAT_SCREEN = "REPEAT_SCREEN"
 CONFIGURATION_SCREEN = "CONFIGURATION_SCREEN"
 
+# Screens are created when they are first shown: module and class of each screen
+SCREEN_CLASSES = {
+    HOME_SCREEN: ("screens.home_screen", "HomeScreen"),
+    GAME_SELECTION_SCREEN: ("screens.game_selection_screen", "GameSelectionScreen"),
+    EXPLANATION_SCREEN: ("screens.explanation_screen", "ExplanationScreen"),
+    GAME_SCREEN: ("screens.game_screen", "GameScreen"),
+    END_OF_GAME_SCREEN: ("screens.end_of_game_screen", "EndOfGameScreen"),
+    FEEDBACK_SCREEN: ("screens.feedback_screen", "FeedbackScreen"),
+    REPEAT_SCREEN: ("screens.repeat_screen", "RepeatScreen"),
+    CONFIGURATION_SCREEN: ("screens.configuration_screen", "ConfigurationScreen"),
+}
+
 # ESP-client name constants
 BOARD_CLIENT = "BoardESP"
 KNEE_CLIENT = "KneeESP"
 
 
 class GameManager:
-    def __init__(self):
+    def __init__(
+        self,
+        websocket_server=None,
+        station=DEFAULT_STATION,
+        prewarm=True,
+        startup_profiler=None,
+        screen_size=(DESIGN_WIDTH, DESIGN_HEIGHT),
+        profile_frames=False,
+        websocket_port=DEFAULT_PORT,
+    ):
+        """
+        :param websocket_server: Server this game manager registers its station
+            with. A new one is created if not given. The game runs one station per
+            process (pygame opens one window), each on its own --port.
+        :param station: Station (blackboard) driven by this game manager. Its ESPs
+            identify as "BoardESP:<station>" and "KneeESP:<station>".
+        :param prewarm: After the first frame, import the heavy modules in the
+            background and create the other screens while the current screen is idle.
+            Otherwise every screen is created when it is first shown.
+        :param startup_profiler: StartupProfiler whose report is printed once the
+            startup is complete (--profile-startup).
+        :param screen_size: (width, height) of the window, e.g. the projector
+            resolution. The screens are scaled from their design size (see utils/layout.py).
+        :param profile_frames: Record the phases of every frame from the start. F3
+            shows the frame profile overlay (and starts recording), F4 saves the
+            recorded frames to the log folder, which also happens on quit.
+        :param websocket_port: Port of the websocket server created for this game
+            manager. A second station on the same PC needs its own port.
+        """
+        self.startup_profiler = startup_profiler or StartupProfiler(PROGRAM_START)
+        self.profile_startup = startup_profiler is not None
 
         self.debug = False  # TODO
+        self.log_backend = "csv"  # "csv" or "binary" (see utils/binary_log.py)
 
-        pygame.init()
-        self.screen_width = (
-            1792  # >> images imported from canva: scaling of 0.93333333333
-        )
-        self.screen_height = 1008
+        with self.startup_profiler.measure("pygame.init"):
+            pygame.init()
+        self.screen_width, self.screen_height = screen_size
+        self.layout = Layout(self.screen_width, self.screen_height)
 
-        self.minimum_letter_size = 50
-        self.big_letter_size = 100
+        self.minimum_letter_size = self.layout.length(50)
+        self.big_letter_size = self.layout.length(100)
 
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption("Blackboard Game")
+        with self.startup_profiler.measure("window"):
+            self.screen = pygame.display.set_mode(
+                (self.screen_width, self.screen_height)
+            )
+            pygame.display.set_caption("Blackboard Game")
 
         # Store data needed across screens
         self.shared_data = {
@@ -109,77 +141,330 @@ class GameManager:
             "start_time": None,
             "end_reason": None,  # "win", "timeout", or "early_abort"
             "feedback": None,  # "happy", "medium", or "sad"
+            "screen_size": (self.screen_width, self.screen_height),
         }
 
         # The clock is used to limit FPS and track time
         self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler(self.clock)
+        self.profiler = FrameProfiler()
+        self.profiler.set_enabled(profile_frames)
+        self.show_profiler_overlay = False
         # The current screen initialized to the home screen
         self.current_screen_name = HOME_SCREEN
 
-        # Create instances of all screens
-        self.screens = {
-            HOME_SCREEN: HomeScreen(self),
-            GAME_SELECTION_SCREEN: GameSelectionScreen(self),
-            EXPLANATION_SCREEN: ExplanationScreen(self),
-            GAME_SCREEN: GameScreen(self),
-            END_OF_GAME_SCREEN: EndOfGameScreen(self),
-            FEEDBACK_SCREEN: FeedbackScreen(self),
-            REPEAT_SCREEN: RepeatScreen(self),
-            CONFIGURATION_SCREEN: ConfigurationScreen(self),
-        }
+        # Screens created so far (see get_screen)
+        self.screens = {}
+        self.prewarm_screens = list(SCREEN_CLASSES) if prewarm else []
+
+        # Finger tracking calibration of the last run, loaded by the warm-up and
+        # checked again in the background (see calibration_busy)
+        self.camera_key = None
+        self.calibration_validator = None
+        self.calibration_loaded = threading.Event()
+        # (calibration_points, method) found by the validator, applied in run()
+        self.pending_calibration = None
+
+        # Work that is not needed for the first frame, started after it
+        warm_up_tasks = [("cached calibration", self.load_cached_calibration)]
+        if prewarm:
+            warm_up_tasks += [import_task(name) for name in HEAVY_MODULES]
+            warm_up_tasks += [
+                import_task(module) for module, _ in SCREEN_CLASSES.values()
+            ]
+        self.warm_up = WarmUp(warm_up_tasks, self.startup_profiler)
 
         # Initialize logger
-        self.logger = Logger()
+        with self.startup_profiler.measure("logger"):
+            self.logger = Logger(backend=self.log_backend)
 
         self.allowed_clients = [BOARD_CLIENT, KNEE_CLIENT]
 
+        # WebSocket server for the ESPs (started in main); messages of this
+        # station's ESPs are routed to this game manager
+        self.station = station
+        if websocket_server is None:
+            with self.startup_profiler.measure("websocket server"):
+                websocket_server = WebSocketServer(
+                    port=websocket_port, allowed_devices=self.allowed_clients
+                )
+        self.websocket_server = websocket_server
+        self.websocket_server.register_station(
+            self.station,
+            lambda client_id, message: handle_message(client_id, message, self),
+        )
+
         # Game dependent variables
         self.game: GameInterface = None
 
+    @property
+    def current_screen(self):
+        return self.get_screen(self.current_screen_name)
+
+    def get_screen(self, screen_name):
+        """Returns a screen, created the first time it is needed."""
+        screen = self.screens.get(screen_name)
+        if screen is None:
+            module_name, class_name = SCREEN_CLASSES[screen_name]
+            with self.startup_profiler.measure(f"screen {class_name}"):
+                screen_class = getattr(importlib.import_module(module_name), class_name)
+                screen = self.screens[screen_name] = screen_class(self)
+        return screen
+
+    def prewarm_next_screens(self):
+        """
+        Creates the screens that were not shown yet, once their modules are
+        imported, until there is input to handle. Screens load images and create
+        pygame_gui elements, which has to happen in the main thread.
+        """
+        while (
+            self.prewarm_screens
+            and self.warm_up.done.is_set()
+            and not pygame.event.peek()
+        ):
+            self.get_screen(self.prewarm_screens.pop(0))
+        if (
+            not self.prewarm_screens
+            and self.warm_up.done.is_set()
+            and self.profile_startup
+        ):
+            self.profile_startup = False
+            self.startup_profiler.report()
+
+    def load_cached_calibration(self):
+        """
+        Uses the finger tracking calibration of the last run and starts checking it
+        with the camera. Runs in the warm-up thread (OpenCV takes a while to import).
+        """
+        from utils.calibration import CalibrationValidator, camera_key, load_calibration
+        from utils.camera import CAMERA_SETTINGS
+
+        if self.calibration_loaded.is_set():
+            return
+        try:
+            self.camera_key = camera_key(CAMERA_SETTINGS)
+            calibration = load_calibration(self.camera_key)
+            if calibration is not None and "camera_matrix" in calibration:
+                # Lens calibration (python -m utils.coordinate_pipeline calibrate-lens)
+                self.shared_data["camera_matrix"] = calibration["camera_matrix"]
+                self.shared_data["dist_coeffs"] = calibration["dist_coeffs"]
+            if calibration is not None and "calibration_points" in calibration:
+                print(f"Using the cached calibration of {calibration['date']}.")
+                self.set_calibration(
+                    calibration["calibration_points"], calibration["method"], save=False
+                )
+                self.calibration_validator = CalibrationValidator(
+                    calibration, CAMERA_SETTINGS, on_update=self.queue_calibration
+                )
+        finally:
+            self.calibration_loaded.set()
+
+    def calibration_busy(self):
+        """
+        Whether the cached calibration is still loaded or checked with the camera.
+        Screens poll this in update() before they open the camera.
+        """
+        return (
+            not self.calibration_loaded.is_set()
+            or (
+                self.calibration_validator is not None
+                and self.calibration_validator.thread.is_alive()
+            )
+            or self.pending_calibration is not None
+        )
+
+    def queue_calibration(self, calibration_points, method):
+        """
+        Called by the CalibrationValidator in its thread. The new calibration is
+        applied in the main thread by run(), which reads the shared data.
+        """
+        self.pending_calibration = (calibration_points, method)
+
     def run(self):
+        profiler = self.profiler
         while True:
+            profiler.begin_frame()
+            # Idle screens sleep until the next event instead of ticking at 60 FPS
+            frame_rate = self.current_screen.get_frame_rate()
+            events = self.scheduler.get_events(frame_rate)
+            profiler.mark("wait")
+
             # Handle events
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
-                    self.screens[self.current_screen_name].on_exit()
+                    self.current_screen.on_exit()
+                    self.logger.close()
+                    self.scheduler.print_stats()
+                    if profiler.frame_count:
+                        profiler.print_stats()
+                        profiler.export(self.logger.folder_name)
                     pygame.quit()
                     sys.exit()
-                self.screens[self.current_screen_name].handle_event(event)
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    # The window content was lost (e.g. minimized and restored)
+                    self.current_screen.invalidate()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.toggle_profiler_overlay()
+                    continue
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                    profiler.export(self.logger.folder_name)
+                    continue
+                self.current_screen.handle_event(event)
+            profiler.mark("events")
+
+            # Calibration updated by the validator thread
+            if self.pending_calibration is not None:
+                self.set_calibration(*self.pending_calibration)
+                self.pending_calibration = None
 
             # Update current screen
-            self.screens[self.current_screen_name].update()
+            self.current_screen.update()
+            profiler.mark("update")
 
             # Draw current screen
-            self.screens[self.current_screen_name].draw(self.screen)
-
-            # Flip the display
-            pygame.display.flip()
-
-            # Limit the frame rate to ~60 FPS
-            self.clock.tick(60)
+            dirty_rects = self.current_screen.draw(self.screen)
+            if self.show_profiler_overlay:
+                overlay_rect = profiler.draw_overlay(
+                    self.screen, self.layout.rect(DESIGN_WIDTH - 740, 20, 720, 260)
+                )
+                if dirty_rects is not None:
+                    dirty_rects = list(dirty_rects) + [overlay_rect]
+            profiler.mark("draw")
+
+            # Present only what changed
+            if dirty_rects is None:
+                pygame.display.flip()
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
+            profiler.mark("present")
+
+            # Wait for the next frame, at most 60 FPS (on the game screen)
+            self.scheduler.end_frame(self.current_screen_name, frame_rate)
+            profiler.mark("sleep")
+
+            if self.startup_profiler.first_frame is None:
+                self.startup_profiler.mark_first_frame()
+                self.warm_up.start()
+            if frame_rate is None:
+                self.prewarm_next_screens()
+            profiler.end_frame()
+
+    def toggle_profiler_overlay(self):
+        """Shows or hides the frame profile overlay (F3). Showing it starts recording."""
+        self.show_profiler_overlay = not self.show_profiler_overlay
+        if self.show_profiler_overlay:
+            self.profiler.set_enabled(True)
+        else:
+            # Restore the screen below the overlay
+            self.current_screen.invalidate()
 
     def switch_screen(self, screen_name):
         """Switch to a different screen."""
-        self.screens[self.current_screen_name].on_exit()
+        self.current_screen.on_exit()
         self.current_screen_name = screen_name
-        self.screens[self.current_screen_name].on_enter()
+        self.current_screen.on_enter()
+
+    def set_calibration(self, calibration_points, method, save=True):
+        """
+        Uses new blackboard corners for the finger tracking and caches them for the next start.
+
+        :param method: How the corners were found: "manual", "aruco" or "bright_spots".
+        """
+        from utils.calibration import compute_transform_matrix, save_calibration
+        from utils.camera import CAMERA_SETTINGS
+
+        transform_matrix = compute_transform_matrix(
+            calibration_points, self.screen_width, self.screen_height
+        )
+        self.shared_data["transform_matrix"] = transform_matrix
+        self.shared_data["calibration_points"] = calibration_points
+        if save:
+            save_calibration(
+                self.camera_key,
+                calibration_points,
+                transform_matrix,
+                (self.screen_width, self.screen_height),
+                CAMERA_SETTINGS,
+                method,
+            )
 
     def send_message(self, client_id, message):
+        """
+        Queues a message for an ESP client and returns immediately.
+        The returned OutgoingMessage reports whether it was delivered.
+        """
         if client_id not in self.allowed_clients:
             print(f"Client {client_id} not in list of allowed clients")
-            return
-        asyncio.run(send_message(client_id, message))
+            return None
+        # Only address the ESP of this game manager's station
+        with self.profiler.measure("send_message"):
+            return self.websocket_server.send_message(
+                make_client_id(client_id, self.station), message
+            )
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Blackboard rehab game")
+    parser.add_argument(
+        "--station",
+        default=DEFAULT_STATION,
+        help="Station whose ESPs this game drives (ESPs identify as BoardESP:<station>)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="Port of the websocket server for the ESPs. Every station on the same "
+        "PC runs its own game with its own port (WS_SERVER_PORT in the ESP firmware)",
+    )
+    parser.add_argument(
+        "--resolution",
+        default=f"{DESIGN_WIDTH}x{DESIGN_HEIGHT}",
+        help='Window size, e.g. 1920x1080, or "desktop" for the size of the screen',
+    )
+    parser.add_argument(
+        "--no-prewarm",
+        action="store_true",
+        help="Create every screen and import OpenCV, MediaPipe and pygame_gui only "
+        "when needed, not in the background after the start",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print how long each part of the startup takes until the first frame",
+    )
+    parser.add_argument(
+        "--profile-frames",
+        action="store_true",
+        help="Record how long each phase of every frame takes and save it to the log "
+        "folder on quit (F3 shows the frame profile, F4 saves it)",
+    )
+    args = parser.parse_args()
+    if args.resolution == "desktop":
+        pygame.display.init()
+        screen_size = pygame.display.get_desktop_sizes()[0]
+    else:
+        screen_size = tuple(int(n) for n in args.resolution.lower().split("x"))
+
     # Create Pygame application
-    game_manager = GameManager()
+    game_manager = GameManager(
+        screen_size=screen_size,
+        station=args.station,
+        prewarm=not args.no_prewarm,
+        startup_profiler=(
+            StartupProfiler(PROGRAM_START) if args.profile_startup else None
+        ),
+        profile_frames=args.profile_frames,
+        websocket_port=args.port,
+    )
 
     # Start WebSocket server in a separate thread
-    websocket_thread = threading.Thread(
-        target=start_websocket_server, args=(game_manager,), daemon=True
-    )
-    websocket_thread.start()
+    with game_manager.startup_profiler.measure("websocket server start"):
+        try:
+            game_manager.websocket_server.start()
+        except OSError as e:
+            pygame.quit()
+            sys.exit(f"{e}\nIs the game of another station running? Use --port.")
 
     # Run the game
     game_manager.run()
@@ -1,8 +1,9 @@
 import pygame
 import pygame_gui
-import cv2
-import numpy as np
 from screens.screen_interface import ScreenInterface
+from utils.calibration import CalibrationSession
+from utils.camera import CAMERA_SETTINGS
+from utils.layout import DESIGN_HEIGHT, DESIGN_WIDTH
 
 
 class ConfigurationScreen(ScreenInterface):
@@ -20,7 +21,7 @@ class ConfigurationScreen(ScreenInterface):
 
         # Title text
         self.title_label = pygame_gui.elements.UITextBox(
-            relative_rect=pygame.Rect(50, 50, manager.screen_width - 100, 100),
+            relative_rect=manager.layout.rect(50, 50, DESIGN_WIDTH - 100, 100),
             html_text="<b>Configuration</b>: Click 'Start Calibration' to precisely define the 4 corners of blackboard for finger tracking.<br>"
             "Then choose whether to use Mouse or Finger input in the Game Screen.",
             manager=self.ui_manager,
@@ -28,7 +29,7 @@ class ConfigurationScreen(ScreenInterface):
 
         # Button to start corner calibration
         self.calibration_button = pygame_gui.elements.UIButton(
-            relative_rect=pygame.Rect(50, 200, 180, 40),
+            relative_rect=manager.layout.rect(50, 200, 180, 40),
             text="Start Calibration",
             manager=self.ui_manager,
         )
@@ -37,7 +38,7 @@ class ConfigurationScreen(ScreenInterface):
         self.input_mode_dropdown = pygame_gui.elements.UIDropDownMenu(
             options_list=["mouse", "finger"],
             starting_option="finger",  # default
-            relative_rect=pygame.Rect(50, 260, 180, 30),
+            relative_rect=manager.layout.rect(50, 260, 180, 30),
             manager=self.ui_manager,
         )
 
@@ -45,13 +46,18 @@ class ConfigurationScreen(ScreenInterface):
         # self.back_button_rect = pygame.Rect(50, manager.screen_height - 60, 100, 40)
         # Confirmation button
         self.back_button_rect = pygame_gui.elements.UIButton(
-            relative_rect=pygame.Rect(
-                manager.screen_height - 300, manager.screen_height - 100, 200, 50
+            relative_rect=manager.layout.rect(
+                DESIGN_HEIGHT - 300, DESIGN_HEIGHT - 100, 200, 50
             ),
             text="Confirm",
             manager=self.ui_manager,
         )
 
+        # Running calibration
+        self.calibration = None
+        # Start Calibration was clicked while the cached calibration was checked
+        self.calibration_requested = False
+
     def on_enter(self):
         super().on_enter()
 
@@ -75,73 +81,64 @@ class ConfigurationScreen(ScreenInterface):
         super().update()
         time_delta = self.manager.clock.get_time() / 1000.0
         self.ui_manager.update(time_delta)
+        if self.calibration_requested and not self.manager.calibration_busy():
+            self.reset_calibration_button()
+            self.start_calibration()
+        if self.calibration is not None:
+            self.update_calibration()
+
+    def compose_static_layer(self, layer):
+        layer.blit(self.background, (0, 0))
+
+    def get_frame_rate(self):
+        # pygame_gui animates the elements (e.g. hovering, opening dropdowns)
+        return 30
 
     def draw(self, surface):
         super().draw(surface)
-        surface.blit(self.background, (0, 0))
-        self.ui_manager.draw_ui(surface)
+        return self.draw_static_with_ui(surface, self.ui_manager)
 
     def on_exit(self):
         super().on_exit()
+        if self.calibration is not None:
+            self.calibration.close()
+            self.calibration = None
+        if self.calibration_requested:
+            self.reset_calibration_button()
 
     def calibrate_corners(self):
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            print("Error: Could not open webcam.")
+        """
+        Starts the calibration of the blackboard corners. It runs frame by frame in
+        update(), so the UI stays responsive.
+        """
+        if self.calibration is not None or self.calibration_requested:
             return
-
-        clicked_points = []
-
-        def on_mouse(event, x, y, flags, param):
-            if event == cv2.EVENT_LBUTTONDOWN:
-                clicked_points.append((x, y))
-                print(f"Clicked point: {x}, {y}")
-
-        cv2.namedWindow("Calibration")
-        cv2.setMouseCallback("Calibration", on_mouse)
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Display clicks so far
-            for i, (cx, cy) in enumerate(clicked_points):
-                cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
-                cv2.putText(
-                    frame,
-                    str(i + 1),
-                    (cx + 5, cy - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.8,
-                    (255, 0, 0),
-                    2,
-                )
-
-            cv2.imshow("Calibration", frame)
-            key = cv2.waitKey(1)
-            if key == 27:  # ESC to cancel
-                break
-            if len(clicked_points) == 4:
-                break
-
-        cap.release()
-        cv2.destroyWindow("Calibration")
-
-        if len(clicked_points) < 4:
-            print("Calibration aborted or incomplete.")
+        if self.manager.calibration_busy():
+            # The camera is still used to check the cached calibration, the
+            # calibration starts in update() once it is free
+            self.calibration_requested = True
+            self.calibration_button.set_text("Checking calibration...")
+            self.calibration_button.disable()
             return
+        self.start_calibration()
 
-        src_pts = np.float32(clicked_points)
-        dst_pts = np.float32(
-            [
-                [0, 0],
-                [self.manager.screen_width, 0],
-                [self.manager.screen_width, self.manager.screen_height],
-                [0, self.manager.screen_height],
-            ]
+    def start_calibration(self):
+        # Same settings as during the game, the corners depend on the resolution
+        self.calibration = CalibrationSession(
+            CAMERA_SETTINGS, self.manager.screen_width, self.manager.screen_height
         )
 
-        M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-        self.manager.shared_data["transform_matrix"] = M
-        self.manager.shared_data["calibration_points"] = clicked_points
+    def reset_calibration_button(self):
+        self.calibration_requested = False
+        self.calibration_button.set_text("Start Calibration")
+        self.calibration_button.enable()
+
+    def update_calibration(self):
+        state = self.calibration.update()
+        if state == "running":
+            return
+        if state == "done":
+            self.manager.set_calibration(
+                self.calibration.calibration_points, self.calibration.method
+            )
+        self.calibration = None
@@ -1,6 +1,8 @@
 import pygame
 import time
 from screens.screen_interface import ScreenInterface
+from utils.assets import load_image
+from utils.layout import DESIGN_HEIGHT, DESIGN_WIDTH
 from utils.utils import render_centered_text
 from utils.invisible_button import InvisibleButton
 
@@ -10,24 +12,16 @@ class EndOfGameScreen(ScreenInterface):
         super().__init__(manager)
 
         # Load the background with arrows
-        self.background_5_min = pygame.image.load(
-            "images/well_done_5_min.png"
-        ).convert()
-        self.background_20_lights = pygame.image.load(
-            "images/well_done_20_lights.png"
-        ).convert()
-        self.background_forward = pygame.image.load("images/well_done.png").convert()
+        size = manager.layout.size
+        self.background_5_min = load_image("images/well_done_5_min.png", size)
+        self.background_20_lights = load_image("images/well_done_20_lights.png", size)
+        self.background_forward = load_image("images/well_done.png", size)
 
+        layout = manager.layout
         self.feedback_buttons = {
-            "happy": pygame.Rect(
-                manager.screen_width // 2 - 150, manager.screen_height // 2, 50, 50
-            ),
-            "mid": pygame.Rect(
-                manager.screen_width // 2 - 25, manager.screen_height // 2, 50, 50
-            ),
-            "sad": pygame.Rect(
-                manager.screen_width // 2 + 100, manager.screen_height // 2, 50, 50
-            ),
+            "happy": layout.rect(DESIGN_WIDTH // 2 - 150, DESIGN_HEIGHT // 2, 50, 50),
+            "mid": layout.rect(DESIGN_WIDTH // 2 - 25, DESIGN_HEIGHT // 2, 50, 50),
+            "sad": layout.rect(DESIGN_WIDTH // 2 + 100, DESIGN_HEIGHT // 2, 50, 50),
         }
 
         # Generate invisible button
@@ -56,8 +50,7 @@ class EndOfGameScreen(ScreenInterface):
     def update(self):
         super().update()
 
-    def draw(self, surface):
-        super().draw(surface)
+    def compose_static_layer(self, surface):
         surface.fill((180, 180, 180))
 
         # Decide what text to show
@@ -76,12 +69,17 @@ class EndOfGameScreen(ScreenInterface):
             text,
             self.manager.big_letter_size,
             (255, 255, 255),
-            (self.manager.screen_width // 2, self.manager.screen_height // 2 + 75),
+            self.manager.layout.point(DESIGN_WIDTH // 2, DESIGN_HEIGHT // 2 + 75),
         )
 
         # Debug: Draw debug rectangles to verify button placement
         if self.manager.debug:
             self.forward_button.draw_debug(surface)
 
+    def draw(self, surface):
+        super().draw(surface)
+        # The number of dots does not change on this screen
+        return self.draw_static(surface)
+
     def on_exit(self):
         super().on_exit()
@@ -1,5 +1,7 @@
 import pygame
 from screens.screen_interface import ScreenInterface
+from utils.assets import load_image
+from utils.text_cache import TEXT_CACHE
 from utils.utils import render_text
 from utils.invisible_button import InvisibleButton
 
@@ -9,12 +11,7 @@ class ExplanationScreen(ScreenInterface):
         super().__init__(manager)
 
         # Load the background with arrows
-        self.background = pygame.image.load("images/game.png").convert()
-
-        self.screen_width = (
-            1792  # >> images imported from canva: scaling of 0.93333333333
-        )
-        self.screen_height = 1008
+        self.background = load_image("images/game.png", manager.layout.size)
 
         # Generate invisible buttons
         self.forward_button = InvisibleButton(
@@ -41,20 +38,17 @@ class ExplanationScreen(ScreenInterface):
     def update(self):
         super().update()
 
-    def draw(self, surface):
-        super().draw(surface)
+    def compose_static_layer(self, surface):
         # Draw the background
         surface.blit(self.background, (0, 0))
 
         # Font
-        titleFont = pygame.font.Font(None, 150)
-        textFont = pygame.font.Font(None, 60)
         white = (255, 255, 255)
 
         if self.manager.shared_data["game_mode"] == "Connect the Dots":
-            title_surface = titleFont.render(
-                "Punkte verbinden", True, white
-            )  # True enables anti-aliasing
+            title_surface = TEXT_CACHE.render(
+                "Punkte verbinden", self.manager.layout.length(150), white
+            )
             text_surface = """
             Willkommen! 
             
@@ -69,9 +63,9 @@ class ExplanationScreen(ScreenInterface):
 
         elif self.manager.shared_data["game_mode"] == "Circle the Dots":
             # text and title
-            title_surface = titleFont.render(
-                "Kreise zeichnen", True, white
-            )  # True enables anti-aliasing
+            title_surface = TEXT_CACHE.render(
+                "Kreise zeichnen", self.manager.layout.length(150), white
+            )
             text_surface = """
             Willkommen! 
             
@@ -85,26 +79,31 @@ class ExplanationScreen(ScreenInterface):
             Viel Spaß!"""
 
         # Get the rectangles for positioning
-        x, y = 180, 200
+        layout = self.manager.layout
+        x, y = layout.point(180, 200)
+        text_size = layout.length(60)
 
-        # title
-        title_rect = title_surface.get_rect(topleft=(300, 100))  # Centered at the top
+        # title, centered at the top
+        title_rect = title_surface.get_rect(topleft=layout.point(300, 100))
         surface.blit(title_surface, title_rect)
 
         # Starting position text
         for line in text_surface.splitlines():
-            line_surface = textFont.render(line, True, white)
+            line_surface = TEXT_CACHE.render(line, text_size, white)
             text_rect = line_surface.get_rect(topleft=(x, y))
             surface.blit(line_surface, text_rect)
-            y += textFont.get_linesize() + 10  # Move down by the font's line height
+            # Move down by the font's line height
+            y += TEXT_CACHE.font(text_size).get_linesize() + layout.length(10)
 
         # Debug: Draw debug rectangles to verify button placement
         if self.manager.debug:
             self.back_button.draw_debug(surface)
             self.forward_button.draw_debug(surface)
 
-            # Update the display
-        pygame.display.flip()
+    def draw(self, surface):
+        super().draw(surface)
+        # The text depends on the game mode, which is chosen before this screen
+        return self.draw_static(surface)
 
     def on_exit(self):
         super().on_exit()
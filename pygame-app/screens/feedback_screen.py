@@ -1,6 +1,7 @@
 import pygame
 import time
 from screens.screen_interface import ScreenInterface
+from utils.assets import load_image
 from utils.utils import load_sound
 from utils.invisible_button import InvisibleButton
 
@@ -10,39 +11,34 @@ class FeedbackScreen(ScreenInterface):
         super().__init__(manager)
 
         # Load the background with arrows
-        self.feedback = pygame.image.load("images/feedback.png").convert()
-        self.feedback_good = pygame.image.load("images/feedback_good.png").convert()
-        self.feedback_bad = pygame.image.load("images/feedback_bad.png").convert()
-        self.feedback_medium = pygame.image.load("images/feedback_medium.png").convert()
+        size = manager.layout.size
+        self.feedback = load_image("images/feedback.png", size)
+        self.feedback_good = load_image("images/feedback_good.png", size)
+        self.feedback_bad = load_image("images/feedback_bad.png", size)
+        self.feedback_medium = load_image("images/feedback_medium.png", size)
         self.current_screen = self.feedback
 
-        # Define feedback rectangles and get their invisible buttons
+        # Define feedback rectangles (in design pixels) and get their invisible buttons
         feedback_boxes_size = 350
         feedback_boxes_distance = 380
-        y_pos = manager.screen_height // 2 - 100
+        # The boxes start 100 pixels above the center
+        dy = feedback_boxes_size // 2 - 100
 
         self.feedback_rect = {
-            "happy": pygame.Rect(
-                manager.screen_width // 2
-                - feedback_boxes_size // 2
-                + feedback_boxes_distance,
-                y_pos,
+            "happy": manager.layout.centered_rect(
                 feedback_boxes_size,
                 feedback_boxes_size,
+                dx=feedback_boxes_distance,
+                dy=dy,
             ),
-            "medium": pygame.Rect(
-                manager.screen_width // 2 - feedback_boxes_size // 2,
-                y_pos,
-                feedback_boxes_size,
-                feedback_boxes_size,
+            "medium": manager.layout.centered_rect(
+                feedback_boxes_size, feedback_boxes_size, dy=dy
             ),
-            "sad": pygame.Rect(
-                manager.screen_width // 2
-                - feedback_boxes_size // 2
-                - feedback_boxes_distance,
-                y_pos,
+            "sad": manager.layout.centered_rect(
                 feedback_boxes_size,
                 feedback_boxes_size,
+                dx=-feedback_boxes_distance,
+                dy=dy,
             ),
         }
         self.feedback_buttons = {
@@ -111,6 +107,7 @@ class FeedbackScreen(ScreenInterface):
             print("currently handling", feedback)
         else:
             self.current_screen = self.feedback
+        self.invalidate()
 
         # Audio feedback, if button is pressed
         if self.click_sound:
@@ -128,17 +125,20 @@ class FeedbackScreen(ScreenInterface):
     def update(self):
         super().update()
 
-    def draw(self, surface):
-        super().draw(surface)
+    def compose_static_layer(self, layer):
         # Draw the background
-        surface.blit(self.current_screen, (0, 0))
+        layer.blit(self.current_screen, (0, 0))
 
         # Debug: Draw debug rectangles to verify button placement
         if self.manager.debug:
-            self.forward_button.draw_debug(surface)
-            self.back_button.draw_debug(surface)
+            self.forward_button.draw_debug(layer)
+            self.back_button.draw_debug(layer)
             for feedback_name, button in self.feedback_buttons.items():
-                button.draw_debug(surface)
+                button.draw_debug(layer)
+
+    def draw(self, surface):
+        super().draw(surface)
+        return self.draw_static(surface)
 
     def on_exit(self):
         super().on_exit()
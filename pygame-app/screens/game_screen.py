@@ -3,7 +3,14 @@ import time
 import cv2
 
 from screens.screen_interface import ScreenInterface
+from utils.assets import load_image
+from utils.camera import CAMERA_SETTINGS, open_camera
+from utils.coordinate_pipeline import CoordinatePipeline
 from utils.invisible_button import InvisibleButton
+from utils.layout import DESIGN_HEIGHT
+from utils.position_filters import DEFAULT_POSITION_FILTERS, make_position_filter
+from utils.text_cache import TEXT_CACHE
+from utils.utils import render_text
 
 
 WINDOW_NAME = "Finger Tracking Window"
@@ -14,7 +21,7 @@ class GameScreen(ScreenInterface):
         super().__init__(manager)
 
         # Background image
-        self.background = pygame.image.load("images/game.png").convert()
+        self.background = load_image("images/game.png", manager.layout.size)
 
         # Navigation buttons
         self.forward_button = InvisibleButton(
@@ -27,12 +34,24 @@ class GameScreen(ScreenInterface):
         # Finger tracking
         self.cap = None
         self.finger_tracker = None
+        self.tracking_worker = None
+        self.coordinate_pipeline = None  # Camera pixels to game screen coordinates
         self.finger_x = None
         self.finger_y = None
+        self.last_position_seq = 0
+        self.last_preview_seq = 0
+        self.position_filter = None
+        self.tracking_governor = None
+        # Finger mode waits in update() until the cached calibration was checked
+        self.waiting_for_calibration = False
+        # Frames per MediaPipe detection, optical flow in between (1 = detect every frame)
+        self.detect_every = 4
+        # Quality tier the next session starts with (the last one chosen by the governor)
+        self.tracking_tier = 0
 
         # Game screen configuration
         self.rescale_to_game_screen = True
-        self.border_width = 8
+        self.border_width = manager.layout.length(8)
         self.game_screen_width = None
         self.game_screen_height = None
         self.x_offset = None
@@ -53,6 +72,7 @@ class GameScreen(ScreenInterface):
         self.manager.shared_data["end_time"] = None
         self.manager.shared_data["end_reason"] = None
         self.manager.shared_data["feedback"] = None
+        self.manager.shared_data["tracking_quality"] = None
 
         # Log a new game
         self.manager.logger.start_new_game()
@@ -68,8 +88,19 @@ class GameScreen(ScreenInterface):
         self.transform_matrix = self.manager.shared_data.get("transform_matrix")
         self.calibration_points = self.manager.shared_data.get("calibration_points", [])
 
+        # Smoothing and latency compensation of the finger positions, the mouse
+        # positions are used as they are
+        self.position_filter = None
         if self.input_mode == "finger":
-            self.initialize_finger_tracking()
+            position_filters = self.manager.shared_data.get(
+                "position_filters", DEFAULT_POSITION_FILTERS
+            )
+            self.position_filter = make_position_filter(
+                position_filters.get("finger", {"type": "none"})
+            )
+
+        # The camera may still be used to check the cached calibration
+        self.waiting_for_calibration = self.input_mode == "finger"
 
     def sync_game_screen_dimensions(self):
         """
@@ -92,26 +123,47 @@ class GameScreen(ScreenInterface):
 
     def initialize_finger_tracking(self):
         """
-        Sets up the OpenCV webcam capture and initializes a FingerTracker.
+        Opens the webcam with a low latency configuration, initializes a
+        FingerTracker and starts the worker that runs both in the background.
         """
         from utils.finger_tracking_mediapipe import FingerTracker
+        from utils.hybrid_finger_tracker import HybridFingerTracker
+        from utils.tracking_governor import TrackingGovernor
+        from utils.tracking_worker import TrackingWorker
 
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        # The validator may have replaced the calibration
+        self.transform_matrix = self.manager.shared_data.get("transform_matrix")
+        self.calibration_points = self.manager.shared_data.get("calibration_points", [])
+        self.cap = open_camera(**CAMERA_SETTINGS)
+        if self.cap is None:
             print("Warning: Could not open webcam.")
-            self.cap = None
         else:
             print("Tracking finger...")
+            self.coordinate_pipeline = self.build_coordinate_pipeline()
             self.finger_tracker = FingerTracker(
                 transform_matrix=self.transform_matrix,
                 screen_width=self.manager.screen_width,
                 screen_height=self.manager.screen_height,
                 calibration_points=self.calibration_points,
+                coordinate_pipeline=self.coordinate_pipeline,
             )
+            if self.detect_every > 1:
+                self.finger_tracker = HybridFingerTracker(
+                    self.finger_tracker, detect_every=self.detect_every
+                )
             # Configure the OpenCV window
             cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
             cv2.resizeWindow(WINDOW_NAME, 640, 480)
 
+            # Capture and tracking run off the render thread
+            self.last_position_seq = 0
+            self.last_preview_seq = 0
+            self.tracking_governor = TrackingGovernor(start_tier=self.tracking_tier)
+            self.tracking_worker = TrackingWorker(
+                self.cap, self.finger_tracker, governor=self.tracking_governor
+            )
+            self.tracking_worker.start()
+
     def go_back(self):
         """
         Called when the back button is pressed.
@@ -143,42 +195,95 @@ class GameScreen(ScreenInterface):
         Handles finger tracking input if in finger mode.
         """
         super().update()
-        if self.input_mode == "finger" and self.cap is not None:
-            ret, frame = self.cap.read()
-            if ret:
-                self.process_finger_tracking(frame)
+        if self.waiting_for_calibration and not self.manager.calibration_busy():
+            self.waiting_for_calibration = False
+            self.initialize_finger_tracking()
+        if self.input_mode == "finger" and self.tracking_worker is not None:
+            self.process_finger_tracking()
+            # Time of the last game frame without the wait of clock.tick()
+            self.tracking_governor.report_frame_time(
+                self.manager.clock.get_rawtime() / 1000
+            )
 
         # If the game has ended, switch screens
         if self.manager.game.game_ended:
             self.manager.switch_screen("END_OF_GAME_SCREEN")
 
-    def process_finger_tracking(self, frame):
+    def process_finger_tracking(self):
         """
-        Reads the current frame for finger tracking, updates the game
-        with finger positions, and displays an OpenCV window.
+        Polls the newest finger position of the tracking worker, filters it, predicts
+        where the finger is now (compensating camera and inference latency), updates
+        the game with it, and displays the newest tracked camera frame in an OpenCV window.
         """
-        if not self.finger_tracker:
-            # If FingerTracker is not set, do nothing
-            return
-        finger_data = self.finger_tracker.get_finger_position(frame)
-        if finger_data:
-            mapped_x, mapped_y, cam_x, cam_y = finger_data
-            if self.rescale_to_game_screen:
+        with self.profile("finger position"):
+            self.update_finger_position()
+
+        # Even if there's no finger, frame and video will still be shown
+        with self.profile("camera preview"):
+            frame, frame_seq = self.tracking_worker.get_preview_frame()
+            if frame is not None and frame_seq != self.last_preview_seq:
+                self.last_preview_seq = frame_seq
+                self.draw_calibration_rectangle(frame)
+                cv2.imshow(WINDOW_NAME, frame)
+            cv2.waitKey(1)
+
+    def update_finger_position(self):
+        """Updates the game with the newest finger position, if there is a new one."""
+        finger_position = self.tracking_worker.get_position()
+        if (
+            finger_position is not None
+            and finger_position.seq != self.last_position_seq
+        ):
+            self.last_position_seq = finger_position.seq
+            mapped_x, mapped_y = finger_position.mapped_x, finger_position.mapped_y
+            # The coordinate pipeline already maps onto the game screen
+            if self.rescale_to_game_screen and self.coordinate_pipeline is None:
                 mapped_x = self.rescale_x(mapped_x)
                 mapped_y = self.rescale_y(mapped_y)
 
+            capture_time = finger_position.capture_time
+            mapped_x, mapped_y = self.position_filter.update(
+                mapped_x, mapped_y, capture_time
+            )
+            mapped_x, mapped_y = self.position_filter.predict(
+                mapped_x, mapped_y, capture_time
+            )
+
             # Update the game logic with these coordinates
             self.finger_x, self.finger_y = mapped_x, mapped_y
             self.manager.game.update(self.finger_x, self.finger_y)
             self.manager.logger.append_position_data(self.finger_x, self.finger_y)
 
-            # Draw a red circle in the camera feed where the finger is
-            cv2.circle(frame, (cam_x, cam_y), 10, (0, 0, 255), -1)
+    def build_coordinate_pipeline(self):
+        """
+        Composes the lens correction (if the camera was calibrated with
+        `python -m utils.coordinate_pipeline calibrate-lens`), the perspective transform
+        and the rescale to the game screen into one mapping from camera pixels.
+        Returns None without calibration points.
+        """
+        if len(self.calibration_points) != 4:
+            return None
+        game_rect = None
+        if self.rescale_to_game_screen and self.game_screen_width is not None:
+            game_rect = (
+                self.x_offset,
+                self.y_offset,
+                self.game_screen_width,
+                self.game_screen_height,
+            )
+        return CoordinatePipeline.build(
+            self.calibration_points,
+            self.manager.screen_width,
+            self.manager.screen_height,
+            game_rect=game_rect,
+            camera_matrix=self.manager.shared_data.get("camera_matrix"),
+            dist_coeffs=self.manager.shared_data.get("dist_coeffs"),
+            frame_size=(CAMERA_SETTINGS["width"], CAMERA_SETTINGS["height"]),
+        )
 
-        # Even if there's no finger, frame and vido will still be shown
-        self.draw_calibration_rectangle(frame)
-        cv2.imshow(WINDOW_NAME, frame)
-        cv2.waitKey(1)
+    def get_frame_rate(self):
+        # The game and the finger cursor move all the time
+        return 60
 
     def draw_calibration_rectangle(self, frame):
         """
@@ -231,13 +336,39 @@ class GameScreen(ScreenInterface):
             and self.finger_y is not None
         ):
             pygame.draw.circle(
-                surface, (255, 0, 0), (int(self.finger_x), int(self.finger_y)), 10
+                surface,
+                (255, 0, 0),
+                (int(self.finger_x), int(self.finger_y)),
+                self.manager.layout.length(10),
+            )
+
+        if self.waiting_for_calibration:
+            render_text(
+                surface,
+                "Checking the camera calibration...",
+                self.manager.minimum_letter_size,
+                (255, 255, 255),
+                self.manager.layout.point(10, DESIGN_HEIGHT - 80),
             )
 
-        # Debug outlines for buttons
+        # Debug outlines for buttons and tracking statistics
         if self.manager.debug:
             self.back_button.draw_debug(surface)
             self.forward_button.draw_debug(surface)
+            if self.tracking_worker is not None:
+                stats = self.tracking_worker.get_stats()
+                render_text(
+                    surface,
+                    f"Camera: {stats['capture_fps']:.0f} FPS - "
+                    f"Tracker: {stats['tracker_fps']:.0f} FPS, "
+                    f"{stats['inference_ms']:.0f} ms - "
+                    f"Dropped: {stats['frames_dropped']} - "
+                    f"Quality: {self.tracking_governor.current_tier()['name']} - "
+                    f"Text cache: {TEXT_CACHE.get_stats()['hit_rate']:.0%} hits",
+                    self.manager.layout.length(30),
+                    (255, 255, 255),
+                    self.manager.layout.point(10, DESIGN_HEIGHT - 30),
+                )
 
     def rescale_x(self, x):
         """
@@ -260,10 +391,26 @@ class GameScreen(ScreenInterface):
     def on_exit(self):
         """
         Cleans up resources when leaving this screen.
-        Closes OpenCV windows and releases the webcam capture.
+        Flushes the logged data, stops the tracking worker, closes OpenCV windows
+        and releases the webcam capture.
         """
         super().on_exit()
+        self.waiting_for_calibration = False
         self.manager.game.end_game()
+        # Write all trajectory and knee angle rows of this game to disk
+        self.manager.logger.flush()
+        if self.tracking_worker is not None:
+            self.tracking_worker.stop()
+            print(f"Finger tracking: {self.tracking_worker.get_stats()}")
+            if hasattr(self.finger_tracker, "get_stats"):
+                print(f"Detect-then-track: {self.finger_tracker.get_stats()}")
+            self.tracking_worker = None
+            # Logged with the game (see Logger.log_shared_data)
+            self.manager.shared_data["tracking_quality"] = (
+                self.tracking_governor.summary()
+            )
+            self.tracking_tier = self.tracking_governor.tier
+            self.tracking_governor = None
         if self.cap is not None:
             cv2.destroyAllWindows()  # Close any OpenCV windows
             cv2.waitKey(1)  # Allow the OS time to process the close
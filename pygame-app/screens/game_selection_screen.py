@@ -2,6 +2,9 @@ import pygame
 import pygame_gui
 from games.connect_dots import TouchDots
 from screens.screen_interface import ScreenInterface
+from utils.assets import load_image
+from utils.layout import DESIGN_HEIGHT, DESIGN_WIDTH
+from utils.text_cache import TEXT_CACHE
 from utils.utils import render_text
 from utils.invisible_button import InvisibleButton
 
@@ -17,7 +20,7 @@ class GameSelectionScreen(ScreenInterface):
         super().__init__(manager)
 
         # Load the background with arrows
-        self.background = pygame.image.load("images/game.png").convert()
+        self.background = load_image("images/game.png", manager.layout.size)
 
         # UI manager for managing GUI elements
         self.ui_manager = pygame_gui.UIManager(
@@ -29,11 +32,8 @@ class GameSelectionScreen(ScreenInterface):
         self.game_mode_dropdown = pygame_gui.elements.UIDropDownMenu(
             options_list=["Connect the Dots", "Circle the Dots"],
             starting_option="Connect the Dots",  # default
-            relative_rect=pygame.Rect(
-                manager.screen_width // 2 - 125,
-                manager.screen_height // 2,
-                250,
-                80,
+            relative_rect=manager.layout.rect(
+                DESIGN_WIDTH // 2 - 125, DESIGN_HEIGHT // 2, 250, 80
             ),
             manager=self.ui_manager,
         )
@@ -41,11 +41,8 @@ class GameSelectionScreen(ScreenInterface):
         self.level_dropdown = pygame_gui.elements.UIDropDownMenu(
             options_list=["Level 1", "Level 2", "Level 3"],
             starting_option="Level 1",  # default
-            relative_rect=pygame.Rect(
-                manager.screen_width // 2 - 125,
-                manager.screen_height // 2 + 80,
-                250,
-                80,
+            relative_rect=manager.layout.rect(
+                DESIGN_WIDTH // 2 - 125, DESIGN_HEIGHT // 2 + 80, 250, 80
             ),
             manager=self.ui_manager,
         )
@@ -90,42 +87,44 @@ class GameSelectionScreen(ScreenInterface):
         time_delta = self.manager.clock.get_time() / 1000.0
         self.ui_manager.update(time_delta)
 
-    def draw(self, surface):
-        super().draw(surface)
-
+    def compose_static_layer(self, surface):
         # Draw the background
         surface.blit(self.background, (0, 0))
 
         # Font
-        titleFont = pygame.font.Font(None, 150)
-        textFont = pygame.font.Font(None, 60)
         white = (255, 255, 255)
 
         # text and title
-        title_surface = titleFont.render(
-            "Spielauswahl", True, white
-        )  # True enables anti-aliasing
+        title_surface = TEXT_CACHE.render(
+            "Spielauswahl", self.manager.layout.length(150), white
+        )
         text_surface = """
         Bitte wählen Sie ein Spiel und ein Level aus."""
 
         # Get the rectangles for positioning
-        x, y = 180, 200
+        layout = self.manager.layout
+        x, y = layout.point(180, 200)
+        text_size = layout.length(60)
 
-        # title
-        title_rect = title_surface.get_rect(topleft=(300, 100))  # Centered at the top
+        # title, centered at the top
+        title_rect = title_surface.get_rect(topleft=layout.point(300, 100))
         surface.blit(title_surface, title_rect)
 
         # Starting position text
         for line in text_surface.splitlines():
-            line_surface = textFont.render(line, True, white)
+            line_surface = TEXT_CACHE.render(line, text_size, white)
             text_rect = line_surface.get_rect(topleft=(x, y))
             surface.blit(line_surface, text_rect)
-            y += textFont.get_linesize() + 10  # Move down by the font's line height
+            # Move down by the font's line height
+            y += TEXT_CACHE.font(text_size).get_linesize() + layout.length(10)
 
-        self.ui_manager.draw_ui(surface)
+    def get_frame_rate(self):
+        # pygame_gui animates the elements (e.g. hovering, opening dropdowns)
+        return 30
 
-        # Update the display
-        pygame.display.flip()
+    def draw(self, surface):
+        super().draw(surface)
+        return self.draw_static_with_ui(surface, self.ui_manager)
 
     def on_exit(self):
         super().on_exit()
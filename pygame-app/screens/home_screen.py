@@ -1,33 +1,29 @@
 import pygame
 from screens.screen_interface import ScreenInterface
+from utils.assets import load_image
 
 
 class HomeScreen(ScreenInterface):
     def __init__(self, manager):
         super().__init__(manager)
 
-        self.background = pygame.image.load("images/start.png").convert()
+        self.background = load_image("images/start.png", manager.layout.size)
 
         # Invisible button area in the middle
         button_width = 800
         button_height = 1000
-        self.start_button_rect = pygame.Rect(
-            (
-                manager.screen_width // 2 - button_width // 2,
-                manager.screen_height // 2 - button_height // 2,
-            ),
-            (button_width, button_height),
+        self.start_button_rect = manager.layout.centered_rect(
+            button_width, button_height
         )
 
         # Invisible button area in the upper left corner for the configuration file
         button_width = 100
         button_height = 100
-        self.config_button_rect = pygame.Rect(
-            (
-                400 - button_width // 2,
-                200 - button_height // 2,
-            ),
-            (button_width, button_height),
+        self.config_button_rect = manager.layout.rect(
+            400 - button_width // 2,
+            200 - button_height // 2,
+            button_width,
+            button_height,
         )
 
     def on_enter(self):
@@ -44,13 +40,16 @@ class HomeScreen(ScreenInterface):
     def update(self):
         super().update()
 
-    def draw(self, surface):
-        super().draw(surface)
-        surface.blit(self.background, (0, 0))
+    def compose_static_layer(self, layer):
+        layer.blit(self.background, (0, 0))
         # Debug size of invisible button
         if self.manager.debug:
-            pygame.draw.rect(surface, (255, 0, 0), self.start_button_rect, 2)
-            pygame.draw.rect(surface, (255, 0, 0), self.config_button_rect, 2)
+            pygame.draw.rect(layer, (255, 0, 0), self.start_button_rect, 2)
+            pygame.draw.rect(layer, (255, 0, 0), self.config_button_rect, 2)
+
+    def draw(self, surface):
+        super().draw(surface)
+        return self.draw_static(surface)
 
     def on_exit(self):
         super().on_exit()
@@ -1,5 +1,6 @@
 import pygame
 from screens.screen_interface import ScreenInterface
+from utils.assets import load_image
 from utils.invisible_button import InvisibleButton
 
 
@@ -7,27 +8,18 @@ class RepeatScreen(ScreenInterface):
     def __init__(self, manager):
         super().__init__(manager)
         # Just one big 'repeat' arrow in the middle
-        self.repeat_rect = pygame.Rect(
-            (manager.screen_width // 2 - 50, manager.screen_height // 2 - 50),
-            (100, 100),
-        )
+        self.repeat_rect = manager.layout.centered_rect(100, 100)
 
         # Big repeat button in the middle
         button_width = 800
         button_height = 1000
-        button_rect = pygame.Rect(
-            (
-                manager.screen_width // 2 - button_width // 2,
-                manager.screen_height // 2 - button_height // 2,
-            ),
-            (button_width, button_height),
-        )
+        button_rect = manager.layout.centered_rect(button_width, button_height)
         self.repeat_button = InvisibleButton(
             manager, rect=button_rect, callback=self.go_forward
         )
 
         # Load the background
-        self.background = pygame.image.load("images/repeat.png").convert()
+        self.background = load_image("images/repeat.png", manager.layout.size)
 
     def on_enter(self):
         super().on_enter()
@@ -42,14 +34,17 @@ class RepeatScreen(ScreenInterface):
     def update(self):
         super().update()
 
-    def draw(self, surface):
-        super().draw(surface)
+    def compose_static_layer(self, layer):
         # Draw the background
-        surface.blit(self.background, (0, 0))
+        layer.blit(self.background, (0, 0))
 
         # Debug: Draw debug rectangles to verify button placement
         if self.manager.debug:
-            self.repeat_button.draw_debug(surface)
+            self.repeat_button.draw_debug(layer)
+
+    def draw(self, surface):
+        super().draw(surface)
+        return self.draw_static(surface)
 
     def on_exit(self):
         super().on_exit()
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+import pygame
+
 
 class ScreenInterface(ABC):
 
@@ -7,6 +9,12 @@ class ScreenInterface(ABC):
     def __init__(self, manager):
         self.manager = manager
 
+        # Static content (background, fixed text) is composed once into a layer and
+        # only presented again when it changed, see draw_static()
+        self.static_layer = None
+        self.needs_redraw = True
+        self.previous_ui_rects = []
+
     @abstractmethod
     def handle_event(self, event):
         pass
@@ -17,12 +25,76 @@ class ScreenInterface(ABC):
 
     @abstractmethod
     def draw(self, surface):
+        """
+        Draws the screen. Returns the list of rectangles that changed, or None if the
+        whole screen has to be presented again.
+        """
         pass
 
     @abstractmethod
     def on_enter(self):
-        pass
+        self.invalidate()
 
     @abstractmethod
     def on_exit(self):
         pass
+
+    def get_frame_rate(self):
+        """
+        Frames per second the screen needs, or None if it only changes on input
+        events. The main loop then sleeps until the next event (see FrameScheduler).
+        """
+        return None
+
+    def profile(self, name):
+        """
+        Context manager recording a named span of the frame in the frame profile
+        (F3), e.g. `with self.profile("camera preview"): ...`.
+        """
+        return self.manager.profiler.measure(name)
+
+    def invalidate(self):
+        """Composes the static layer again and presents the whole screen."""
+        self.static_layer = None
+        self.needs_redraw = True
+
+    def compose_static_layer(self, layer):
+        """Draws the static content of the screen onto the layer."""
+        pass
+
+    def draw_static(self, surface):
+        """
+        Blits the static layer if it is not on the surface yet.
+
+        :return: The dirty rectangles: the whole surface, or none.
+        """
+        if not self.needs_redraw:
+            return []
+        if self.static_layer is None:
+            self.static_layer = pygame.Surface(surface.get_size()).convert()
+            self.compose_static_layer(self.static_layer)
+        surface.blit(self.static_layer, (0, 0))
+        self.needs_redraw = False
+        return [surface.get_rect()]
+
+    def draw_static_with_ui(self, surface, ui_manager):
+        """
+        Draws the static layer with the pygame_gui elements on top. Only the areas of
+        the elements, and the areas they covered before (e.g. of a closed dropdown),
+        are restored from the layer and presented again.
+        """
+        dirty_rects = self.draw_static(surface)
+        screen_rect = surface.get_rect()
+        # Containers have an empty image and cover the whole screen
+        ui_rects = [
+            element.rect.clip(screen_rect)
+            for element in ui_manager.get_sprite_group()
+            if element.image is not None and element.image.get_size() != (0, 0)
+        ]
+        if not dirty_rects:
+            dirty_rects = ui_rects + self.previous_ui_rects
+            for rect in dirty_rects:
+                surface.blit(self.static_layer, rect, rect)
+        ui_manager.draw_ui(surface)
+        self.previous_ui_rects = ui_rects
+        return dirty_rects
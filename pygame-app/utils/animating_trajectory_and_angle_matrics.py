@@ -223,8 +223,22 @@ def convert_time_to_seconds(time_str):
         return np.nan
 
 
+def load_binary_data(bin_file):
+    """Load trajectory or knee-angle data from a binary log without parsing any time strings."""
+    from utils.binary_log import load_binary_log, record_times_in_ms
+
+    header, records = load_binary_log(bin_file)
+    timepoints_in_ms = record_times_in_ms(header, records)
+    if "knee_angle" in records.dtype.names:
+        return timepoints_in_ms, records["knee_angle"]
+    return timepoints_in_ms, records["finger_x"], records["finger_y"]
+
+
 def load_data(csv_file, has_headers=False):
-    """Load 2D trajectory data (x,y) from a CSV file."""
+    """Load 2D trajectory data (x,y) from a CSV file (or a binary .bin log)."""
+    if Path(csv_file).suffix == ".bin":
+        return load_binary_data(csv_file)
+
     if has_headers:
         df = pd.read_csv(csv_file)
     else:
@@ -269,6 +283,9 @@ def load_data(csv_file, has_headers=False):
 
 def load_angle_data(csv_file):
     """Load knee-angle data from CSV with columns like [timepoint, time_in_microseconds, knee_angle]."""
+    if Path(csv_file).suffix == ".bin":
+        return load_binary_data(csv_file)
+
     df = pd.read_csv(csv_file)
     if not {"timepoint", "time_in_microseconds", "knee_angle"}.issubset(df.columns):
         raise ValueError(
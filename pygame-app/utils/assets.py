@@ -0,0 +1,112 @@
+import argparse
+import glob
+import hashlib
+import os
+import time
+
+import pygame
+
+# Images scaled to the window size are stored here, so they are scaled only once
+# per machine and loaded without decoding the PNG on later starts
+ASSET_CACHE_DIR = os.path.join("cache", "assets")
+
+# Images already loaded in this run, several screens share a background
+_loaded = {}
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def load_image(path, size=None, alpha=False, cache_dir=ASSET_CACHE_DIR):
+    """
+    Loads an image scaled to `size` with smoothscale and converted to the pixel
+    format of the window. The raw pixels of the scaled image are cached on disk,
+    keyed by the hash of the image file and the size, so a changed image is scaled
+    again.
+
+    :param size: (width, height) in pixels, e.g. the window size. None keeps the
+        size of the image (and does not use the disk cache).
+    :param alpha: Keep the transparency of the image.
+    """
+    key = (path, None if size is None else tuple(size), alpha)
+    surface = _loaded.get(key)
+    if surface is not None:
+        return surface
+
+    if size is None:
+        surface = pygame.image.load(path)
+    else:
+        surface = _load_scaled(path, tuple(size), alpha, cache_dir)
+    surface = surface.convert_alpha() if alpha else surface.convert()
+    _loaded[key] = surface
+    return surface
+
+
+def _load_scaled(path, size, alpha, cache_dir):
+    pixel_format = "RGBA" if alpha else "RGBX"
+    name = os.path.splitext(os.path.basename(path))[0]
+    cache_file = os.path.join(
+        cache_dir,
+        f"{name}_{_file_hash(path)}_{size[0]}x{size[1]}_{pixel_format.lower()}.raw",
+    )
+    if os.path.exists(cache_file):
+        with open(cache_file, "rb") as f:
+            data = f.read()
+        if len(data) == size[0] * size[1] * 4:
+            return pygame.image.frombytes(data, size, pixel_format)
+        print(f"Ignoring the damaged asset cache file {cache_file}")
+
+    surface = pygame.image.load(path)
+    if surface.get_size() != size:
+        if surface.get_bitsize() < 24:
+            # smoothscale needs 24 or 32 bit pixels
+            surface = surface.convert_alpha() if alpha else surface.convert(24)
+        surface = pygame.transform.smoothscale(surface, size)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written under another name first, so a crash leaves no partial file
+        temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temporary_file, "wb") as f:
+            f.write(pygame.image.tobytes(surface, pixel_format))
+        os.replace(temporary_file, cache_file)
+    except OSError as e:
+        print(f"Could not cache {path}: {e}")
+    return surface
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scale the images for a window size into the asset cache, and "
+        "compare the load times with and without the cache."
+    )
+    parser.add_argument(
+        "--size", default="1920x1080", help="Window size, e.g. 1280x720"
+    )
+    parser.add_argument("--images", default="images/*.png")
+    args = parser.parse_args()
+
+    size = tuple(int(n) for n in args.size.lower().split("x"))
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode(size)
+    paths = sorted(glob.glob(args.images))
+
+    start = time.perf_counter()
+    for path in paths:
+        pygame.transform.smoothscale(pygame.image.load(path).convert(), size)
+    uncached = time.perf_counter() - start
+
+    for path in paths:
+        _load_scaled(path, size, False, ASSET_CACHE_DIR)
+    _loaded.clear()
+    start = time.perf_counter()
+    for path in paths:
+        load_image(path, size)
+    cached = time.perf_counter() - start
+
+    print(
+        f"{len(paths)} images at {size[0]}x{size[1]}: load + smoothscale "
+        f"{uncached * 1000:.0f} ms, from the asset cache {cached * 1000:.0f} ms"
+    )
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+# Marker that tells the writer thread to write everything and stop
+_STOP = object()
+
+
+class _FlushRequest:
+    """Queued behind the rows to flush; its event is set once they are written."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class BatchedWriter:
+    def __init__(
+        self,
+        write_batch,
+        max_queue_size=10000,
+        flush_size=256,
+        flush_interval=0.5,
+        name="BatchedWriter",
+    ):
+        """
+        Collects rows from any thread in a bounded queue and writes them in batches
+        from a dedicated writer thread.
+
+        :param write_batch: Function (key, rows) that writes rows for one key (e.g. a file
+            path). rows is a list of rows, or an array handed to put_batch as it is.
+        :param max_queue_size: Maximum number of queue items (single rows or batches) waiting in memory.
+            Further rows are dropped.
+        :param flush_size: Number of pending rows that triggers a write.
+        :param flush_interval: Maximum time in seconds that a row waits before it is written.
+        :param name: Name of the writer thread.
+        """
+        self.write_batch = write_batch
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.dropped_rows = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, key, row):
+        """
+        Hands a row over to the writer thread without blocking the caller.
+        Returns False if the queue is full and the row was dropped.
+        """
+        return self.put_batch(key, [row])
+
+    def put_batch(self, key, rows):
+        """
+        Hands a list of rows, or an array of rows (e.g. a numpy structured array),
+        over to the writer thread as a single queue item. Arrays are passed to
+        write_batch without being split into rows.
+        Returns False if the queue is full and the rows were dropped.
+        """
+        try:
+            self._queue.put_nowait((key, rows))
+            return True
+        except queue.Full:
+            if self.dropped_rows == 0:
+                print("Warning: Log queue is full, dropping rows.")
+            self.dropped_rows += len(rows)
+            return False
+
+    def flush(self, timeout=None):
+        """
+        Blocks until all rows queued before this call have been written.
+        """
+        if not self._thread.is_alive():
+            return
+        request = _FlushRequest()
+        self._queue.put(request)
+        request.done.wait(timeout)
+
+    def close(self, timeout=None):
+        """
+        Writes all remaining rows and stops the writer thread.
+        """
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        pending = {}  # key -> list of chunks (lists of rows or arrays)
+        n_pending = 0
+        last_write = time.monotonic()
+
+        while True:
+            remaining = self.flush_interval - (time.monotonic() - last_write)
+            try:
+                item = self._queue.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple):
+                key, rows = item
+                chunks = pending.setdefault(key, [])
+                if isinstance(rows, list) and chunks and isinstance(chunks[-1], list):
+                    chunks[-1].extend(rows)
+                elif isinstance(rows, list):
+                    chunks.append(list(rows))
+                else:
+                    chunks.append(rows)
+                n_pending += len(rows)
+                # Keep collecting until one of the thresholds is reached
+                if (
+                    n_pending < self.flush_size
+                    and time.monotonic() - last_write < self.flush_interval
+                ):
+                    continue
+
+            self._write_pending(pending)
+            pending = {}
+            n_pending = 0
+            last_write = time.monotonic()
+
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+            elif item is _STOP:
+                return
+
+    def _write_pending(self, pending):
+        for key, chunks in pending.items():
+            for rows in _merge_arrays(chunks):
+                try:
+                    self.write_batch(key, rows)
+                except Exception as e:
+                    # Never let a failing write kill the writer thread
+                    print(f"Failed to write {len(rows)} rows to {key}: {e}")
+
+
+def _merge_arrays(chunks):
+    """Concatenates consecutive arrays of the same dtype, so they are written at once."""
+    merged = []
+    for chunk in chunks:
+        previous = merged[-1] if merged else None
+        if (
+            isinstance(chunk, np.ndarray)
+            and isinstance(previous, np.ndarray)
+            and previous.dtype == chunk.dtype
+        ):
+            merged[-1] = np.concatenate((previous, chunk))
+        else:
+            merged.append(chunk)
+    return merged
@@ -0,0 +1,226 @@
+import argparse
+import csv
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Every binary log starts with this header. It anchors the monotonic timestamps
+# of the records to the wall clock at the moment the file was created.
+MAGIC = b"RHB1"
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u4"),
+        ("epoch_ns", "<i8"),  # time.time_ns() at creation
+        ("monotonic_ns", "<i8"),  # time.monotonic_ns() at creation
+    ]
+)
+
+# Fixed-width records, appended one after the other after the header
+TRAJECTORY_DTYPE = np.dtype(
+    [("monotonic_ns", "<i8"), ("finger_x", "<f4"), ("finger_y", "<f4")]
+)
+KNEE_ANGLE_DTYPE = np.dtype([("monotonic_ns", "<i8"), ("knee_angle", "<f4")])
+
+NS_PER_DAY = 24 * 3600 * 10**9
+
+
+def create_binary_log(filename, epoch_ns=None, monotonic_ns=None):
+    """
+    Creates a new binary log file that only contains the header.
+    """
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = 1
+    header["epoch_ns"] = time.time_ns() if epoch_ns is None else epoch_ns
+    header["monotonic_ns"] = (
+        time.monotonic_ns() if monotonic_ns is None else monotonic_ns
+    )
+    with open(filename, "wb") as file:
+        file.write(header.tobytes())
+
+
+def append_records(filename, rows, dtype):
+    """
+    Appends a list of row tuples (monotonic_ns, value, ...), or a structured array
+    of the record dtype, as fixed-width records.
+    """
+    records = np.asarray(rows, dtype=dtype)
+    with open(filename, "ab") as file:
+        file.write(records.tobytes())
+
+
+def read_header(filename):
+    header = np.fromfile(filename, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{filename} is not a binary log file")
+    return header[0]
+
+
+def load_binary_log(filename, dtype=None):
+    """
+    Maps the records of a binary log into memory without copying them.
+
+    :param filename: Path to the binary log.
+    :param dtype: Record dtype. Guessed from the file name if not given.
+    :return: Tuple of (header, records) where records is a read-only numpy.memmap.
+    """
+    header = read_header(filename)
+    if dtype is None:
+        dtype = dtype_for_filename(filename)
+
+    # Ignore a partially written last record
+    n_records = (
+        Path(filename).stat().st_size - HEADER_DTYPE.itemsize
+    ) // dtype.itemsize
+    if n_records == 0:
+        return header, np.zeros(0, dtype=dtype)
+    records = np.memmap(
+        filename,
+        dtype=dtype,
+        mode="r",
+        offset=HEADER_DTYPE.itemsize,
+        shape=(n_records,),
+    )
+    return header, records
+
+
+def dtype_for_filename(filename):
+    name = Path(filename).name
+    if name.startswith("trajectory"):
+        return TRAJECTORY_DTYPE
+    if name.startswith("knee_angle"):
+        return KNEE_ANGLE_DTYPE
+    raise ValueError(f"Cannot tell the record type of {filename} from its name")
+
+
+def wall_clock_ns(header, records):
+    """Converts the monotonic timestamps of the records to wall clock nanoseconds."""
+    return header["epoch_ns"] + (
+        records["monotonic_ns"].astype(np.int64) - header["monotonic_ns"]
+    )
+
+
+def record_times_in_ms(header, records):
+    """
+    Time of each record in milliseconds since midnight of the day the file was created,
+    i.e. the same time base that the csv loaders use. Unlike the csv time strings it keeps
+    increasing past midnight.
+    """
+    created = datetime.fromtimestamp(int(header["epoch_ns"]) / 1e9)
+    midnight_ns = int(
+        created.replace(hour=0, minute=0, second=0, microsecond=0).timestamp() * 1e9
+    )
+    return (wall_clock_ns(header, records) - midnight_ns) / 1e6
+
+
+def binary_to_csv(bin_filename, csv_filename=None):
+    """
+    Writes a binary log in the csv layout of the Logger.
+    """
+    bin_filename = Path(bin_filename)
+    if csv_filename is None:
+        csv_filename = bin_filename.with_suffix(".csv")
+
+    header, records = load_binary_log(bin_filename)
+    value_columns = [name for name in records.dtype.names if name != "monotonic_ns"]
+    wall_ns = wall_clock_ns(header, records)
+
+    with open(csv_filename, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["timepoint", "time_in_microseconds", *value_columns])
+        for i, timestamp_ns in enumerate(wall_ns):
+            now = datetime.fromtimestamp(int(timestamp_ns) // 1000 / 1e6)
+            writer.writerow(
+                [
+                    now.strftime("%H:%M:%S"),
+                    now.strftime("%f"),
+                    *(float(records[column][i]) for column in value_columns),
+                ]
+            )
+    return csv_filename
+
+
+def read_csv_log(csv_filename, date=None):
+    """
+    Reads a csv log of the Logger.
+
+    The csv files only store the time of day. The date is taken from the
+    `<name>_YYYYmmdd-HHMMSS.csv` file name, or from `date` if given. A time of
+    day that jumps backwards by more than 12 hours is treated as midnight.
+
+    :return: Tuple of (midnight_ns, rows). midnight_ns is the wall clock time of the
+        midnight before the first row, each row is (nanoseconds since that
+        midnight, value, ...) with the values of the record dtype of the file.
+    """
+    csv_filename = Path(csv_filename)
+    dtype = dtype_for_filename(csv_filename)
+    value_columns = [name for name in dtype.names if name != "monotonic_ns"]
+
+    if date is None:
+        match = re.search(r"(\d{8})-\d{6}", csv_filename.name)
+        date = (
+            datetime.strptime(match.group(1), "%Y%m%d")
+            if match
+            else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        )
+    midnight_ns = int(date.timestamp() * 1e9)
+
+    rows = []
+    day_offset_ns = 0
+    previous_ns = None
+    with open(csv_filename, newline="") as file:
+        for row in csv.DictReader(file):
+            try:
+                t = datetime.strptime(row["timepoint"], "%H:%M:%S")
+                values = [float(row[column]) for column in value_columns]
+                microseconds = int(row["time_in_microseconds"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            time_of_day_ns = (t.hour * 3600 + t.minute * 60 + t.second) * 10**9
+            time_of_day_ns += microseconds * 1000
+            if (
+                previous_ns is not None
+                and time_of_day_ns + NS_PER_DAY / 2 < previous_ns
+            ):
+                day_offset_ns += NS_PER_DAY
+            previous_ns = time_of_day_ns
+            rows.append((time_of_day_ns + day_offset_ns, *values))
+    return midnight_ns, rows
+
+
+def csv_to_binary(csv_filename, bin_filename=None, date=None):
+    """
+    Converts a csv log of the Logger into a binary log (see read_csv_log for the
+    date of the rows).
+    """
+    csv_filename = Path(csv_filename)
+    if bin_filename is None:
+        bin_filename = csv_filename.with_suffix(".bin")
+    midnight_ns, rows = read_csv_log(csv_filename, date)
+
+    # Use the first sample as the clock anchor
+    epoch_ns = midnight_ns + (rows[0][0] if rows else 0)
+    create_binary_log(
+        bin_filename, epoch_ns=epoch_ns, monotonic_ns=rows[0][0] if rows else 0
+    )
+    if rows:
+        append_records(bin_filename, rows, dtype_for_filename(csv_filename))
+    return bin_filename
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert trajectory and knee angle logs between the csv and the binary format."
+    )
+    parser.add_argument("files", nargs="+", type=Path, help=".csv or .bin log files")
+    args = parser.parse_args()
+
+    for path in args.files:
+        if path.suffix == ".bin":
+            print(f"{path} -> {binary_to_csv(path)}")
+        else:
+            print(f"{path} -> {csv_to_binary(path)}")
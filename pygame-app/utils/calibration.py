@@ -0,0 +1,383 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from utils.camera import LatestFrameReader
+
+# Calibrations are cached per camera, so the game starts with the last one
+CALIBRATION_FILE = os.path.join("logs", "calibration.json")
+
+# Automatic calibration: ArUco markers 0, 1, 2, 3 (DICT_4X4_50) stuck upright to the
+# top left, top right, bottom right and bottom left corner of the blackboard. The
+# marker corner that points to the blackboard corner is used. Without markers, the
+# 4 brightest spots (e.g. LEDs or reflectors at the corners) are used.
+ARUCO_DICTIONARY = cv2.aruco.DICT_4X4_50
+CORNER_MARKER_IDS = (0, 1, 2, 3)
+
+WINDOW_NAME = "Calibration"
+
+
+def compute_transform_matrix(calibration_points, screen_width, screen_height):
+    """
+    Perspective transform from the 4 clicked blackboard corners (top left, top right,
+    bottom right, bottom left in camera pixels) to the game screen.
+    """
+    src_pts = np.float32(calibration_points)
+    dst_pts = np.float32(
+        [
+            [0, 0],
+            [screen_width, 0],
+            [screen_width, screen_height],
+            [0, screen_height],
+        ]
+    )
+    return cv2.getPerspectiveTransform(src_pts, dst_pts)
+
+
+def camera_key(camera_settings):
+    """Key of a camera in the calibration cache, e.g. "camera0_640x480"."""
+    return (
+        f"camera{camera_settings['index']}_"
+        f"{camera_settings['width']}x{camera_settings['height']}"
+    )
+
+
+def load_calibration(key, filename=CALIBRATION_FILE):
+    """
+    Returns the cached calibration of a camera, or None:
+        {"calibration_points": [(x, y), ...], "transform_matrix": np.ndarray,
+         "screen_size": [w, h], "camera_settings": {...}, "method": ..., "date": ...}
+    With a lens calibration (see utils/coordinate_pipeline.py) it also contains
+    "camera_matrix" and "dist_coeffs" as np.ndarray. An entry with only a lens
+    calibration has no "calibration_points".
+    """
+    if not os.path.exists(filename):
+        return None
+    try:
+        with open(filename) as f:
+            calibration = json.load(f).get(key)
+    except (OSError, ValueError) as e:
+        print(f"Could not read {filename}: {e}")
+        return None
+    if calibration is None:
+        return None
+    if "calibration_points" in calibration:
+        calibration["calibration_points"] = [
+            tuple(point) for point in calibration["calibration_points"]
+        ]
+        calibration["transform_matrix"] = np.array(calibration["transform_matrix"])
+    for name in ("camera_matrix", "dist_coeffs"):
+        if name in calibration:
+            calibration[name] = np.array(calibration[name])
+    return calibration
+
+
+def _update_cache(key, values, filename):
+    """Updates the entry of a camera in the cache (other cameras are kept)."""
+    calibrations = {}
+    if os.path.exists(filename):
+        try:
+            with open(filename) as f:
+                calibrations = json.load(f)
+        except (OSError, ValueError):
+            pass
+    calibrations.setdefault(key, {}).update(values)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(calibrations, f, indent=4)
+
+
+def save_calibration(
+    key,
+    calibration_points,
+    transform_matrix,
+    screen_size,
+    camera_settings,
+    method,
+    filename=CALIBRATION_FILE,
+):
+    """Stores the calibration of a camera in the cache (its lens calibration is kept)."""
+    _update_cache(
+        key,
+        {
+            "calibration_points": [[int(x), int(y)] for x, y in calibration_points],
+            "transform_matrix": np.asarray(transform_matrix).tolist(),
+            "screen_size": list(screen_size),
+            "camera_settings": camera_settings,
+            "method": method,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        filename,
+    )
+
+
+def save_lens_calibration(key, camera_matrix, dist_coeffs, filename=CALIBRATION_FILE):
+    """Stores the lens calibration of a camera in the cache."""
+    _update_cache(
+        key,
+        {
+            "camera_matrix": np.asarray(camera_matrix).tolist(),
+            "dist_coeffs": np.asarray(dist_coeffs).ravel().tolist(),
+        },
+        filename,
+    )
+
+
+def order_corners(points):
+    """Sorts 4 points into top left, top right, bottom right, bottom left."""
+    points = np.asarray(points, dtype=np.float32)
+    sums = points.sum(axis=1)
+    diffs = points[:, 1] - points[:, 0]
+    return [
+        tuple(points[np.argmin(sums)]),
+        tuple(points[np.argmin(diffs)]),
+        tuple(points[np.argmax(sums)]),
+        tuple(points[np.argmax(diffs)]),
+    ]
+
+
+class CornerDetector:
+    def __init__(self, bright_threshold=240, min_spot_area=4):
+        """
+        Finds the blackboard corners in a camera frame, with ArUco markers or
+        bright spots (see the comment at the top of this file).
+        """
+        self.aruco = cv2.aruco.ArucoDetector(
+            cv2.aruco.getPredefinedDictionary(ARUCO_DICTIONARY),
+            cv2.aruco.DetectorParameters(),
+        )
+        self.bright_threshold = bright_threshold
+        self.min_spot_area = min_spot_area
+
+    def detect(self, frame):
+        """
+        :return: (corners, method) with the 4 corners in camera pixels and "aruco"
+            or "bright_spots", or (None, None) if the corners are not visible.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        corners = self.detect_markers(gray)
+        if corners is not None:
+            return corners, "aruco"
+        corners = self.detect_bright_spots(gray)
+        if corners is not None:
+            return corners, "bright_spots"
+        return None, None
+
+    def detect_markers(self, gray):
+        marker_corners, ids, _ = self.aruco.detectMarkers(gray)
+        if ids is None:
+            return None
+        found = {int(i): c.reshape(4, 2) for i, c in zip(ids.ravel(), marker_corners)}
+        if not all(i in found for i in CORNER_MARKER_IDS):
+            return None
+        # Marker i sits at blackboard corner i, its own corner i points outwards
+        return [
+            tuple(found[marker_id][position])
+            for position, marker_id in enumerate(CORNER_MARKER_IDS)
+        ]
+
+    def detect_bright_spots(self, gray):
+        _, mask = cv2.threshold(gray, self.bright_threshold, 255, cv2.THRESH_BINARY)
+        n, _, stats, centroids = cv2.connectedComponentsWithStats(mask)
+        # Label 0 is the background
+        spots = [
+            (stats[i, cv2.CC_STAT_AREA], tuple(centroids[i]))
+            for i in range(1, n)
+            if stats[i, cv2.CC_STAT_AREA] >= self.min_spot_area
+        ]
+        if len(spots) != 4:
+            return None
+        return order_corners([centroid for _, centroid in spots])
+
+
+def corner_distance(corners_a, corners_b):
+    """Largest distance in pixels between corresponding corners."""
+    return float(
+        np.max(np.linalg.norm(np.float32(corners_a) - np.float32(corners_b), axis=1))
+    )
+
+
+class CalibrationSession:
+    def __init__(
+        self,
+        camera_settings,
+        screen_width,
+        screen_height,
+        stable_frames=10,
+        tolerance=3,
+    ):
+        """
+        Calibration that runs frame by frame inside the game loop instead of blocking
+        it. Call update() every frame until it returns "done" or "cancelled".
+
+        The corners are detected automatically once they stay within `tolerance`
+        pixels for `stable_frames` camera frames. Clicking the 4 corners in the
+        OpenCV window (top left, top right, bottom right, bottom left) works as
+        before and takes precedence. ESC cancels.
+        """
+        self.camera_settings = camera_settings
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.stable_frames = stable_frames
+        self.tolerance = tolerance
+
+        self.detector = CornerDetector()
+        self.reader = LatestFrameReader(camera_settings)
+        self.last_seq = 0
+        self.clicked_points = []
+        self.candidate = None
+        self.stable_count = 0
+
+        # Result
+        self.calibration_points = None
+        self.transform_matrix = None
+        self.method = None
+
+        cv2.namedWindow(WINDOW_NAME)
+        cv2.setMouseCallback(WINDOW_NAME, self._on_mouse)
+
+    def _on_mouse(self, event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            self.clicked_points.append((x, y))
+            print(f"Clicked point: {x}, {y}")
+
+    def update(self):
+        """Processes the newest camera frame. Returns "running", "done" or "cancelled"."""
+        if self.reader.failed:
+            print("Error: Could not open webcam.")
+            return self._finish("cancelled")
+
+        frame, seq = self.reader.latest()
+        if frame is not None and seq != self.last_seq:
+            self.last_seq = seq
+            frame = frame.copy()
+            corners, method = self.detector.detect(frame)
+            self._track_candidate(corners, method)
+            self._draw(frame, corners)
+            cv2.imshow(WINDOW_NAME, frame)
+
+        key = cv2.waitKey(1)
+        if key == 27:  # ESC to cancel
+            print("Calibration aborted or incomplete.")
+            return self._finish("cancelled")
+        if len(self.clicked_points) >= 4:
+            return self._finish("done", self.clicked_points[:4], "manual")
+        if self.stable_count >= self.stable_frames and not self.clicked_points:
+            return self._finish("done", self.candidate, self.method)
+        return "running"
+
+    def _track_candidate(self, corners, method):
+        if corners is None:
+            self.candidate = None
+            self.stable_count = 0
+        elif (
+            self.candidate is not None
+            and corner_distance(corners, self.candidate) <= self.tolerance
+        ):
+            self.stable_count += 1
+        else:
+            self.candidate = corners
+            self.method = method
+            self.stable_count = 1
+
+    def _draw(self, frame, corners):
+        if corners is not None:
+            points = np.int32(corners).reshape(-1, 1, 2)
+            cv2.polylines(frame, [points], True, (0, 255, 0), 2)
+        # Display clicks so far
+        for i, (cx, cy) in enumerate(self.clicked_points):
+            cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
+            cv2.putText(
+                frame,
+                str(i + 1),
+                (cx + 5, cy - 5),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.8,
+                (255, 0, 0),
+                2,
+            )
+
+    def _finish(self, state, points=None, method=None):
+        if points is not None:
+            self.calibration_points = [(int(x), int(y)) for x, y in points]
+            self.transform_matrix = compute_transform_matrix(
+                self.calibration_points, self.screen_width, self.screen_height
+            )
+            self.method = method
+            print(f"Calibration ({method}): {self.calibration_points}")
+        self.close()
+        return state
+
+    def close(self):
+        self.reader.close()
+        cv2.destroyWindow(WINDOW_NAME)
+        cv2.waitKey(1)
+
+
+class CalibrationValidator:
+    def __init__(
+        self, calibration, camera_settings, on_update, frames=15, tolerance=8, timeout=5
+    ):
+        """
+        Checks a cached calibration in a background thread: if the corners are
+        detected automatically and moved by more than `tolerance` pixels, the
+        calibration is replaced. Calibrations whose corners cannot be detected
+        (e.g. clicked by hand without markers) are kept as they are.
+
+        :param on_update: Called with (calibration_points, method) when the
+            calibration was replaced. It runs in the validator thread, so it should
+            only hand the result over (see GameManager.queue_calibration).
+        """
+        self.calibration = calibration
+        self.camera_settings = camera_settings
+        self.on_update = on_update
+        self.frames = frames
+        self.tolerance = tolerance
+        self.timeout = timeout
+        self.result = None  # "valid", "updated" or "unverified"
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def wait(self, timeout=None):
+        """Waits until the camera is released again."""
+        self.thread.join(timeout)
+
+    def _run(self):
+        reader = LatestFrameReader(self.camera_settings)
+        detector = CornerDetector()
+        detections = []
+        last_seq = 0
+        start = time.perf_counter()
+        try:
+            while (
+                len(detections) < self.frames
+                and time.perf_counter() - start < self.timeout
+                and not reader.failed
+            ):
+                frame, seq = reader.latest()
+                if frame is None or seq == last_seq:
+                    time.sleep(0.01)
+                    continue
+                last_seq = seq
+                corners, method = detector.detect(frame)
+                if corners is not None:
+                    detections.append((corners, method))
+        finally:
+            reader.close()
+
+        if len(detections) < self.frames // 2:
+            self.result = "unverified"
+            return
+        corners = np.median([c for c, _ in detections], axis=0)
+        moved = corner_distance(corners, self.calibration["calibration_points"])
+        if moved <= self.tolerance:
+            self.result = "valid"
+            print("Cached calibration is valid.")
+            return
+        self.result = "updated"
+        print(f"Blackboard corners moved by {moved:.0f} px, calibration updated.")
+        self.on_update([(int(x), int(y)) for x, y in corners], detections[-1][1])
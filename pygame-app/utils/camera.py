@@ -0,0 +1,241 @@
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Requested webcam settings. MJPG lets USB webcams deliver 30 FPS at higher
+# resolutions (uncompressed YUYV often only manages 5-15 FPS), and a buffer of one
+# frame keeps the driver from handing out frames that are several frames old.
+CAMERA_SETTINGS = {
+    "index": 0,
+    "width": 640,
+    "height": 480,
+    "fps": 30,
+    "fourcc": "MJPG",
+    "buffer_size": 1,
+}
+
+
+def open_camera(
+    index=0, width=640, height=480, fps=30, fourcc="MJPG", buffer_size=1, drain=True
+):
+    """
+    Opens a webcam and requests a low latency configuration. Drivers silently ignore
+    settings they do not support, so the negotiated settings are printed.
+
+    :param fourcc: Pixel format, e.g. "MJPG" or "YUYV". None keeps the driver default.
+    :param buffer_size: Number of frames the driver buffers. None keeps the driver default.
+    :param drain: Throw away frames that were buffered while the camera started.
+    :return: The opened cv2.VideoCapture, or None if the camera could not be opened.
+    """
+    cap = cv2.VideoCapture(index)
+    if not cap.isOpened():
+        return None
+
+    # The format has to be set before the resolution on some backends
+    if fourcc is not None:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if width is not None and height is not None:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps is not None:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    if buffer_size is not None:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+    print(f"Camera {index}: {describe_camera(cap)}")
+    if drain:
+        drain_stale_frames(cap)
+    return cap
+
+
+def describe_camera(cap):
+    """The settings the driver actually uses."""
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    fourcc = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\0")
+    return (
+        f"{int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
+        f"{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+        f"{fourcc or '?'} at {cap.get(cv2.CAP_PROP_FPS):.0f} FPS, "
+        f"buffer {int(cap.get(cv2.CAP_PROP_BUFFERSIZE))}"
+    )
+
+
+def drain_stale_frames(cap, max_frames=10):
+    """
+    Grabs (without decoding) the frames the driver has buffered. A buffered frame is
+    returned at once, a fresh one takes about a frame interval, so grabbing stops at
+    the first grab that had to wait.
+
+    :return: Number of frames thrown away.
+    """
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    waited = 0.5 / fps
+    for drained in range(max_frames):
+        start = time.perf_counter()
+        if not cap.grab():
+            return drained
+        if time.perf_counter() - start > waited:
+            return drained
+    return max_frames
+
+
+class LatestFrameReader:
+    def __init__(self, camera_settings=CAMERA_SETTINGS):
+        """
+        Opens the camera and reads frames in a background thread, so a caller in the
+        game loop can poll the newest frame without waiting for the camera.
+
+        :param camera_settings: Keyword arguments for open_camera.
+        """
+        self.camera_settings = camera_settings
+        self.lock = threading.Lock()
+        self.frame = None
+        self.seq = 0
+        self.failed = False  # The camera could not be opened
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        cap = open_camera(**self.camera_settings)
+        if cap is None:
+            self.failed = True
+            return
+        while self.running:
+            ret, frame = cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self.lock:
+                self.frame = frame
+                self.seq += 1
+        cap.release()
+
+    def latest(self):
+        """Returns (frame, seq) of the newest frame, or (None, 0) before the first one."""
+        with self.lock:
+            return self.frame, self.seq
+
+    def close(self):
+        """Stops reading and releases the camera."""
+        self.running = False
+        self.thread.join(timeout=2.0)
+
+
+class _BrightnessRecorder:
+    """Reads camera frames in a thread and records (time, mean brightness)."""
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.samples = []
+        self.lock = threading.Lock()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                continue
+            # read() returns once the frame is in memory
+            now = time.perf_counter()
+            brightness = float(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).mean())
+            with self.lock:
+                self.samples.append((now, brightness))
+
+    def since(self, start):
+        with self.lock:
+            return [(t, b) for t, b in self.samples if t >= start]
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
+
+
+def measure_latency(cap, trials=20, settle=0.7, timeout=1.0):
+    """
+    Estimates the glass-to-glass latency: the time from showing a bright screen to
+    receiving a camera frame that sees it. The camera has to look at the screen (or
+    at the blackboard the game is projected on).
+
+    :return: List of latencies in seconds, one per detected flash.
+    """
+    window = "Latency probe"
+    cv2.namedWindow(window, cv2.WINDOW_NORMAL)
+    cv2.setWindowProperty(window, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    black = np.zeros((480, 640, 3), dtype=np.uint8)
+    white = np.full((480, 640, 3), 255, dtype=np.uint8)
+
+    def show(image, seconds):
+        cv2.imshow(window, image)
+        cv2.waitKey(1)
+        shown = time.perf_counter()
+        # Keep the window responsive while waiting
+        while time.perf_counter() - shown < seconds:
+            cv2.waitKey(10)
+        return shown
+
+    recorder = _BrightnessRecorder(cap)
+    latencies = []
+    try:
+        # Brightness levels of the dark and the bright screen
+        start = show(black, settle)
+        dark = np.median([b for t, b in recorder.since(start + settle / 2)])
+        start = show(white, settle)
+        bright = np.median([b for t, b in recorder.since(start + settle / 2)])
+        if bright - dark < 10:
+            print("The camera does not see the flashes, point it at the screen.")
+            return latencies
+        threshold = (dark + bright) / 2
+
+        for _ in range(trials):
+            show(black, settle)
+            flash = show(white, timeout)
+            detected = next(
+                (t for t, b in recorder.since(flash) if b > threshold), None
+            )
+            if detected is not None:
+                latencies.append(detected - flash)
+    finally:
+        recorder.stop()
+        cv2.destroyWindow(window)
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Show the negotiated camera settings and measure the latency "
+        "from the screen to the camera (point the camera at the screen)."
+    )
+    parser.add_argument("--index", type=int, default=CAMERA_SETTINGS["index"])
+    parser.add_argument(
+        "--defaults",
+        action="store_true",
+        help="Open the camera with the driver defaults for comparison",
+    )
+    parser.add_argument("--trials", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.defaults:
+        settings = dict(
+            width=None, height=None, fps=None, fourcc=None, buffer_size=None
+        )
+    else:
+        settings = {k: v for k, v in CAMERA_SETTINGS.items() if k != "index"}
+    cap = open_camera(args.index, **settings)
+    if cap is None:
+        print(f"Could not open camera {args.index}.")
+    else:
+        latencies = np.array(measure_latency(cap, args.trials)) * 1000
+        cap.release()
+        if len(latencies):
+            print(
+                f"Glass-to-glass latency ({len(latencies)}/{args.trials} flashes "
+                f"detected): median {np.median(latencies):.0f} ms, "
+                f"p95 {np.percentile(latencies, 95):.0f} ms, "
+                f"min {latencies.min():.0f} ms"
+            )
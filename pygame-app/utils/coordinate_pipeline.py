@@ -0,0 +1,261 @@
+import argparse
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from utils.calibration import compute_transform_matrix
+
+
+def undistort_points(points, camera_matrix, dist_coeffs):
+    """Removes the lens distortion from camera pixel positions (N x 2)."""
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+    undistorted = cv2.undistortPoints(
+        points, camera_matrix, dist_coeffs, P=camera_matrix
+    )
+    return undistorted.reshape(-1, 2)
+
+
+class CoordinatePipeline:
+    def __init__(self, transform_matrix, bounds=None, undistort_map=None):
+        """
+        Maps camera pixels to game coordinates in one step: lens undistortion (a
+        precomputed lookup table), perspective transform and the rescale to the game
+        area (composed into one matrix), and clamping to the game area.
+        Use CoordinatePipeline.build() to create it from a calibration.
+
+        :param transform_matrix: 3x3 matrix from undistorted camera pixels to game
+            coordinates, or None to keep the camera pixels.
+        :param bounds: (x0, y0, x1, y1) the positions are clamped to, or None.
+        :param undistort_map: Array (height, width, 2) with the undistorted position of
+            every camera pixel, or None without lens correction.
+        """
+        self.transform_matrix = (
+            None if transform_matrix is None else np.asarray(transform_matrix, "f8")
+        )
+        self.bounds = bounds
+        self.undistort_map = undistort_map
+        # Plain floats are faster than NumPy scalars for a single point
+        self._coefficients = (
+            None if transform_matrix is None else self.transform_matrix.ravel().tolist()
+        )
+
+    @classmethod
+    def build(
+        cls,
+        calibration_points,
+        screen_width,
+        screen_height,
+        game_rect=None,
+        camera_matrix=None,
+        dist_coeffs=None,
+        frame_size=None,
+    ):
+        """
+        :param calibration_points: The 4 blackboard corners in camera pixels.
+        :param game_rect: (x, y, width, height) of the game area on the screen. The
+            blackboard is mapped onto it instead of onto the whole screen.
+        :param camera_matrix: Intrinsic camera matrix of the lens calibration (optional).
+        :param dist_coeffs: Distortion coefficients of the lens calibration (optional).
+        :param frame_size: (width, height) of the camera frames, needed for the lens
+            correction lookup table.
+        """
+        undistort_map = None
+        if camera_matrix is not None and dist_coeffs is not None:
+            camera_matrix = np.asarray(camera_matrix, dtype=np.float64)
+            dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64)
+            # The blackboard corners are straight lines only without distortion
+            calibration_points = undistort_points(
+                calibration_points, camera_matrix, dist_coeffs
+            )
+            width, height = frame_size
+            grid = np.mgrid[0:height, 0:width][::-1].transpose(1, 2, 0)
+            undistort_map = undistort_points(
+                grid.reshape(-1, 2), camera_matrix, dist_coeffs
+            ).reshape(height, width, 2)
+
+        matrix = compute_transform_matrix(
+            calibration_points, screen_width, screen_height
+        )
+        bounds = (0, 0, screen_width, screen_height)
+        if game_rect is not None:
+            x, y, width, height = game_rect
+            rescale = np.array(
+                [
+                    [width / screen_width, 0, x],
+                    [0, height / screen_height, y],
+                    [0, 0, 1],
+                ]
+            )
+            matrix = rescale @ matrix
+            bounds = (x, y, x + width, y + height)
+        return cls(matrix, bounds, undistort_map)
+
+    def map_points(self, points):
+        """
+        Maps camera pixel positions (N x 2) to game coordinates (N x 2) in one
+        vectorized call, e.g. all landmarks of a hand.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.undistort_map is not None:
+            height, width = self.undistort_map.shape[:2]
+            columns = np.clip(np.rint(points[:, 0]).astype(int), 0, width - 1)
+            rows = np.clip(np.rint(points[:, 1]).astype(int), 0, height - 1)
+            points = self.undistort_map[rows, columns].astype(np.float64)
+        if self.transform_matrix is not None:
+            m = self.transform_matrix
+            w = points @ m[2, :2] + m[2, 2]
+            points = (points @ m[:2, :2].T + m[:2, 2]) / w[:, None]
+        if self.bounds is not None:
+            x0, y0, x1, y1 = self.bounds
+            points[:, 0] = np.clip(points[:, 0], x0, x1)
+            points[:, 1] = np.clip(points[:, 1], y0, y1)
+        return points
+
+    def map_point(self, x, y):
+        """Maps one camera pixel position to game coordinates."""
+        x, y = float(x), float(y)
+        if self.undistort_map is not None:
+            height, width = self.undistort_map.shape[:2]
+            x, y = self.undistort_map[
+                min(max(int(round(y)), 0), height - 1),
+                min(max(int(round(x)), 0), width - 1),
+            ].tolist()
+        if self._coefficients is not None:
+            m00, m01, m02, m10, m11, m12, m20, m21, m22 = self._coefficients
+            w = m20 * x + m21 * y + m22
+            x, y = (m00 * x + m01 * y + m02) / w, (m10 * x + m11 * y + m12) / w
+        if self.bounds is not None:
+            x0, y0, x1, y1 = self.bounds
+            x = min(max(x, x0), x1)
+            y = min(max(y, y0), y1)
+        return x, y
+
+
+def calibrate_lens(frames, board_size=(9, 6)):
+    """
+    Estimates the camera matrix and the distortion coefficients from frames that
+    show a chessboard (e.g. printed and held at different positions).
+
+    :param board_size: Inner corners of the chessboard (columns, rows).
+    :return: (camera_matrix, dist_coeffs, rms_error, used_frames)
+    """
+    object_points = np.zeros((board_size[0] * board_size[1], 3), np.float32)
+    object_points[:, :2] = np.mgrid[0 : board_size[0], 0 : board_size[1]].T.reshape(
+        -1, 2
+    )
+    all_object_points, all_image_points = [], []
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    for frame in frames:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        found, corners = cv2.findChessboardCorners(gray, board_size)
+        if not found:
+            continue
+        corners = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+        all_object_points.append(object_points)
+        all_image_points.append(corners)
+    if len(all_image_points) < 3:
+        raise ValueError("The chessboard was found in less than 3 frames")
+    height, width = frames[0].shape[:2]
+    rms, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(
+        all_object_points, all_image_points, (width, height), None, None
+    )
+    return camera_matrix, dist_coeffs, rms, len(all_image_points)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Lens calibration of the webcam, and a benchmark of the mapping "
+        "from camera pixels to game coordinates."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    lens_parser = subparsers.add_parser(
+        "calibrate-lens",
+        help="Estimate the lens distortion from chessboard images and cache it",
+    )
+    lens_parser.add_argument("images", help='Glob pattern, e.g. "chessboard/*.png"')
+    lens_parser.add_argument("--board", default="9x6", help="Inner corners, e.g. 9x6")
+    subparsers.add_parser("benchmark", help="Compare the mapping implementations")
+    args = parser.parse_args()
+
+    if args.command == "calibrate-lens":
+        from utils.calibration import camera_key, save_lens_calibration
+        from utils.camera import CAMERA_SETTINGS
+
+        frames = [cv2.imread(f) for f in sorted(glob.glob(args.images))]
+        frames = [f for f in frames if f is not None]
+        if not frames:
+            parser.error(f"No images found for {args.images}")
+        board_size = tuple(int(n) for n in args.board.lower().split("x"))
+        camera_matrix, dist_coeffs, rms, used = calibrate_lens(frames, board_size)
+        key = camera_key(CAMERA_SETTINGS)
+        save_lens_calibration(key, camera_matrix, dist_coeffs)
+        print(
+            f"Lens calibration of {key} from {used} images "
+            f"(reprojection error {rms:.2f} px) cached."
+        )
+    else:
+        # Old path: one perspectiveTransform per point, clamp, then rescale
+        screen_width, screen_height = 1792, 1008
+        game_rect = (448, 168, 896, 672)
+        corners = [(80, 60), (560, 70), (580, 430), (60, 410)]
+        matrix = compute_transform_matrix(corners, screen_width, screen_height)
+        rng = np.random.default_rng(0)
+        points = rng.uniform((0, 0), (640, 480), (10000, 2)).astype(np.float32)
+
+        def old_path(x, y):
+            mapped = cv2.perspectiveTransform(
+                np.array([[[x, y]]], dtype="float32"), matrix
+            )
+            mx = max(0, min(screen_width, mapped[0, 0, 0]))
+            my = max(0, min(screen_height, mapped[0, 0, 1]))
+            return (
+                mx / screen_width * game_rect[2] + game_rect[0],
+                my / screen_height * game_rect[3] + game_rect[1],
+            )
+
+        camera_matrix = np.array([[600.0, 0, 320], [0, 600, 240], [0, 0, 1]])
+        dist_coeffs = np.array([-0.2, 0.05, 0, 0, 0])
+        pipeline = CoordinatePipeline.build(
+            corners, screen_width, screen_height, game_rect
+        )
+        start = time.perf_counter()
+        lens_pipeline = CoordinatePipeline.build(
+            corners,
+            screen_width,
+            screen_height,
+            game_rect,
+            camera_matrix,
+            dist_coeffs,
+            (640, 480),
+        )
+        build_time = time.perf_counter() - start
+
+        expected = np.array([old_path(x, y) for x, y in points])
+        assert np.allclose(pipeline.map_points(points), expected, atol=0.01)
+        assert np.allclose(
+            [pipeline.map_point(x, y) for x, y in points[:100]],
+            expected[:100],
+            atol=0.01,
+        )
+
+        for name, function in (
+            ("perspectiveTransform + rescale", lambda: old_path(*points[0])),
+            ("map_point", lambda: pipeline.map_point(*points[0])),
+            (
+                "map_point with lens correction",
+                lambda: lens_pipeline.map_point(*points[0]),
+            ),
+            ("map_points (21 landmarks)", lambda: pipeline.map_points(points[:21])),
+            (
+                "map_points (21 landmarks) with lens correction",
+                lambda: lens_pipeline.map_points(points[:21]),
+            ),
+        ):
+            n = 20000
+            start = time.perf_counter()
+            for _ in range(n):
+                function()
+            print(f"{name}: {(time.perf_counter() - start) / n * 1e6:.1f} us")
+        print(f"Building the lens correction lookup table: {build_time * 1000:.0f} ms")
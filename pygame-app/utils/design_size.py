@@ -0,0 +1,6 @@
+# The screens were designed for a 1792x1008 window (the images are exported from
+# Canva at that size). Positions and sizes in the code are given in these design
+# pixels and scaled to the actual window by the Layout. Kept free of pygame for the
+# game simulations.
+DESIGN_WIDTH = 1792
+DESIGN_HEIGHT = 1008
@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import json
+import math
+import sys
+import threading
+import time
+
+import numpy as np
+import websockets
+
+from utils.knee_angle_frames import (
+    JSON_FIELD,
+    decode_binary_frame,
+    decode_json_batch,
+    encode_binary_frame,
+)
+from utils.websocket_server import DEFAULT_STATION, WebSocketServer, make_client_id
+
+BOARD_CLIENT = "BoardESP"
+KNEE_CLIENT = "KneeESP"
+N_LEDS = 12
+
+
+class Stats:
+    """Counters and latencies shared by all simulated devices and the test server."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.latencies = {}
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_latency(self, name, seconds):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def update_max(self, name, value):
+        with self.lock:
+            self.counters[name] = max(self.counters.get(name, 0), value)
+
+    def get(self, name):
+        with self.lock:
+            return self.counters.get(name, 0)
+
+    def latency_summary(self, name):
+        with self.lock:
+            values = np.array(self.latencies.get(name, []))
+        if len(values) == 0:
+            return "n/a"
+        p50, p95, p99 = np.percentile(values * 1000, [50, 95, 99])
+        return (
+            f"p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, "
+            f"max {values.max() * 1000:.2f} ms"
+        )
+
+
+def knee_angle(t):
+    """Synthetic knee angle: slow bending between 0 and 60 degrees."""
+    return 30 + 30 * math.sin(2 * math.pi * 0.5 * t)
+
+
+async def simulate_knee(
+    uri, stats, duration, sample_rate, batch_size, frame_format, identifier
+):
+    """
+    Connects like the knee ESP and streams knee angles for `duration` seconds.
+
+    :param batch_size: Samples per message. 1 with the json format sends the
+        single {"field": "angle"} messages of the current firmware.
+    :param frame_format: "json" or "binary" (see utils/knee_angle_frames.py).
+    """
+    async with websockets.connect(uri) as websocket:
+        await websocket.send(identifier)
+        # Motor commands from the server are only counted
+        reader = asyncio.create_task(count_commands(websocket, stats, "knee"))
+
+        interval = batch_size / sample_rate
+        start = time.perf_counter()
+        next_send = start
+        n_samples = 0
+        while next_send - start < duration:
+            indices = range(n_samples, n_samples + batch_size)
+            device_time_us = [int(i * 1e6 / sample_rate) % 2**32 for i in indices]
+            angles = [knee_angle(i / sample_rate) for i in indices]
+
+            # The send time lets the test server measure the latency; the
+            # real server ignores the additional key
+            if frame_format == "binary":
+                message = encode_binary_frame(device_time_us, angles)
+            elif batch_size == 1:
+                message = json.dumps(
+                    {
+                        "field": "angle",
+                        "value": angles[0],
+                        "sent_at": time.perf_counter(),
+                    }
+                )
+            else:
+                message = json.dumps(
+                    {
+                        "field": JSON_FIELD,
+                        "samples": [list(s) for s in zip(device_time_us, angles)],
+                        "sent_at": time.perf_counter(),
+                    }
+                )
+            await websocket.send(message)
+            stats.count("knee_frames_sent")
+            stats.count("knee_samples_sent", batch_size)
+            n_samples += batch_size
+
+            next_send += interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Sending takes longer than the sample rate allows
+                stats.count("knee_frames_late")
+        reader.cancel()
+
+
+async def simulate_board(uri, stats, duration, ack, identifier):
+    """
+    Connects like the board ESP and receives LED commands for `duration` seconds.
+    Optionally acknowledges every command with {"field": "ack", ...}.
+    """
+    async with websockets.connect(uri) as websocket:
+        await websocket.send(identifier)
+        try:
+            await asyncio.wait_for(
+                count_commands(websocket, stats, "board", ack=ack), timeout=duration
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+async def count_commands(websocket, stats, device, ack=False):
+    async for message in websocket:
+        received_at = time.perf_counter()
+        command = json.loads(message)
+        stats.count(f"{device}_commands_received")
+        if "sent_at" in command:
+            stats.add_latency(f"{device}_command", received_at - command["sent_at"])
+        if ack:
+            await websocket.send(
+                json.dumps(
+                    {
+                        "field": "ack",
+                        "command": command.get("command"),
+                        "led_id": command.get("led_id"),
+                    }
+                )
+            )
+
+
+def start_test_server(host, port, stats, logger=None, timeout=5.0):
+    """
+    Starts the websocket server of the game with a handler that decodes and
+    counts the incoming messages instead of driving a game.
+
+    :param timeout: Seconds to wait for the server to listen.
+    :raises OSError: If the server cannot listen on the port or did not start in time.
+    """
+
+    def on_message(client_id, message):
+        received_at = time.perf_counter()
+        if isinstance(message, bytes):
+            _, knee_angles = decode_binary_frame(message)
+            stats.count("server_knee_frames")
+            stats.count("server_knee_samples", len(knee_angles))
+            if logger is not None:
+                logger.append_knee_angles(knee_angles, np.zeros(len(knee_angles)))
+            return
+
+        message_json = json.loads(message)
+        field = message_json.get("field")
+        if field == "ack":
+            stats.count("server_acks")
+            return
+        if field == "angle":
+            knee_angles = [message_json["value"]]
+        elif field == JSON_FIELD:
+            _, knee_angles = decode_json_batch(message_json)
+        else:
+            return
+        stats.count("server_knee_frames")
+        stats.count("server_knee_samples", len(knee_angles))
+        if "sent_at" in message_json:
+            stats.add_latency("knee_frame", received_at - message_json["sent_at"])
+        if logger is not None:
+            logger.append_knee_angles(knee_angles, np.zeros(len(knee_angles)))
+
+    server = WebSocketServer(on_message=on_message, host=host, port=port)
+    server.start(timeout)
+    return server
+
+
+def drive_commands(server, stats, command_rate, duration, board_ids, stop):
+    """
+    Sends LED commands to the boards like the game loop does (from a normal thread
+    through WebSocketServer.send_message) and records their delivery status.
+    """
+    outgoing = []
+    interval = 1 / command_rate
+    start = time.perf_counter()
+    i = 0
+    while time.perf_counter() - start < duration and not stop.is_set():
+        for board_id in board_ids:
+            command = "turn_on" if i % 2 == 0 else "turn_off"
+            outgoing.append(
+                server.send_message(
+                    board_id,
+                    {
+                        "command": command,
+                        "led_id": (i // 2) % N_LEDS,
+                        "sent_at": time.perf_counter(),
+                    },
+                )
+            )
+        stats.count("commands_sent", len(board_ids))
+        stats.update_max("max_queue_depth", server.queue_depth())
+        i += 1
+        time.sleep(max(0.0, start + i * interval - time.perf_counter()))
+
+    # Give the last messages time to be delivered
+    for message in outgoing:
+        message.wait(1.0)
+    for message in outgoing:
+        stats.count(f"commands_status_{message.status}")
+
+
+def print_report(stats, duration, serve):
+    samples_sent = stats.get("knee_samples_sent")
+    print(f"\n--- Results after {duration:.1f} s ---")
+    print(
+        f"Knees:  {stats.get('knee_frames_sent')} frames / {samples_sent} samples sent "
+        f"({samples_sent / duration:,.0f} samples/s), "
+        f"{stats.get('knee_frames_late')} frames behind schedule"
+    )
+    print(f"Boards: {stats.get('board_commands_received')} commands received")
+    if not serve:
+        print("(Run with --serve to measure server throughput, latency and drops.)")
+        return
+
+    samples_received = stats.get("server_knee_samples")
+    print(
+        f"Server: {stats.get('server_knee_frames')} frames / {samples_received} samples "
+        f"received ({samples_received / duration:,.0f} samples/s), "
+        f"{samples_sent - samples_received} samples dropped, "
+        f"{stats.get('server_acks')} acks"
+    )
+    print(f"Knee frame latency:    {stats.latency_summary('knee_frame')}")
+    commands_sent = stats.get("commands_sent")
+    print(
+        f"Commands: {commands_sent} sent, "
+        f"{commands_sent - stats.get('board_commands_received')} not received, "
+        f"{stats.get('commands_status_dropped')} dropped / "
+        f"{stats.get('commands_status_failed')} failed "
+        f"by the server, max queue depth {stats.get('max_queue_depth')}"
+    )
+    print(f"Command latency:       {stats.latency_summary('board_command')}")
+
+
+def station_names(n_stations):
+    """One station keeps the plain identifiers, more stations are named "1", "2", ..."""
+    if n_stations == 1:
+        return [DEFAULT_STATION]
+    return [str(i + 1) for i in range(n_stations)]
+
+
+def device_stations(n_stations, n_knees, n_boards):
+    """
+    Stations of the simulated knee and board ESPs. The server keeps one connection
+    per client identifier, so several knees or boards of a station would replace
+    each other: every knee/board pair is simulated as a station of its own, i.e.
+    --knees and --boards multiply the stations.
+
+    :return: List of the stations with a knee and list of those with a board.
+    """
+    pairs = max(n_knees, n_boards, 1)
+    stations = station_names(n_stations * pairs)
+    knee_stations = [s for i, s in enumerate(stations) if i % pairs < n_knees]
+    board_stations = [s for i, s in enumerate(stations) if i % pairs < n_boards]
+    return knee_stations, board_stations
+
+
+async def run_devices(args, stats, knee_stations, board_stations):
+    uri = f"ws://{args.host}:{args.port}"
+    tasks = [
+        simulate_knee(
+            uri,
+            stats,
+            args.duration,
+            args.rate,
+            args.batch,
+            args.format,
+            make_client_id(KNEE_CLIENT, station),
+        )
+        for station in knee_stations
+    ]
+    tasks += [
+        simulate_board(
+            uri,
+            stats,
+            args.duration,
+            not args.no_ack,
+            make_client_id(BOARD_CLIENT, station),
+        )
+        for station in board_stations
+    ]
+    await asyncio.gather(*tasks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate BoardESP/KneeESP clients against the websocket server."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--stations",
+        type=int,
+        default=1,
+        help="Number of stations; their ESPs identify as BoardESP:<n> / KneeESP:<n>",
+    )
+    parser.add_argument(
+        "--knees",
+        type=int,
+        default=1,
+        help="Simulated knee ESPs per station, each further one on a station of its own",
+    )
+    parser.add_argument(
+        "--boards",
+        type=int,
+        default=1,
+        help="Simulated board ESPs per station, each further one on a station of its own",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=179, help="Knee samples per second"
+    )
+    parser.add_argument(
+        "--batch", type=int, default=18, help="Knee samples per message"
+    )
+    parser.add_argument("--format", choices=["json", "binary"], default="json")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds")
+    parser.add_argument(
+        "--no-ack", action="store_true", help="Boards do not acknowledge commands"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run the game's websocket server in this process and measure it",
+    )
+    parser.add_argument(
+        "--command-rate",
+        type=float,
+        default=2,
+        help="LED commands per second and board sent by the server (with --serve)",
+    )
+    parser.add_argument(
+        "--with-logger",
+        action="store_true",
+        help="Pass received knee angles to a Logger (with --serve)",
+    )
+    args = parser.parse_args()
+
+    knee_stations, board_stations = device_stations(
+        args.stations, args.knees, args.boards
+    )
+    if max(args.knees, args.boards) > 1:
+        print(
+            f"Simulating {len(set(knee_stations + board_stations))} stations, "
+            "every knee/board pair identifies as a station of its own"
+        )
+
+    stats = Stats()
+    server = None
+    driver = None
+    logger = None
+    stop = threading.Event()
+    if args.serve:
+        if args.with_logger:
+            from utils.logger import Logger
+
+            logger = Logger()
+            logger.start_new_game()
+        try:
+            server = start_test_server(args.host, args.port, stats, logger)
+        except OSError as e:
+            sys.exit(str(e))
+
+    start = time.perf_counter()
+    if server is not None and board_stations:
+        # Commands start once the boards had time to connect
+        def delayed_driver():
+            time.sleep(0.5)
+            drive_commands(
+                server,
+                stats,
+                args.command_rate,
+                args.duration - 1.0,
+                [make_client_id(BOARD_CLIENT, station) for station in board_stations],
+                stop,
+            )
+
+        driver = threading.Thread(target=delayed_driver, daemon=True)
+        driver.start()
+
+    asyncio.run(run_devices(args, stats, knee_stations, board_stations))
+    duration = time.perf_counter() - start
+    stop.set()
+    if driver is not None:
+        driver.join()
+    if logger is not None:
+        logger.close()
+    print_report(stats, duration, args.serve)
@@ -2,16 +2,41 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+from utils.coordinate_pipeline import CoordinatePipeline
+
 
 class FingerTracker:
     def __init__(
-        self, transform_matrix, screen_width, screen_height, calibration_points=None
+        self,
+        transform_matrix,
+        screen_width,
+        screen_height,
+        calibration_points=None,
+        use_roi=True,
+        roi_padding=0.25,
+        roi_scale=1.0,
+        model_complexity=1,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7,
+        coordinate_pipeline=None,
     ):
         """
         :param transform_matrix: The perspective transform matrix from calibration.
         :param screen_width: Width of the Pygame window (for mapped coords).
         :param screen_height: Height of the Pygame window (for mapped coords).
         :param calibration_points: The original 4 clicked corners in camera space (optional).
+        :param use_roi: Only run the hand detection on the region around the calibration
+            points (needs all 4 points).
+        :param roi_padding: Padding around the bounding box of the calibration points,
+            as fraction of its width and height (the hand reaches beyond the board).
+        :param roi_scale: Factor to downsample the detection input with (<= 1): the
+            region, or the whole frame without region of interest.
+        :param model_complexity: MediaPipe hand landmark model, 0 (fast) or 1 (accurate).
+        :param min_detection_confidence: Minimum confidence to detect a new hand.
+        :param min_tracking_confidence: Minimum confidence to keep tracking a hand.
+        :param coordinate_pipeline: CoordinatePipeline from camera pixels to game
+            coordinates (e.g. with lens correction and the game area). Without it the
+            transform matrix maps to the whole screen.
         """
         self.transform_matrix = transform_matrix
         self.screen_width = screen_width
@@ -19,15 +44,58 @@ class FingerTracker:
         self.calibration_points = (
             calibration_points  # e.g. [(x1,y1), (x2,y2), (x3,y3), (x4,y4)]
         )
+        if coordinate_pipeline is None:
+            # If no transform, the camera position is used as it is
+            coordinate_pipeline = CoordinatePipeline(
+                transform_matrix,
+                (
+                    None
+                    if transform_matrix is None
+                    else (0, 0, screen_width, screen_height)
+                ),
+            )
+        self.coordinate_pipeline = coordinate_pipeline
+
+        # Region of interest, computed for the first frame (depends on the frame size)
+        self.use_roi = bool(
+            use_roi and calibration_points and len(calibration_points) == 4
+        )
+        self.roi_padding = roi_padding
+        self.roi_scale = roi_scale
+        self.roi = None  # (x0, y0, x1, y1) in camera pixels
+        self.roi_frame_shape = None
+
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
 
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self.hands = self._create_hands()
+
+    def _create_hands(self):
+        return self.mp_hands.Hands(
             static_image_mode=False,
             max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7,
+            model_complexity=self.model_complexity,
+            min_detection_confidence=self.min_detection_confidence,
+            min_tracking_confidence=self.min_tracking_confidence,
         )
 
+    def set_quality(self, model_complexity, roi_scale):
+        """
+        Changes the detection quality at runtime. Must be called from the thread that
+        calls get_finger_position. A new model complexity reloads the MediaPipe graph.
+        """
+        self.roi_scale = roi_scale
+        if model_complexity != self.model_complexity:
+            self.model_complexity = model_complexity
+            self.hands.close()
+            self.hands = self._create_hands()
+
+    def close(self):
+        """Releases the MediaPipe graph."""
+        self.hands.close()
+
     def get_finger_position(self, frame):
         """
         Returns a tuple of:
@@ -37,7 +105,37 @@ class FingerTracker:
         mapped_x, mapped_y: The finger position in GAME coordinates.
         camera_x, camera_y: The finger position in the camera frame's pixel coords.
         """
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        detection = self.detect_finger(frame)
+        if detection is None:
+            return None
+        camera_x, camera_y = detection
+        return (*self.map_to_screen(camera_x, camera_y), camera_x, camera_y)
+
+    def detect_finger(self, frame):
+        """
+        Runs the hand detection on a frame.
+
+        :return: (camera_x, camera_y) of the index finger tip, or None.
+        """
+        height, width, _ = frame.shape
+
+        # Crop the frame to the blackboard region and optionally downsample it
+        if self.use_roi:
+            x0, y0, x1, y1 = self.get_roi(frame.shape)
+            detection_frame = frame[y0:y1, x0:x1]
+        else:
+            x0, y0, x1, y1 = 0, 0, width, height
+            detection_frame = frame
+        if self.roi_scale < 1.0:
+            detection_frame = cv2.resize(
+                detection_frame,
+                None,
+                fx=self.roi_scale,
+                fy=self.roi_scale,
+                interpolation=cv2.INTER_AREA,
+            )
+
+        frame_rgb = cv2.cvtColor(detection_frame, cv2.COLOR_BGR2RGB)
         results = self.hands.process(frame_rgb)
 
         if results.multi_hand_landmarks:
@@ -47,23 +145,34 @@ class FingerTracker:
                     self.mp_hands.HandLandmark.INDEX_FINGER_TIP
                 ]
 
-                height, width, _ = frame.shape
-                camera_x = int(index_finger_tip.x * width)
-                camera_y = int(index_finger_tip.y * height)
+                # Landmarks are normalized to the region, map them back to the full frame
+                camera_x = int(x0 + index_finger_tip.x * (x1 - x0))
+                camera_y = int(y0 + index_finger_tip.y * (y1 - y0))
+                return camera_x, camera_y
 
-                if self.transform_matrix is not None:
-                    # perspectiveTransform expects shape (N, 1, 2)
-                    points = np.array([[[camera_x, camera_y]]], dtype="float32")
-                    mapped = cv2.perspectiveTransform(points, self.transform_matrix)
-                    mapped_x, mapped_y = mapped[0, 0, 0], mapped[0, 0, 1]
-
-                    # Clamp to screen boundaries
-                    mapped_x = max(0, min(self.screen_width, mapped_x))
-                    mapped_y = max(0, min(self.screen_height, mapped_y))
-                else:
-                    # If no transform, just position in top-left corner
-                    mapped_x, mapped_y = camera_x, camera_y
+        return None
 
-                return (mapped_x, mapped_y, camera_x, camera_y)
+    def map_to_screen(self, camera_x, camera_y):
+        """Maps a position in camera pixels to GAME coordinates."""
+        return self.coordinate_pipeline.map_point(camera_x, camera_y)
 
-        return None
+    def get_roi(self, frame_shape):
+        """
+        Returns the padded bounding box (x0, y0, x1, y1) of the calibration points,
+        clipped to the frame.
+        """
+        if self.roi is None or self.roi_frame_shape != frame_shape:
+            height, width = frame_shape[:2]
+            points = np.array(self.calibration_points, dtype="float32")
+            x_min, y_min = points.min(axis=0)
+            x_max, y_max = points.max(axis=0)
+            pad_x = (x_max - x_min) * self.roi_padding
+            pad_y = (y_max - y_min) * self.roi_padding
+            self.roi = (
+                int(max(0, x_min - pad_x)),
+                int(max(0, y_min - pad_y)),
+                int(min(width, x_max + pad_x)),
+                int(min(height, y_max + pad_y)),
+            )
+            self.roi_frame_shape = frame_shape
+        return self.roi
@@ -0,0 +1,354 @@
+import argparse
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pygame
+
+# Phases of a frame of GameManager.run, in the order they happen. "wait" is the
+# time the loop waits for events at the start of the frame (pygame.event.wait on
+# idle screens), "sleep" the time it sleeps after presenting (clock.tick). The
+# other phases are the work of the frame.
+PHASES = ("wait", "events", "update", "draw", "present", "sleep")
+WAIT_PHASES = ("wait", "sleep")
+WORK_PHASES = tuple(phase for phase in PHASES if phase not in WAIT_PHASES)
+
+PHASE_COLORS = {
+    "wait": (70, 70, 70),
+    "events": (230, 200, 60),
+    "update": (80, 170, 240),
+    "draw": (90, 210, 110),
+    "present": (230, 90, 90),
+    "sleep": (110, 110, 110),
+}
+
+# Returned by measure() while disabled, so an unprofiled span costs one call
+_DISABLED = nullcontext()
+
+
+class FrameProfiler:
+    def __init__(self, capacity=3600, span_capacity=16384):
+        """
+        Records how long each phase of the last frames took, and named spans inside
+        them (e.g. the finger tracking or a send_message), in preallocated ring
+        buffers. While disabled, begin_frame, mark and measure return at once.
+
+        :param capacity: Number of frames kept (one minute at 60 FPS).
+        :param span_capacity: Number of spans kept.
+        """
+        self.enabled = False
+        self.start = time.perf_counter()
+        self.capacity = capacity
+        # Start of the frame and the duration of each phase, in seconds
+        self.frames = np.zeros((capacity, 1 + len(PHASES)))
+        self.frame_count = 0
+        self.frame_start = 0.0
+        self.phase_start = 0.0
+        self.current = np.zeros(len(PHASES))
+        self.phase_index = {phase: i for i, phase in enumerate(PHASES)}
+
+        # Spans may be measured in other threads (e.g. the websocket server)
+        self.lock = threading.Lock()
+        self.span_capacity = span_capacity
+        self.spans = np.zeros(
+            span_capacity,
+            dtype=[
+                ("name", np.int32),
+                ("thread", np.int64),
+                ("start", np.float64),
+                ("duration", np.float64),
+            ],
+        )
+        self.span_count = 0
+        self.span_names = []
+        self.span_name_index = {}
+        self.thread_names = {}
+
+        # Overlay text is only formatted a few times per second
+        self.overlay_text = []
+        self.overlay_text_frame = -1
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            # The frame in progress is not complete
+            self.frame_start = 0.0
+        self.enabled = enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.phase_start = time.perf_counter()
+        self.current[:] = 0.0
+
+    def mark(self, phase):
+        """Ends the current phase. A phase marked twice in a frame is summed up."""
+        if not self.enabled or not self.frame_start:
+            return
+        now = time.perf_counter()
+        self.current[self.phase_index[phase]] += now - self.phase_start
+        self.phase_start = now
+
+    def end_frame(self):
+        if not self.enabled or not self.frame_start:
+            return
+        row = self.frames[self.frame_count % self.capacity]
+        row[0] = self.frame_start - self.start
+        row[1:] = self.current
+        self.frame_count += 1
+
+    def measure(self, name):
+        """Context manager recording the time spent in a named span."""
+        if not self.enabled:
+            return _DISABLED
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            thread = threading.current_thread()
+            with self.lock:
+                index = self.span_name_index.get(name)
+                if index is None:
+                    index = self.span_name_index[name] = len(self.span_names)
+                    self.span_names.append(name)
+                self.thread_names[thread.ident] = thread.name
+                self.spans[self.span_count % self.span_capacity] = (
+                    index,
+                    thread.ident,
+                    start - self.start,
+                    duration,
+                )
+                self.span_count += 1
+
+    def get_frames(self):
+        """The recorded frames, oldest first, as an array (start, *PHASES)."""
+        count = min(self.frame_count, self.capacity)
+        if self.frame_count <= self.capacity:
+            return self.frames[:count].copy()
+        split = self.frame_count % self.capacity
+        return np.concatenate((self.frames[split:], self.frames[:split]))
+
+    def get_spans(self):
+        with self.lock:
+            count = min(self.span_count, self.span_capacity)
+            if self.span_count <= self.span_capacity:
+                return self.spans[:count].copy()
+            split = self.span_count % self.span_capacity
+            return np.concatenate((self.spans[split:], self.spans[:split]))
+
+    def get_stats(self, last=None):
+        """
+        Percentiles in milliseconds of the frame interval, of the work per frame
+        (without waiting) and of each phase.
+
+        :param last: Only use this many of the newest frames.
+        """
+        frames = self.get_frames()
+        if last is not None:
+            frames = frames[-last:]
+        if len(frames) == 0:
+            return None
+        durations = frames[:, 1:] * 1000
+        work = [self.phase_index[phase] for phase in WORK_PHASES]
+        columns = {
+            "frame": durations.sum(axis=1),
+            "work": durations[:, work].sum(axis=1),
+        }
+        for i, phase in enumerate(PHASES):
+            columns[phase] = durations[:, i]
+        stats = {"frames": len(frames)}
+        for name, values in columns.items():
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            stats[name] = {"p50": p50, "p95": p95, "p99": p99, "max": values.max()}
+        return stats
+
+    def print_stats(self):
+        stats = self.get_stats()
+        if stats is None:
+            return
+        print(f"Frame profile of the last {stats['frames']} frames (ms):")
+        for name in ("frame", "work") + PHASES:
+            values = stats[name]
+            print(
+                f"  {name:<8} p50 {values['p50']:6.2f}  p95 {values['p95']:6.2f}  "
+                f"p99 {values['p99']:6.2f}  max {values['max']:6.2f}"
+            )
+
+    def export_chrome_trace(self, path):
+        """
+        Writes the frames and spans in the Chrome trace event format, to be opened
+        in chrome://tracing or https://ui.perfetto.dev.
+        """
+        main_thread = threading.main_thread()
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": main_thread.ident,
+                "args": {"name": main_thread.name},
+            }
+        ]
+        for frame_start, *durations in self.get_frames():
+            start = frame_start * 1e6
+            events.append(
+                self._trace_event("frame", main_thread.ident, start, sum(durations))
+            )
+            for phase, duration in zip(PHASES, durations):
+                if duration > 0:
+                    events.append(
+                        self._trace_event(phase, main_thread.ident, start, duration)
+                    )
+                    start += duration * 1e6
+        for span in self.get_spans():
+            events.append(
+                self._trace_event(
+                    self.span_names[span["name"]],
+                    int(span["thread"]),
+                    span["start"] * 1e6,
+                    span["duration"],
+                )
+            )
+        for ident, name in self.thread_names.items():
+            if ident != main_thread.ident:
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": 1,
+                        "tid": ident,
+                        "args": {"name": name},
+                    }
+                )
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    @staticmethod
+    def _trace_event(name, thread, start_us, duration):
+        return {
+            "name": name,
+            "ph": "X",
+            "pid": 1,
+            "tid": thread,
+            "ts": round(start_us, 1),
+            "dur": round(duration * 1e6, 1),
+        }
+
+    def export_csv(self, path):
+        """Writes one row per frame: its start and the duration of each phase in ms."""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "start_ms"] + [f"{p}_ms" for p in PHASES])
+            first = max(0, self.frame_count - self.capacity)
+            for i, row in enumerate(self.get_frames() * 1000):
+                writer.writerow([first + i] + [f"{value:.3f}" for value in row])
+
+    def export(self, folder):
+        """Writes frame_trace.json and frame_times.csv into the folder."""
+        if self.frame_count == 0:
+            return
+        folder.mkdir(parents=True, exist_ok=True)
+        self.export_chrome_trace(folder / "frame_trace.json")
+        self.export_csv(folder / "frame_times.csv")
+        print(f"Frame profile saved to {folder}")
+
+    def draw_overlay(self, surface, rect, frames=240, scale_ms=50):
+        """
+        Draws a graph of the recent frame times, one stacked bar per frame and
+        phase, with lines at 60 and 30 FPS and the percentiles of the frame times.
+
+        :param rect: pygame.Rect of the overlay.
+        :param frames: Number of frames shown.
+        :param scale_ms: Frame time at the top of the graph.
+        :return: The rectangle drawn.
+        """
+        from utils.utils import render_text
+
+        surface.fill((20, 20, 20), rect)
+        line_height = max(12, rect.height // 10)
+        graph = pygame.Rect(
+            rect.x, rect.y + 3 * line_height, rect.width, rect.height - 3 * line_height
+        )
+
+        recent = self.get_frames()[-frames:]
+        bar_width = graph.width / frames
+        pixels_per_ms = graph.height / scale_ms
+        for i, (_, *durations) in enumerate(recent):
+            x = graph.x + round(i * bar_width)
+            width = max(1, round((i + 1) * bar_width) - round(i * bar_width))
+            bottom = graph.bottom
+            # Work first, the waiting on top of it
+            for phase in WORK_PHASES + WAIT_PHASES:
+                height = durations[self.phase_index[phase]] * 1000 * pixels_per_ms
+                height = min(round(height), bottom - graph.top)
+                if height > 0:
+                    bottom -= height
+                    surface.fill(PHASE_COLORS[phase], (x, bottom, width, height))
+        for ms in (1000 / 60, 1000 / 30):
+            y = graph.bottom - round(ms * pixels_per_ms)
+            pygame.draw.line(surface, (200, 200, 200), (graph.x, y), (graph.right, y))
+
+        if self.frame_count - self.overlay_text_frame >= 15:
+            self.overlay_text_frame = self.frame_count
+            stats = self.get_stats(last=frames)
+            self.overlay_text = []
+            if stats is not None:
+                for name in ("frame", "work"):
+                    self.overlay_text.append(
+                        f"{name}: p50 {stats[name]['p50']:.1f}  "
+                        f"p95 {stats[name]['p95']:.1f}  p99 {stats[name]['p99']:.1f} ms"
+                    )
+                self.overlay_text.append(
+                    "  ".join(
+                        f"{phase} {stats[phase]['p95']:.1f}" for phase in WORK_PHASES
+                    )
+                    + " (p95)"
+                )
+        for i, text in enumerate(self.overlay_text):
+            render_text(
+                surface,
+                text,
+                line_height,
+                (255, 255, 255),
+                (rect.x + 4, rect.y + i * line_height),
+            )
+        return rect
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the overhead of the frame profiler per frame."
+    )
+    parser.add_argument("--frames", type=int, default=100000)
+    args = parser.parse_args()
+
+    def run(profiler):
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            profiler.begin_frame()
+            profiler.mark("wait")
+            profiler.mark("events")
+            with profiler.measure("span"):
+                pass
+            profiler.mark("update")
+            profiler.mark("draw")
+            profiler.mark("present")
+            profiler.mark("sleep")
+            profiler.end_frame()
+        return (time.perf_counter() - start) / args.frames * 1e6
+
+    profiler = FrameProfiler()
+    disabled = run(profiler)
+    profiler.set_enabled(True)
+    enabled = run(profiler)
+    print(
+        f"Profiler overhead per frame: disabled {disabled:.2f} us, "
+        f"enabled {enabled:.2f} us"
+    )
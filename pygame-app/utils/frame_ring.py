@@ -0,0 +1,222 @@
+import argparse
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Header of every slot: sequence number of the frame in the slot (-1 while it is
+# written, 0 if empty) and the time.perf_counter() at which it was captured
+SLOT_DTYPE = np.dtype([("seq", "<i8"), ("timestamp", "<f8")])
+HEADER_ALIGNMENT = 64
+
+
+class FrameRingBuffer:
+    def __init__(self, shape, dtype=np.uint8, slots=4, name=None):
+        """
+        Ring buffer of camera frames in shared memory. Readers in other threads or
+        processes get NumPy views of the frames, nothing is copied or pickled.
+
+        There is a single writer. Every frame has a sequence number; a reader checks
+        with is_valid() after using a view whether the slot was overwritten meanwhile.
+
+        :param shape: Shape of a frame, e.g. (480, 640, 3).
+        :param slots: Number of frames kept. Must cover the frames captured while a
+            reader still uses a view.
+        :param name: Name of an existing buffer to attach to (see attach()).
+            A new buffer is created if not given.
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.n_slots = slots
+        self.owner = name is None
+
+        frame_size = int(np.prod(self.shape)) * self.dtype.itemsize
+        header_size = 8 + slots * SLOT_DTYPE.itemsize
+        header_size += -header_size % HEADER_ALIGNMENT
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=header_size + slots * frame_size
+        )
+
+        buffer = self.shm.buf
+        self._latest = np.ndarray((1,), dtype="<i8", buffer=buffer, offset=0)
+        self.slots = np.ndarray((slots,), dtype=SLOT_DTYPE, buffer=buffer, offset=8)
+        self.frames = np.ndarray(
+            (slots, *self.shape), dtype=self.dtype, buffer=buffer, offset=header_size
+        )
+        if self.owner:
+            self._latest[0] = 0
+            self.slots["seq"] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def attach(cls, name, shape, dtype=np.uint8, slots=4):
+        """Attaches to a buffer created by another process."""
+        return cls(shape, dtype, slots, name=name)
+
+    def begin_write(self):
+        """
+        Reserves the next slot.
+
+        :return: (seq, view) - fill the view, then call commit(seq, timestamp).
+        """
+        seq = int(self._latest[0]) + 1
+        slot = seq % self.n_slots
+        self.slots["seq"][slot] = -1
+        return seq, self.frames[slot]
+
+    def commit(self, seq, timestamp):
+        slot = seq % self.n_slots
+        self.slots["timestamp"][slot] = timestamp
+        self.slots["seq"][slot] = seq
+        self._latest[0] = seq
+
+    def write(self, frame, timestamp):
+        """Copies a frame into the next slot and returns its sequence number."""
+        seq, view = self.begin_write()
+        view[...] = frame
+        self.commit(seq, timestamp)
+        return seq
+
+    def read_from(self, cap):
+        """
+        Decodes the next frame of a cv2.VideoCapture directly into the next slot.
+
+        :return: (seq, timestamp), or None if no frame could be read.
+        """
+        seq, view = self.begin_write()
+        ret, image = cap.read(view)
+        timestamp = time.perf_counter()
+        if not ret:
+            self.slots["seq"][seq % self.n_slots] = 0
+            return None
+        if image is not view:
+            # The capture delivered another size or type than expected
+            view[...] = image
+        self.commit(seq, timestamp)
+        return seq, timestamp
+
+    def latest_seq(self):
+        return int(self._latest[0])
+
+    def latest(self):
+        """
+        Returns (seq, timestamp, view) of the newest frame, or None if empty.
+        The view is only valid as long as is_valid(seq) holds.
+        """
+        seq = int(self._latest[0])
+        if seq == 0:
+            return None
+        return self.get(seq)
+
+    def get(self, seq):
+        """Returns (seq, timestamp, view) of a frame, or None if it was overwritten."""
+        slot = seq % self.n_slots
+        timestamp = float(self.slots["timestamp"][slot])
+        if seq <= 0 or self.slots["seq"][slot] != seq:
+            return None
+        return seq, timestamp, self.frames[slot]
+
+    def is_valid(self, seq):
+        """Whether the frame `seq` is still in its slot."""
+        return seq > 0 and self.slots["seq"][seq % self.n_slots] == seq
+
+    def close(self):
+        """Releases the views. The creator also frees the shared memory."""
+        self._latest = self.slots = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A reader still holds a view, the mapping goes away with the view
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+def _queue_consumer(queue, n_frames, results):
+    latencies = []
+    for _ in range(n_frames):
+        timestamp, frame = queue.get()
+        frame[0, 0, 0]
+        latencies.append(time.perf_counter() - timestamp)
+    results.put(latencies)
+
+
+def _ring_consumer(name, shape, slots, n_frames, results):
+    ring = FrameRingBuffer.attach(name, shape, slots=slots)
+    latencies = []
+    seen = 0
+    while len(latencies) < n_frames:
+        latest = ring.latest()
+        if latest is None or latest[0] == seen:
+            time.sleep(0.0002)
+            continue
+        seq, timestamp, view = latest
+        view[0, 0, 0]
+        if ring.is_valid(seq):
+            latencies.append(time.perf_counter() - timestamp)
+        seen = seq
+    results.put(latencies)
+    ring.close()
+
+
+def _produce(write, n_frames, fps):
+    """Calls write() at the camera frame rate and returns the mean time per call."""
+    cost = 0.0
+    start = time.perf_counter()
+    for i in range(n_frames):
+        time.sleep(max(0.0, start + i / fps - time.perf_counter()))
+        before = time.perf_counter()
+        write()
+        cost += time.perf_counter() - before
+    return cost / n_frames
+
+
+if __name__ == "__main__":
+    # Hands camera sized frames to another process through a multiprocessing.Queue
+    # (pickled copies) and through the shared ring buffer
+    parser = argparse.ArgumentParser(
+        description="Compare a multiprocessing.Queue with the shared frame ring buffer."
+    )
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    shape = (args.height, args.width, 3)
+    frame = np.random.randint(0, 255, shape, dtype=np.uint8)
+    results = multiprocessing.Queue()
+
+    queue = multiprocessing.Queue()
+    ring = FrameRingBuffer(shape, slots=4)
+    for name, consumer, write in (
+        (
+            "multiprocessing.Queue",
+            multiprocessing.Process(
+                target=_queue_consumer, args=(queue, args.frames, results)
+            ),
+            lambda: queue.put((time.perf_counter(), frame)),
+        ),
+        (
+            "FrameRingBuffer",
+            multiprocessing.Process(
+                target=_ring_consumer, args=(ring.name, shape, 4, args.frames, results)
+            ),
+            lambda: ring.write(frame, time.perf_counter()),
+        ),
+    ):
+        consumer.start()
+        time.sleep(0.5)  # Let the consumer start
+        cost = _produce(write, args.frames, args.fps)
+        latencies = np.array(results.get()) * 1000
+        consumer.join()
+        print(
+            f"{name}: {cost * 1e6:,.0f} us per frame for the producer, "
+            f"handoff latency median {np.median(latencies):.2f} ms, "
+            f"p95 {np.percentile(latencies, 95):.2f} ms"
+        )
+    ring.close()
@@ -0,0 +1,117 @@
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+# Events a player causes, their latency until the next presented frame is measured
+INPUT_EVENTS = (
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.MOUSEMOTION,
+    pygame.KEYDOWN,
+    pygame.FINGERDOWN,
+)
+
+
+class FrameScheduler:
+    def __init__(self, clock, idle_timeout=0.5, window=1000):
+        """
+        Paces the main loop with the frame rate the current screen asks for
+        (ScreenInterface.get_frame_rate). Screens without a frame rate are idle: the
+        loop sleeps in pygame.event.wait until an input event arrives, so it reacts
+        at once instead of at the next tick.
+
+        Measures per screen the frame interval jitter and the input latency, i.e. the
+        longest time an input event can wait until its frame is presented.
+
+        :param clock: pygame.time.Clock of the game, ticked once per frame.
+        :param idle_timeout: Idle screens still run a frame after this many seconds.
+        :param window: Number of frames kept per screen for the statistics.
+        """
+        self.clock = clock
+        self.idle_timeout = idle_timeout
+        self.window = window
+
+        self.frame_start = None
+        self.previous_start = None
+        self.frame_end = None
+        self.previous_frame = None  # (screen name, frame rate) of the last frame
+        self.had_input = False
+        self.intervals = {}  # Screen name -> frame intervals in seconds
+        self.latencies = {}  # Screen name -> input latencies in seconds
+        self.idle_frames = {}  # Screen name -> frames that were run idle
+
+    def get_events(self, frame_rate):
+        """
+        Returns the pending events. For an idle screen (frame_rate None) it blocks
+        until there is an event or the idle timeout has passed.
+        """
+        if frame_rate is None:
+            event = pygame.event.wait(int(self.idle_timeout * 1000))
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events += pygame.event.get()
+        else:
+            events = pygame.event.get()
+        self.previous_start = self.frame_start
+        self.frame_start = time.perf_counter()
+        self.had_input = any(event.type in INPUT_EVENTS for event in events)
+        return events
+
+    def end_frame(self, screen_name, frame_rate):
+        """Called after the frame was presented. Waits for the next frame."""
+        now = time.perf_counter()
+        if frame_rate is None:
+            self.idle_frames[screen_name] = self.idle_frames.get(screen_name, 0) + 1
+            # The loop woke up for the event, it did not wait in the queue
+            waited_since = self.frame_start
+        else:
+            if self.previous_frame == (screen_name, frame_rate):
+                self._record(
+                    self.intervals, screen_name, self.frame_start - self.previous_start
+                )
+            # The event may have arrived right after the last frame was presented
+            waited_since = self.frame_end if self.frame_end is not None else now
+        if self.had_input:
+            self._record(self.latencies, screen_name, now - waited_since)
+        self.frame_end = now
+        self.previous_frame = (screen_name, frame_rate)
+
+        if frame_rate is None:
+            self.clock.tick()
+        else:
+            self.clock.tick(frame_rate)
+
+    def _record(self, values, screen_name, value):
+        if screen_name not in values:
+            values[screen_name] = deque(maxlen=self.window)
+        values[screen_name].append(value)
+
+    def get_stats(self):
+        """Frame rate, jitter and input latency in milliseconds per screen."""
+        stats = {}
+        for name in set(self.intervals) | set(self.latencies) | set(self.idle_frames):
+            intervals = np.array(self.intervals.get(name, ())) * 1000
+            latencies = np.array(self.latencies.get(name, ())) * 1000
+            stats[name] = {
+                "idle_frames": self.idle_frames.get(name, 0),
+                "fps": 1000 / intervals.mean() if len(intervals) else None,
+                "jitter_ms": intervals.std() if len(intervals) else None,
+                "input_latency_p95_ms": (
+                    np.percentile(latencies, 95) if len(latencies) else None
+                ),
+            }
+        return stats
+
+    def print_stats(self):
+        for name, stats in sorted(self.get_stats().items()):
+            parts = [f"{stats['idle_frames']} idle frames"]
+            if stats["fps"] is not None:
+                parts.append(
+                    f"{stats['fps']:.0f} FPS, jitter {stats['jitter_ms']:.1f} ms"
+                )
+            if stats["input_latency_p95_ms"] is not None:
+                parts.append(
+                    f"input latency p95 {stats['input_latency_p95_ms']:.0f} ms"
+                )
+            print(f"{name}: {', '.join(parts)}")
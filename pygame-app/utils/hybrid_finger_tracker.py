@@ -0,0 +1,177 @@
+import cv2
+import numpy as np
+
+# Lucas-Kanade parameters for following the finger tip between two camera frames
+LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+)
+
+
+class HybridFingerTracker:
+    def __init__(
+        self,
+        finger_tracker,
+        detect_every=4,
+        patch_radius=6,
+        max_flow_error=1.5,
+        max_jump=80,
+        max_drift=8,
+    ):
+        """
+        Detect-then-track: runs the MediaPipe hand detection of a FingerTracker only
+        every `detect_every` frames and follows the index finger tip in between with
+        sparse Lucas-Kanade optical flow on a small patch of points around the tip.
+
+        A new detection is forced when the flow is unreliable: too few patch points
+        are tracked, the forward-backward error is too large, or the tip jumps. This
+        check runs on every followed frame, also on the first one after a detection.
+        Every detection is also compared with the flow: if the flow drifted away, the
+        detections become more frequent, otherwise less frequent again (up to
+        `detect_every`). Used as drop-in replacement for the FingerTracker.
+
+        :param finger_tracker: FingerTracker used for detections and the mapping to the screen.
+        :param detect_every: Frames per detection (1 = detect on every frame).
+        :param patch_radius: Half size in camera pixels of the patch of tracked points.
+        :param max_flow_error: Maximum forward-backward error of a tracked point in pixels.
+        :param max_jump: Maximum movement of the tip between two frames in pixels.
+        :param max_drift: Maximum distance in pixels between flow and detection.
+        """
+        self.finger_tracker = finger_tracker
+        self.detect_every = detect_every
+        self.patch_radius = patch_radius
+        self.max_flow_error = max_flow_error
+        self.max_jump = max_jump
+        self.max_drift = max_drift
+        self.interval = detect_every  # Current frames per detection
+
+        # Patch of points around the tip, relative to it
+        offsets = np.arange(-patch_radius, patch_radius + 1, patch_radius)
+        self.patch = np.array(
+            [(dx, dy) for dy in offsets for dx in offsets], dtype=np.float32
+        )
+
+        self.previous_gray = None
+        self.region_offset = (0, 0)
+        self.tip = None  # (x, y) in camera pixels, None if lost
+        self.frames_since_detection = 0
+
+        # Statistics
+        self.detections = 0
+        self.flow_updates = 0
+        self.forced_detections = 0
+        self.drift_corrections = 0
+
+    def __getattr__(self, name):
+        # Everything else (set_quality, close, get_roi, ...) is the FingerTracker's
+        return getattr(self.finger_tracker, name)
+
+    def get_finger_position(self, frame):
+        """Same as FingerTracker.get_finger_position."""
+        gray, offset = self._gray_region(frame)
+
+        tip = None
+        if self.tip is not None and offset == self.region_offset:
+            tip = self._follow(gray, offset)
+            if tip is None:
+                self.forced_detections += 1
+            elif self.frames_since_detection < self.interval:
+                self.flow_updates += 1
+                self.frames_since_detection += 1
+                return self._result(tip, gray, offset)
+
+        # Detection: scheduled, forced or no finger yet
+        flow_tip = tip
+        detection = self.finger_tracker.detect_finger(frame)
+        self.detections += 1
+        self.frames_since_detection = 1
+        tip = None
+        if detection is not None:
+            camera_x, camera_y = detection
+            tip = (camera_x, camera_y)
+            if flow_tip is not None:
+                # Drift check: adapt the detection interval to the flow quality
+                drift = np.hypot(flow_tip[0] - camera_x, flow_tip[1] - camera_y)
+                if drift > self.max_drift:
+                    self.drift_corrections += 1
+                    self.interval = max(1, self.interval // 2)
+                else:
+                    self.interval = min(self.detect_every, self.interval + 1)
+        return self._result(tip, gray, offset)
+
+    def _result(self, tip, gray, offset):
+        """Remembers the frame for the next flow step and maps the tip to the screen."""
+        self.tip = tip
+        self.previous_gray = gray
+        self.region_offset = offset
+        if tip is None:
+            return None
+        camera_x, camera_y = int(round(tip[0])), int(round(tip[1]))
+        return (
+            *self.finger_tracker.map_to_screen(camera_x, camera_y),
+            camera_x,
+            camera_y,
+        )
+
+    def _gray_region(self, frame):
+        """Grayscale of the tracked region (the region of interest if used)."""
+        if self.finger_tracker.use_roi:
+            x0, y0, x1, y1 = self.finger_tracker.get_roi(frame.shape)
+            frame = frame[y0:y1, x0:x1]
+        else:
+            x0, y0 = 0, 0
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (x0, y0)
+
+    def _follow(self, gray, offset):
+        """
+        Moves the tip with the median flow of the patch points.
+
+        :return: The new tip, or None if the flow cannot be trusted.
+        """
+        tip = np.array(self.tip, dtype=np.float32) - np.float32(offset)
+
+        # Only the window the tip can reach is needed, that keeps the pyramids small
+        height, width = gray.shape
+        margin = self.max_jump + self.patch_radius + LK_PARAMS["winSize"][0]
+        x0 = max(0, int(tip[0]) - margin)
+        y0 = max(0, int(tip[1]) - margin)
+        x1 = min(width, int(tip[0]) + margin)
+        y1 = min(height, int(tip[1]) + margin)
+        previous_window = self.previous_gray[y0:y1, x0:x1]
+        window = gray[y0:y1, x0:x1]
+
+        points = (tip - np.float32((x0, y0)) + self.patch).reshape(-1, 1, 2)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            previous_window, window, points, None, **LK_PARAMS
+        )
+        # Forward-backward check: tracking back has to end where it started
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(
+            window, previous_window, moved, None, **LK_PARAMS
+        )
+        error = np.linalg.norm((points - back).reshape(-1, 2), axis=1)
+        good = (
+            (status.ravel() == 1)
+            & (back_status.ravel() == 1)
+            & (error < self.max_flow_error)
+        )
+        if good.sum() < len(points) // 2:
+            return None
+
+        displacement = np.median((moved - points).reshape(-1, 2)[good], axis=0)
+        if np.hypot(*displacement) > self.max_jump:
+            return None
+        new_tip = tip + displacement
+        if not (0 <= new_tip[0] < width and 0 <= new_tip[1] < height):
+            return None
+        return float(new_tip[0] + offset[0]), float(new_tip[1] + offset[1])
+
+    def get_stats(self):
+        """How often the finger was detected and how often followed with flow."""
+        return {
+            "detections": self.detections,
+            "flow_updates": self.flow_updates,
+            "forced_detections": self.forced_detections,
+            "drift_corrections": self.drift_corrections,
+            "detection_interval": self.interval,
+        }
@@ -1,5 +1,7 @@
 import pygame
 
+from utils.layout import DESIGN_HEIGHT, DESIGN_WIDTH
+
 
 class InvisibleButton:
     def __init__(self, manager, default_button_type="", rect=None, callback=None):
@@ -13,19 +15,20 @@ class InvisibleButton:
         if rect:
             self.rect = rect
         else:
+            # In design pixels, see utils/layout.py
             default_button_width = 400
             default_button_height = 250
             if default_button_type == "back":
-                self.rect = pygame.Rect(
+                self.rect = manager.layout.rect(
                     0,
-                    manager.screen_height - default_button_height,
+                    DESIGN_HEIGHT - default_button_height,
                     default_button_width,
                     default_button_height,
                 )  # Bottom-left arrow
             if default_button_type == "forward":
-                self.rect = pygame.Rect(
-                    manager.screen_width - default_button_width,
-                    manager.screen_height - default_button_height,
+                self.rect = manager.layout.rect(
+                    DESIGN_WIDTH - default_button_width,
+                    DESIGN_HEIGHT - default_button_height,
                     default_button_width,
                     default_button_height,
                 )
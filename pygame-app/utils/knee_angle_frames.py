@@ -0,0 +1,122 @@
+import json
+import struct
+import time
+
+import numpy as np
+
+# Frames that carry many knee angle samples at once. Every sample has the
+# device time in microseconds (e.g. micros() on the ESP32, wraps after ~71 min)
+# and the knee angle in degrees.
+#
+# JSON text frame:
+#   {"field": "angles", "samples": [[device_time_us, angle], ...]}
+#
+# Binary frame (little endian):
+#   header: magic b"KA", version (uint8), reserved (uint8), sample count (uint16)
+#   samples: count x (device_time_us uint32, angle float32)
+JSON_FIELD = "angles"
+MAGIC = b"KA"
+VERSION = 1
+HEADER = struct.Struct("<2sBBH")
+SAMPLE_DTYPE = np.dtype([("device_time_us", "<u4"), ("knee_angle", "<f4")])
+MAX_SAMPLES_PER_FRAME = 0xFFFF
+
+
+def decode_json_batch(message_json):
+    """
+    Decodes the samples of an already parsed JSON batch frame.
+
+    :return: Tuple of (device_time_us, knee_angles) numpy arrays.
+    """
+    samples = np.asarray(message_json["samples"], dtype=np.float64).reshape(-1, 2)
+    device_time_us = samples[:, 0].astype(np.int64).astype(np.uint32)
+    return device_time_us, samples[:, 1].astype(np.float32)
+
+
+def decode_binary_frame(data):
+    """
+    Decodes a binary batch frame without copying the samples.
+
+    :return: Tuple of (device_time_us, knee_angles) numpy arrays.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Knee angle frame is shorter than its header")
+    magic, version, _, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unknown knee angle frame {magic!r} version {version}")
+    if len(data) != HEADER.size + count * SAMPLE_DTYPE.itemsize:
+        raise ValueError(
+            f"Knee angle frame has {len(data)} bytes, expected {count} samples"
+        )
+    samples = np.frombuffer(data, dtype=SAMPLE_DTYPE, count=count, offset=HEADER.size)
+    return samples["device_time_us"], samples["knee_angle"]
+
+
+def seconds_before_last(device_time_us):
+    """
+    Age of every sample relative to the last sample of the frame, in seconds.
+    Handles the wrap-around of the 32 bit microsecond counter.
+    """
+    device_time_us = np.asarray(device_time_us, dtype=np.uint32)
+    if len(device_time_us) == 0:
+        return np.zeros(0)
+    # uint32 arithmetic wraps around just like the counter on the device
+    return (device_time_us[-1] - device_time_us).astype(np.float64) / 1e6
+
+
+def encode_json_batch(device_time_us, knee_angles):
+    """Reference encoder for JSON batch frames (what the firmware has to send)."""
+    return json.dumps(
+        {
+            "field": JSON_FIELD,
+            "samples": [
+                [int(t), float(angle)] for t, angle in zip(device_time_us, knee_angles)
+            ],
+        }
+    )
+
+
+def encode_binary_frame(device_time_us, knee_angles):
+    """Reference encoder for binary batch frames (what the firmware has to send)."""
+    if len(device_time_us) > MAX_SAMPLES_PER_FRAME:
+        raise ValueError(f"At most {MAX_SAMPLES_PER_FRAME} samples fit into one frame")
+    samples = np.zeros(len(device_time_us), dtype=SAMPLE_DTYPE)
+    samples["device_time_us"] = np.asarray(device_time_us, dtype=np.int64).astype(
+        np.uint32
+    )
+    samples["knee_angle"] = knee_angles
+    return HEADER.pack(MAGIC, VERSION, 0, len(samples)) + samples.tobytes()
+
+
+if __name__ == "__main__":
+    # Encode one minute of synthetic samples at the IMU rate and measure decoding
+    sample_rate = 179
+    n_samples = 60 * sample_rate
+    device_time_us = (
+        2**32 - 10**6 + np.arange(n_samples) * 10**6 // sample_rate
+    ) % (2**32)
+    knee_angles = 30 * np.sin(np.arange(n_samples) / sample_rate)
+    frame_size = 18  # samples per frame, i.e. ~10 frames per second
+
+    for name, encode, decode in (
+        ("json", encode_json_batch, lambda m: decode_json_batch(json.loads(m))),
+        ("binary", encode_binary_frame, decode_binary_frame),
+    ):
+        frames = [
+            encode(device_time_us[i : i + frame_size], knee_angles[i : i + frame_size])
+            for i in range(0, n_samples, frame_size)
+        ]
+        start = time.perf_counter()
+        decoded = [decode(frame) for frame in frames]
+        duration = time.perf_counter() - start
+
+        times = np.concatenate([t for t, _ in decoded])
+        angles = np.concatenate([a for _, a in decoded])
+        assert np.array_equal(times, device_time_us.astype(np.uint32))
+        assert np.allclose(angles, knee_angles, atol=1e-4)
+        # Also holds for the frames in which the device counter wraps around
+        assert all(0 <= seconds_before_last(t)[0] < 1 for t, _ in decoded)
+        print(
+            f"{name}: {len(frames)} frames, {sum(len(f) for f in frames)} bytes, "
+            f"{n_samples / duration:,.0f} samples/s decoded"
+        )
@@ -0,0 +1,60 @@
+import pygame
+
+from utils.design_size import DESIGN_HEIGHT, DESIGN_WIDTH
+
+
+class Layout:
+    def __init__(self, width, height):
+        """
+        Maps design pixels to pixels of a window of the given size.
+
+        :param width: Width of the window in pixels.
+        :param height: Height of the window in pixels.
+        """
+        self.width = width
+        self.height = height
+        self.scale_x = width / DESIGN_WIDTH
+        self.scale_y = height / DESIGN_HEIGHT
+        # For sizes that keep their aspect ratio: fonts, circles, line widths
+        self.scale = min(self.scale_x, self.scale_y)
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def x(self, x):
+        return round(x * self.scale_x)
+
+    def y(self, y):
+        return round(y * self.scale_y)
+
+    def point(self, x, y):
+        return self.x(x), self.y(y)
+
+    def length(self, value):
+        """Scales a size that keeps its aspect ratio, e.g. a font size or a radius."""
+        return max(1, round(value * self.scale))
+
+    def rect(self, x, y, width, height):
+        """pygame.Rect of a rectangle given in design pixels."""
+        left, top = self.point(x, y)
+        right, bottom = self.point(x + width, y + height)
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def relative_rect(self, x, y, width, height):
+        """pygame.Rect of a rectangle given as fractions of the window size."""
+        return self.rect(
+            x * DESIGN_WIDTH,
+            y * DESIGN_HEIGHT,
+            width * DESIGN_WIDTH,
+            height * DESIGN_HEIGHT,
+        )
+
+    def centered_rect(self, width, height, dx=0, dy=0):
+        """pygame.Rect of the given design size, centered on the window (plus offset)."""
+        return self.rect(
+            DESIGN_WIDTH / 2 - width / 2 + dx,
+            DESIGN_HEIGHT / 2 - height / 2 + dy,
+            width,
+            height,
+        )
@@ -4,10 +4,26 @@ import time
 from datetime import datetime
 from pathlib import Path
 import csv
+import sqlite3
+
+import numpy as np
+
+from utils.batched_writer import BatchedWriter
+from utils.session_catalog import SessionCatalog
+
+# Knee angle batches of the csv backend, the binary backend uses the record dtype
+CSV_KNEE_ANGLE_DTYPE = np.dtype([("timestamp", "<f8"), ("knee_angle", "<f8")])
 
 
 class Logger:
-    def __init__(self):
+    def __init__(self, backend="csv"):
+        """
+        :param backend: "csv" writes human readable csv files, "binary" writes fixed-width
+            records with monotonic timestamps (see utils/binary_log.py).
+        """
+        if backend not in ("csv", "binary"):
+            raise ValueError(f"Unknown log backend: {backend}")
+        self.backend = backend
 
         # Create a folder to store all logs from one session
         self.folder_name = Path(f"logs/game_{time.strftime('%Y%m%d-%H%M%S')}")
@@ -18,44 +34,79 @@ class Logger:
         self.trajectory_filename = None
         self.knee_angle_filename = None
 
+        # Index of all logged games, updated whenever a game log is written
+        self.catalog = SessionCatalog()
+
+        # Rows are written in batches by a background thread, so that logging
+        # does not block the game loop or the websocket thread
+        self.writer = BatchedWriter(self._write_rows, name="LoggerWriter")
+
     def start_new_game(self):
         """
         Creates a new game log file and a new trajectory file (starts on each entry of the game screen;
         all game log and trajectory files from one session get stored in the same folder)
         """
+        # Make sure all rows of the previous game end up in its files
+        self.flush()
+
         current_time = time.strftime("%Y%m%d-%H%M%S")
 
         # create a JSON file(name) to log the game
         self.game_log_filename = self.folder_name / f"game_log_{current_time}.json"
 
+        if self.backend == "binary":
+            from utils import binary_log
+
+            # create binary files to log the trajectory and the knee angle
+            trajectory_filename = self.folder_name / f"trajectory_{current_time}.bin"
+            binary_log.create_binary_log(trajectory_filename)
+            knee_angle_filename = self.folder_name / f"knee_angle_{current_time}.bin"
+            binary_log.create_binary_log(knee_angle_filename)
+            print("Created binary trajectory and knee angle files.")
+        else:
+            trajectory_filename, knee_angle_filename = self._create_csv_files(
+                current_time
+            )
+
+        # Only publish the filenames once the headers are written, such that
+        # no row can end up in front of the header
+        self.trajectory_filename = trajectory_filename
+        self.knee_angle_filename = knee_angle_filename
+
+    def _create_csv_files(self, current_time):
+        """
+        Creates the trajectory and knee angle csv files with their headers.
+        """
         # create a CSV file to log the trajectory
-        self.trajectory_filename = self.folder_name / f"trajectory_{current_time}.csv"
-        with open(self.trajectory_filename, mode="a", newline="") as file:
+        trajectory_filename = self.folder_name / f"trajectory_{current_time}.csv"
+        with open(trajectory_filename, mode="a", newline="") as file:
             writer = csv.writer(file)
 
             # Write header, if it does not exist (it should not, as it's the start of the game)
-            file_exists = os.path.isfile(self.trajectory_filename)
+            file_exists = os.path.isfile(trajectory_filename)
             # if not file_exists:
             writer.writerow(
                 ["timepoint", "time_in_microseconds", "finger_x", "finger_y"]
             )
 
             print("Created trajectory file.")
-        # create a CSV file to log the trajectory
-        self.knee_angle_filename = self.folder_name / f"knee_angle_{current_time}.csv"
-        with open(self.knee_angle_filename, mode="a", newline="") as file:
+        # create a CSV file to log the knee angle
+        knee_angle_filename = self.folder_name / f"knee_angle_{current_time}.csv"
+        with open(knee_angle_filename, mode="a", newline="") as file:
             writer = csv.writer(file)
 
             # Write header, if it does not exist (it should not, as it's the start of the game)
-            file_exists = os.path.isfile(self.knee_angle_filename)
+            file_exists = os.path.isfile(knee_angle_filename)
             # if not file_exists:
             writer.writerow(["timepoint", "time_in_microseconds", "knee_angle"])
 
             print("Created knee angle file.")
 
+        return trajectory_filename, knee_angle_filename
+
     def append_position_data(self, finger_x, finger_y):
         """
-        Check if the file exists to determine if headers need to be written
+        Queues the current finger position for the trajectory file
         """
         # Raise warning if the filename is not set
         if self.trajectory_filename is None:
@@ -63,16 +114,14 @@ class Logger:
                 "trajectory_filename is not set. Call start_new_game() first."
             )
 
-        # Add current trajectory data to the trajectory csv file
-        current_time = time.strftime("%H:%M:%S")
-        current_microsecond = datetime.now().strftime("%f")
-        with open(self.trajectory_filename, mode="a", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow([current_time, current_microsecond, finger_x, finger_y])
+        # Add current trajectory data to the trajectory file
+        self.writer.put(
+            self.trajectory_filename, (self._timestamp(), finger_x, finger_y)
+        )
 
     def append_knee_angle(self, knee_angle):
         """
-        Check if the file exists to determine if headers need to be written
+        Queues the current knee angle for the knee angle file
         """
         # Raise warning if the filename is not set
         if self.knee_angle_filename is None:
@@ -80,12 +129,80 @@ class Logger:
                 "knee_angle_filename is not set. Call start_new_game() first."
             )
 
-        # Add current trajectory data to the trajectory csv file
-        current_time = time.strftime("%H:%M:%S")
-        current_microsecond = datetime.now().strftime("%f")
-        with open(self.knee_angle_filename, mode="a", newline="") as file:
+        # Add current knee angle to the knee angle file
+        self.writer.put(self.knee_angle_filename, (self._timestamp(), knee_angle))
+
+    def append_knee_angles(self, knee_angles, seconds_ago):
+        """
+        Queues many knee angle samples at once (e.g. from a batched frame of the knee ESP).
+
+        :param knee_angles: Sequence (or numpy array) of knee angles.
+        :param seconds_ago: Age of every sample in seconds, relative to now.
+        """
+        # Raise warning if the filename is not set
+        if self.knee_angle_filename is None:
+            raise ValueError(
+                "knee_angle_filename is not set. Call start_new_game() first."
+            )
+
+        # One structured array for the whole batch, nothing is done per sample on
+        # the calling (websocket) thread
+        now = self._timestamp()
+        seconds_ago = np.asarray(seconds_ago, dtype=np.float64)
+        if self.backend == "binary":
+            from utils import binary_log
+
+            records = np.empty(len(seconds_ago), dtype=binary_log.KNEE_ANGLE_DTYPE)
+            records["monotonic_ns"] = now - (seconds_ago * 1e9).astype(np.int64)
+        else:
+            records = np.empty(len(seconds_ago), dtype=CSV_KNEE_ANGLE_DTYPE)
+            records["timestamp"] = now - seconds_ago
+        records["knee_angle"] = knee_angles
+        self.writer.put_batch(self.knee_angle_filename, records)
+
+    def flush(self):
+        """
+        Blocks until all queued rows are written to their files.
+        """
+        self.writer.flush()
+
+    def close(self):
+        """
+        Writes all queued rows and stops the writer thread (call before quitting).
+        """
+        self.writer.close()
+
+    def _timestamp(self):
+        """
+        Timestamp stored with each row: wall clock seconds for csv files,
+        monotonic nanoseconds for binary files.
+        """
+        if self.backend == "binary":
+            return time.monotonic_ns()
+        return time.time()
+
+    def _write_rows(self, filename, rows):
+        """
+        Appends a batch of rows to a log file. Runs on the writer thread.
+        The timestamp of each csv row is formatted here instead of on the calling thread.
+
+        :param rows: List of row tuples, or a structured array (see append_knee_angles).
+        """
+        if self.backend == "binary":
+            from utils import binary_log
+
+            binary_log.append_records(
+                filename, rows, binary_log.dtype_for_filename(filename)
+            )
+            return
+
+        if isinstance(rows, np.ndarray):
+            rows = rows.tolist()
+        with open(filename, mode="a", newline="") as file:
             writer = csv.writer(file)
-            writer.writerow([current_time, current_microsecond, knee_angle])
+            for timestamp, *values in rows:
+                now = datetime.fromtimestamp(timestamp)
+                writer.writerow([now.strftime("%H:%M:%S"), now.strftime("%f"), *values])
 
     def log_shared_data(self, shared_data: dict):
         """
@@ -100,9 +217,15 @@ class Logger:
         # Prepare the data to save
         log = {
             "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "game_mode": shared_data.get("game_mode"),
+            "level": shared_data.get("level"),
+            "input_mode": shared_data.get("input_mode"),
             "end_reason": shared_data["end_reason"],
             "feedback": shared_data["feedback"],
             "total_duration_seconds": None,
+            # To align the trajectory with the press times (see utils/session_replay.py)
+            "start_time": shared_data["start_time"],
+            "screen_size": shared_data.get("screen_size"),
         }
 
         # Include optional log data that depend on game type
@@ -111,6 +234,10 @@ class Logger:
             if opt_key in shared_data.keys():
                 log[opt_key] = shared_data[opt_key]
 
+        # Quality tiers chosen by the finger tracking governor
+        if shared_data.get("tracking_quality"):
+            log["tracking_quality"] = shared_data["tracking_quality"]
+
         # Calculate total duration if available
         if shared_data["start_time"] and shared_data["end_time"]:
             log["total_duration_seconds"] = round(
@@ -134,3 +261,14 @@ class Logger:
             json.dump(log, json_file, indent=4)
 
         print(f"Log saved to {self.game_log_filename}")
+
+        # Index the game in the session catalog
+        try:
+            self.catalog.add_session(
+                self.game_log_filename,
+                log,
+                self.trajectory_filename,
+                self.knee_angle_filename,
+            )
+        except sqlite3.Error as e:
+            print(f"Could not add game to the session catalog: {e}")
@@ -0,0 +1,242 @@
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+
+# Filter settings per input mode. Only the finger position is filtered, it arrives
+# late (camera + inference) and jitters. Mouse positions are precise and immediate
+# and are used as they are.
+DEFAULT_POSITION_FILTERS = {
+    "finger": {"type": "kalman", "process_noise": 1e5, "max_prediction": 0.1},
+}
+
+
+class PositionFilter(ABC):
+    """
+    Smooths a stream of timestamped 2D positions and predicts the position at a later time.
+
+    :param max_prediction: Maximum time in seconds to extrapolate into the future.
+    """
+
+    def __init__(self, max_prediction=0.0):
+        self.max_prediction = max_prediction
+        self.last_time = None
+
+    def reset(self):
+        self.last_time = None
+
+    @abstractmethod
+    def update(self, x, y, timestamp):
+        """Adds a measured position and returns the filtered position at `timestamp`."""
+        pass
+
+    def velocity(self):
+        """Current velocity estimate in units per second."""
+        return 0.0, 0.0
+
+    def predict(self, x, y, timestamp, now=None):
+        """
+        Extrapolates the filtered position (x, y) at `timestamp` to `now`
+        (default: time.perf_counter()), i.e. compensates the camera and inference
+        latency of the measurement. The horizon is capped at max_prediction.
+        """
+        if now is None:
+            now = time.perf_counter()
+        horizon = min(self.max_prediction, max(0.0, now - timestamp))
+        vx, vy = self.velocity()
+        return x + vx * horizon, y + vy * horizon
+
+
+class NoFilter(PositionFilter):
+    def update(self, x, y, timestamp):
+        self.last_time = timestamp
+        return x, y
+
+
+class OneEuroFilter(PositionFilter):
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0, max_prediction=0.0):
+        """
+        One Euro filter (Casiez et al., 2012): a low-pass filter whose cutoff
+        frequency rises with the speed, i.e. little jitter at rest and little lag
+        during fast moves.
+
+        :param min_cutoff: Cutoff frequency in Hz at rest (lower = smoother).
+        :param beta: Increase of the cutoff per unit of speed (higher = less lag).
+        :param d_cutoff: Cutoff frequency in Hz for the speed estimate.
+        """
+        super().__init__(max_prediction)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.x = self.y = None
+        self.vx = self.vy = 0.0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, x, y, timestamp):
+        if self.last_time is None or timestamp <= self.last_time:
+            if self.last_time is None:
+                self.x, self.y = x, y
+            self.last_time = timestamp
+            return self.x, self.y
+
+        dt = timestamp - self.last_time
+        self.last_time = timestamp
+
+        # Filtered speed
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.vx += a_d * ((x - self.x) / dt - self.vx)
+        self.vy += a_d * ((y - self.y) / dt - self.vy)
+
+        # Speed dependent smoothing of the position
+        cutoff = self.min_cutoff + self.beta * math.hypot(self.vx, self.vy)
+        a = self._alpha(cutoff, dt)
+        self.x += a * (x - self.x)
+        self.y += a * (y - self.y)
+        return self.x, self.y
+
+    def velocity(self):
+        return self.vx, self.vy
+
+
+class _KalmanAxis:
+    """Constant velocity Kalman filter for one axis (state: position, velocity)."""
+
+    def __init__(self, position, measurement_noise):
+        self.p = position
+        self.v = 0.0
+        self.P00, self.P01, self.P11 = measurement_noise, 0.0, 1e4
+
+    def step(self, z, dt, process_noise, measurement_noise):
+        # Predict
+        self.p += self.v * dt
+        self.P00 += dt * (2 * self.P01 + dt * self.P11) + process_noise * dt**3 / 3
+        self.P01 += dt * self.P11 + process_noise * dt**2 / 2
+        self.P11 += process_noise * dt
+
+        # Update with the measurement
+        s = self.P00 + measurement_noise
+        k0, k1 = self.P00 / s, self.P01 / s
+        residual = z - self.p
+        self.p += k0 * residual
+        self.v += k1 * residual
+        self.P11 -= k1 * self.P01
+        self.P00 -= k0 * self.P00
+        self.P01 -= k0 * self.P01
+        return self.p
+
+
+class KalmanFilter(PositionFilter):
+    def __init__(self, process_noise=1e5, measurement_noise=25.0, max_prediction=0.0):
+        """
+        Constant velocity Kalman filter, independent for x and y.
+
+        :param process_noise: Spectral density of the acceleration (pixels^2 / s^3).
+            Higher values follow fast direction changes more quickly.
+        :param measurement_noise: Variance of the measured position (pixels^2).
+        """
+        super().__init__(max_prediction)
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.axes = None
+
+    def update(self, x, y, timestamp):
+        if self.axes is None:
+            self.axes = (
+                _KalmanAxis(x, self.measurement_noise),
+                _KalmanAxis(y, self.measurement_noise),
+            )
+            self.last_time = timestamp
+            return x, y
+
+        dt = max(0.0, timestamp - self.last_time)
+        self.last_time = max(self.last_time, timestamp)
+        return (
+            self.axes[0].step(x, dt, self.process_noise, self.measurement_noise),
+            self.axes[1].step(y, dt, self.process_noise, self.measurement_noise),
+        )
+
+    def velocity(self):
+        if self.axes is None:
+            return 0.0, 0.0
+        return self.axes[0].v, self.axes[1].v
+
+
+FILTER_TYPES = {
+    "none": NoFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_position_filter(settings):
+    """Creates a filter from settings like {"type": "one_euro", "beta": 0.02}."""
+    settings = dict(settings)
+    filter_type = settings.pop("type", "none")
+    if filter_type not in FILTER_TYPES:
+        raise ValueError(f"Unknown position filter: {filter_type}")
+    return FILTER_TYPES[filter_type](**settings)
+
+
+if __name__ == "__main__":
+    # Benchmark on a synthetic finger trajectory: circles around the dots, seen by
+    # a 30 FPS camera with 80 ms latency and 4 pixels of jitter
+    random.seed(0)
+    fps, latency, noise = 30, 0.08, 4.0
+    duration = 30
+
+    def true_position(t):
+        # Speed changes over time, like a patient drawing circles
+        phase = 2 * math.pi * (0.4 * t + 0.1 * math.sin(0.5 * t))
+        return 900 + 150 * math.cos(phase), 500 + 150 * math.sin(phase)
+
+    samples = []
+    for i in range(duration * fps):
+        t = i / fps
+        x, y = true_position(t)
+        samples.append((t, x + random.gauss(0, noise), y + random.gauss(0, noise)))
+
+    configurations = {
+        "none": {"type": "none"},
+        "one_euro": {"type": "one_euro"},
+        "one_euro + prediction": {
+            "type": "one_euro",
+            "d_cutoff": 2.0,
+            "max_prediction": 0.1,
+        },
+        "kalman": {"type": "kalman"},
+        "kalman + prediction (default)": DEFAULT_POSITION_FILTERS["finger"],
+    }
+    print(f"{'filter':30} {'error now':>10} {'jitter':>8} {'us/update':>10}")
+    for name, settings in configurations.items():
+        position_filter = make_position_filter(settings)
+        errors, steps = [], []
+        previous = None
+        start = time.perf_counter()
+        for t, x, y in samples:
+            fx, fy = position_filter.update(x, y, t)
+            # The sample is shown `latency` seconds after it was captured
+            px, py = position_filter.predict(fx, fy, t, now=t + latency)
+            tx, ty = true_position(t + latency)
+            errors.append(math.hypot(px - tx, py - ty))
+            if previous is not None:
+                steps.append(math.hypot(px - previous[0], py - previous[1]))
+            previous = (px, py)
+        cost = (time.perf_counter() - start) / len(samples) * 1e6
+
+        # Jitter: frame-to-frame change beyond the true motion
+        true_step = 2 * math.pi * 150 * 0.4 / fps
+        jitter = sum(abs(s - true_step) for s in steps) / len(steps)
+        rmse = math.sqrt(sum(e**2 for e in errors) / len(errors))
+        print(f"{name:30} {rmse:8.1f}px {jitter:6.1f}px {cost:10.2f}")
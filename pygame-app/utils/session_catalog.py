@@ -0,0 +1,265 @@
+import argparse
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+LOGS_DIR = Path("logs")
+DEFAULT_CATALOG_PATH = LOGS_DIR / "catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    game_log_file TEXT PRIMARY KEY,
+    session_folder TEXT NOT NULL,
+    date TEXT,
+    game_mode TEXT,
+    level TEXT,
+    input_mode TEXT,
+    end_reason TEXT,
+    feedback TEXT,
+    duration_seconds REAL,
+    dots_pressed INTEGER,
+    trajectory_file TEXT,
+    knee_angle_file TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_game ON sessions (game_mode, level, date);
+CREATE INDEX IF NOT EXISTS idx_sessions_end_reason ON sessions (end_reason, date);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (date);
+"""
+
+COLUMNS = [
+    "game_log_file",
+    "session_folder",
+    "date",
+    "game_mode",
+    "level",
+    "input_mode",
+    "end_reason",
+    "feedback",
+    "duration_seconds",
+    "dots_pressed",
+    "trajectory_file",
+    "knee_angle_file",
+]
+
+INSERT_SQL = (
+    f"INSERT OR REPLACE INTO sessions ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+
+class SessionCatalog:
+    def __init__(self, db_path=DEFAULT_CATALOG_PATH):
+        """
+        Index over the game logs in the logs/ directory, stored in a SQLite database.
+
+        :param db_path: Path to the SQLite file. It is created if it does not exist.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call, so the catalog can be used from any thread
+        connection = sqlite3.connect(self.db_path)
+        connection.row_factory = sqlite3.Row
+        try:
+            with connection:  # commits, or rolls back on error
+                yield connection
+        finally:
+            connection.close()
+
+    def add_session(
+        self, game_log_file, log, trajectory_file=None, knee_angle_file=None
+    ):
+        """
+        Adds (or replaces) the catalog entry of one game.
+
+        :param game_log_file: Path to the game_log_*.json file.
+        :param log: The content of the game log, as written by Logger.log_shared_data.
+        :param trajectory_file: Path to the trajectory file of the game (optional).
+        :param knee_angle_file: Path to the knee angle file of the game (optional).
+        """
+        row = session_row(game_log_file, log, trajectory_file, knee_angle_file)
+        with self._connect() as connection:
+            connection.execute(
+                INSERT_SQL,
+                [row[column] for column in COLUMNS],
+            )
+
+    def query(
+        self,
+        game_mode=None,
+        level=None,
+        end_reason=None,
+        feedback=None,
+        input_mode=None,
+        since=None,
+        until=None,
+        limit=None,
+    ):
+        """
+        Returns the sessions matching all given filters as a list of dicts, newest first.
+
+        :param since: Earliest date (datetime or "YYYY-mm-dd[ HH:MM:SS]" string).
+        :param until: Latest date (exclusive), same format as since.
+        """
+        conditions = []
+        params = []
+        for column, value in (
+            ("game_mode", game_mode),
+            ("level", level),
+            ("end_reason", end_reason),
+            ("feedback", feedback),
+            ("input_mode", input_mode),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("date >= ?")
+            params.append(_date_string(since))
+        if until is not None:
+            conditions.append("date < ?")
+            params.append(_date_string(until))
+
+        sql = "SELECT * FROM sessions"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY date DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._connect() as connection:
+            return [dict(row) for row in connection.execute(sql, params)]
+
+    def rebuild(self, logs_dir=LOGS_DIR):
+        """
+        Drops all entries and re-indexes every game log found below logs_dir.
+        Returns the number of indexed sessions.
+        """
+        rows = []
+        for game_log_file in sorted(Path(logs_dir).glob("**/game_log_*.json")):
+            try:
+                with open(game_log_file) as json_file:
+                    log = json.load(json_file)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Skipping {game_log_file}: {e}")
+                continue
+            trajectory_file, knee_angle_file = find_data_files(game_log_file)
+            row = session_row(game_log_file, log, trajectory_file, knee_angle_file)
+            rows.append([row[column] for column in COLUMNS])
+
+        with self._connect() as connection:
+            connection.execute("DELETE FROM sessions")
+            connection.executemany(
+                INSERT_SQL,
+                rows,
+            )
+        return len(rows)
+
+
+def session_row(game_log_file, log, trajectory_file=None, knee_angle_file=None):
+    """Flattens a game log into one catalog row."""
+    game_log_file = Path(game_log_file)
+    return {
+        "game_log_file": str(game_log_file),
+        "session_folder": str(game_log_file.parent),
+        "date": log.get("date"),
+        "game_mode": log.get("game_mode"),
+        "level": log.get("level"),
+        "input_mode": log.get("input_mode"),
+        "end_reason": log.get("end_reason"),
+        "feedback": log.get("feedback"),
+        "duration_seconds": log.get("total_duration_seconds"),
+        "dots_pressed": log.get("dots_pressed"),
+        "trajectory_file": str(trajectory_file) if trajectory_file else None,
+        "knee_angle_file": str(knee_angle_file) if knee_angle_file else None,
+    }
+
+
+def find_data_files(game_log_file):
+    """
+    Finds the trajectory and knee angle files (.csv or .bin) that belong to a game log.
+    They share the timestamp in their file names.
+    """
+    game_log_file = Path(game_log_file)
+    timestamp = game_log_file.stem.removeprefix("game_log_")
+    found = []
+    for prefix in ("trajectory", "knee_angle"):
+        path = None
+        for suffix in (".csv", ".bin"):
+            candidate = game_log_file.parent / f"{prefix}_{timestamp}{suffix}"
+            if candidate.exists():
+                path = candidate
+                break
+        found.append(path)
+    return tuple(found)
+
+
+def _date_string(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return str(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the catalog of logged games.")
+    parser.add_argument(
+        "--db", type=Path, default=DEFAULT_CATALOG_PATH, help="Path to the catalog"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser(
+        "rebuild", help="Re-index all game logs on disk"
+    )
+    rebuild_parser.add_argument("--logs-dir", type=Path, default=LOGS_DIR)
+
+    query_parser = subparsers.add_parser("query", help="List matching sessions")
+    query_parser.add_argument("--game-mode", help='e.g. "Circle the Dots"')
+    query_parser.add_argument("--level", help='e.g. "Level 2"')
+    query_parser.add_argument("--end-reason", choices=["win", "timeout", "early_abort"])
+    query_parser.add_argument("--feedback")
+    query_parser.add_argument("--input-mode", choices=["mouse", "finger"])
+    query_parser.add_argument("--since", help="YYYY-mm-dd")
+    query_parser.add_argument("--until", help="YYYY-mm-dd")
+    query_parser.add_argument(
+        "--days", type=int, help="Only sessions of the last N days"
+    )
+    query_parser.add_argument("--limit", type=int)
+    query_parser.add_argument("--json", action="store_true", help="Print JSON")
+
+    args = parser.parse_args()
+    catalog = SessionCatalog(args.db)
+
+    if args.command == "rebuild":
+        n_sessions = catalog.rebuild(args.logs_dir)
+        print(f"Indexed {n_sessions} sessions from {args.logs_dir}")
+    else:
+        since = args.since
+        if args.days is not None:
+            since = datetime.now() - timedelta(days=args.days)
+        sessions = catalog.query(
+            game_mode=args.game_mode,
+            level=args.level,
+            end_reason=args.end_reason,
+            feedback=args.feedback,
+            input_mode=args.input_mode,
+            since=since,
+            until=args.until,
+            limit=args.limit,
+        )
+        if args.json:
+            print(json.dumps(sessions, indent=4))
+        else:
+            for session in sessions:
+                print(
+                    f"{session['date']}  {session['game_mode']} ({session['level']})  "
+                    f"{session['end_reason']}  dots: {session['dots_pressed']}  "
+                    f"duration: {session['duration_seconds']}s  {session['game_log_file']}"
+                )
+            print(f"{len(sessions)} sessions")
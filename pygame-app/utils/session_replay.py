@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pygame
+
+from utils import binary_log
+from utils.layout import DESIGN_HEIGHT, DESIGN_WIDTH, Layout
+from utils.session_catalog import find_data_files
+
+# Press times are logged rounded to 10 ms
+DEFAULT_TOLERANCE = 0.05  # in seconds
+
+
+def load_session(game_log_file):
+    """
+    Loads a logged game: its game log and its trajectory (.csv or .bin).
+
+    Games logged before the start time was logged are aligned to their first
+    trajectory sample, and games logged before the screen size was logged were
+    played at the design size.
+
+    :return: Dictionary with the game log entries and "times" (seconds since the
+        start of the game), "xs" and "ys" of the trajectory.
+    """
+    game_log_file = Path(game_log_file)
+    with open(game_log_file) as json_file:
+        log = json.load(json_file)
+    trajectory_file, _ = find_data_files(game_log_file)
+    if trajectory_file is None:
+        raise FileNotFoundError(f"No trajectory file for {game_log_file}")
+
+    if trajectory_file.suffix == ".bin":
+        header, records = binary_log.load_binary_log(trajectory_file)
+        wall_times = binary_log.wall_clock_ns(header, records) / 1e9
+        xs = np.asarray(records["finger_x"], dtype=float)
+        ys = np.asarray(records["finger_y"], dtype=float)
+    else:
+        midnight_ns, rows = binary_log.read_csv_log(trajectory_file)
+        rows = np.array(rows, dtype=float).reshape(-1, 3)
+        wall_times = (midnight_ns + rows[:, 0]) / 1e9
+        xs, ys = rows[:, 1], rows[:, 2]
+
+    start_time = log.get("start_time")
+    session = dict(log)
+    session.update(
+        game_log_file=game_log_file,
+        trajectory_file=trajectory_file,
+        start_time_logged=start_time is not None,
+        start_time=(
+            start_time
+            if start_time is not None
+            else (float(wall_times[0]) if len(wall_times) else 0.0)
+        ),
+        screen_size=tuple(log.get("screen_size") or (DESIGN_WIDTH, DESIGN_HEIGHT)),
+        press_times=[
+            (press["time_since_start"], press["circle_id"])
+            for press in log.get("press_times", [])
+        ],
+    )
+    session["times"] = wall_times - session["start_time"]
+    session["xs"], session["ys"] = xs, ys
+    return session
+
+
+class VirtualClock:
+    def __init__(self, time):
+        """Game time of a replay, set to the time of each replayed sample."""
+        self.time = time
+
+    def now(self):
+        return self.time
+
+
+class ReplayLogger:
+    """The replayed positions are already logged."""
+
+    def append_position_data(self, finger_x, finger_y):
+        pass
+
+
+class ReplayManager:
+    def __init__(self, session):
+        """
+        Provides what a game uses of the GameManager, for the settings of a logged
+        session: the shared data and the layout of its screen size. ESP messages
+        are collected instead of sent.
+        """
+        self.shared_data = {
+            "game_mode": session["game_mode"],
+            "level": session["level"],
+            "input_mode": session.get("input_mode") or "finger",
+            "start_time": None,
+            "end_reason": None,
+            "feedback": None,
+            "screen_size": session["screen_size"],
+        }
+        self.screen_width, self.screen_height = session["screen_size"]
+        self.layout = Layout(self.screen_width, self.screen_height)
+        self.minimum_letter_size = self.layout.length(50)
+        self.logger = ReplayLogger()
+        self.sent_messages = []
+        self.game = None
+
+    def send_message(self, client_id, message):
+        self.sent_messages.append((client_id, message))
+        return None
+
+
+def replay_session(session, speed=None, surface=None):
+    """
+    Feeds the logged positions into TouchDots.update, with the time of each sample
+    on a virtual clock in place of time.time(). Every sample is checked for a
+    touch, like in finger mode.
+
+    :param speed: 1 replays in real time, 2 twice as fast, None as fast as possible.
+    :param surface: Draws every sample onto this surface and presents it, e.g. the
+        window. Headless if None.
+    :return: Dictionary with the "press_times" (seconds since start, dot id), the
+        "end_reason", the number of replayed "samples" and the "elapsed" seconds.
+    """
+    from games.connect_dots import TouchDots
+
+    manager = ReplayManager(session)
+    clock = VirtualClock(session["start_time"])
+    game = manager.game = TouchDots(manager)
+    game.clock = clock.now
+    game.start()
+
+    background = None
+    if surface is not None:
+        from utils.assets import load_image
+
+        background = load_image("images/game.png", manager.layout.size)
+
+    times, xs, ys = session["times"], session["xs"], session["ys"]
+    samples = 0
+    start = time.perf_counter()
+    for i in range(len(times)):
+        if speed is not None:
+            delay = start + times[i] / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        clock.time = session["start_time"] + float(times[i])
+        game.update(float(xs[i]), float(ys[i]), check_collision=True)
+        samples += 1
+
+        if surface is not None:
+            if pygame.event.peek(pygame.QUIT):
+                break
+            pygame.event.pump()
+            surface.blit(background, (0, 0))
+            game.draw(surface)
+            pygame.draw.circle(
+                surface,
+                (255, 0, 0),
+                (int(xs[i]), int(ys[i])),
+                manager.layout.length(10),
+            )
+            pygame.display.flip()
+        if game.game_ended:
+            break
+    elapsed = time.perf_counter() - start
+
+    return {
+        "press_times": [
+            (press_time - session["start_time"], dot_id)
+            for press_time, dot_id in manager.shared_data["press_times"]
+        ],
+        "end_reason": manager.shared_data["end_reason"],
+        "samples": samples,
+        "elapsed": elapsed,
+    }
+
+
+def compare_replay(session, result, tolerance=DEFAULT_TOLERANCE):
+    """
+    Lists how the replay differs from the logged game: other dots, another order,
+    press times further apart than the tolerance, or another end reason.
+    """
+    differences = []
+    logged, replayed = session["press_times"], result["press_times"]
+    logged_ids = [dot_id for _, dot_id in logged]
+    replayed_ids = [dot_id for _, dot_id in replayed]
+    if logged_ids != replayed_ids:
+        differences.append(f"dots {logged_ids} were logged, {replayed_ids} replayed")
+    elif session["start_time_logged"]:
+        for (logged_time, dot_id), (replayed_time, _) in zip(logged, replayed):
+            if abs(logged_time - replayed_time) > tolerance:
+                differences.append(
+                    f"dot {dot_id} was touched after {logged_time:.2f} s, "
+                    f"replayed after {replayed_time:.2f} s"
+                )
+    # Aborted games are ended by the screens, not by the game
+    if session.get("end_reason") in ("win", "timeout"):
+        if result["end_reason"] != session["end_reason"]:
+            differences.append(
+                f"the game ended with {session['end_reason']}, "
+                f"the replay with {result['end_reason']}"
+            )
+    return differences
+
+
+def find_game_logs(paths):
+    """Game logs of the given files and folders (searched recursively)."""
+    game_logs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            game_logs += sorted(path.glob("**/game_log_*.json"))
+        else:
+            game_logs.append(path)
+    return game_logs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay logged games through the game rules and check that the "
+        "same dots are touched in the same order. Exits with 1 if a replay differs."
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="Game log files (game_log_*.json) or log folders"
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="1 replays in real time, 2 twice as fast, 0 as fast as possible",
+    )
+    parser.add_argument(
+        "--render", action="store_true", help="Show the replay in a window"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Allowed difference of the press times in seconds",
+    )
+    args = parser.parse_args()
+
+    if not args.render:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+
+    failed = 0
+    total_samples = 0
+    total_elapsed = 0.0
+    for game_log_file in find_game_logs(args.paths):
+        try:
+            session = load_session(game_log_file)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Skipping {game_log_file}: {e}")
+            continue
+        surface = None
+        if args.render:
+            surface = pygame.display.set_mode(session["screen_size"])
+            pygame.display.set_caption(f"Replay of {game_log_file.name}")
+
+        result = replay_session(session, args.speed or None, surface)
+        differences = compare_replay(session, result, args.tolerance)
+        total_samples += result["samples"]
+        total_elapsed += result["elapsed"]
+
+        notes = []
+        if session.get("input_mode") == "mouse":
+            notes.append("mouse game, the clicks are not logged")
+        if not session["start_time_logged"]:
+            notes.append("start time not logged, press times not compared")
+        status = "DIFFERS" if differences else "ok"
+        print(
+            f"{status:<8}{game_log_file}: {len(result['press_times'])} dots, "
+            f"{result['samples']} samples in {result['elapsed'] * 1000:.1f} ms"
+            + (f" ({'; '.join(notes)})" if notes else "")
+        )
+        for difference in differences:
+            print(f"        {difference}")
+        failed += bool(differences)
+
+    if total_elapsed > 0:
+        print(
+            f"Replayed {total_samples} samples at "
+            f"{total_samples / total_elapsed:.0f} samples/s, {failed} games differ"
+        )
+    pygame.quit()
+    sys.exit(1 if failed else 0)
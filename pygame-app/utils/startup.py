@@ -0,0 +1,81 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+# Modules that take long to import and are only needed after the home screen:
+# OpenCV and MediaPipe for the finger tracking, pygame_gui for the dropdown screens
+HEAVY_MODULES = ("cv2", "pygame_gui", "mediapipe")
+
+
+class StartupProfiler:
+    def __init__(self, start=None):
+        """
+        Records how long the parts of the startup take (--profile-startup).
+
+        :param start: time.perf_counter() at the start of the program.
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.lock = threading.Lock()
+        self.records = []  # (name, start, duration, background)
+        self.first_frame = None
+
+    @contextmanager
+    def measure(self, name):
+        background = threading.current_thread() is not threading.main_thread()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.records.append(
+                    (name, start - self.start, time.perf_counter() - start, background)
+                )
+
+    def mark_first_frame(self):
+        if self.first_frame is None:
+            self.first_frame = time.perf_counter() - self.start
+
+    def report(self):
+        print("Startup profile (ms since the start of the program):")
+        with self.lock:
+            records = sorted(self.records, key=lambda record: record[1])
+        for name, start, duration, background in records:
+            where = "background" if background else "main"
+            print(f"  {start * 1000:7.0f}  {duration * 1000:7.1f}  {where:<10}  {name}")
+        if self.first_frame is not None:
+            print(f"Time to first frame: {self.first_frame * 1000:.0f} ms")
+
+
+class WarmUp(threading.Thread):
+    def __init__(self, tasks, profiler):
+        """
+        Runs startup work that is not needed for the first frame in a background
+        thread, e.g. importing heavy modules (see import_task).
+
+        :param tasks: List of (name, function), run in order.
+        """
+        super().__init__(daemon=True)
+        self.tasks = tasks
+        self.profiler = profiler
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            for name, function in self.tasks:
+                with self.profiler.measure(name):
+                    try:
+                        function()
+                    except Exception as e:
+                        # The feature fails again (with a proper error) when used
+                        print(f"Warm-up of {name} failed: {e}")
+        finally:
+            self.done.set()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+def import_task(module_name):
+    """Warm-up task that imports a module."""
+    return f"import {module_name}", lambda: importlib.import_module(module_name)
@@ -0,0 +1,110 @@
+import argparse
+import time
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        """
+        Caches fonts by (face, size) and rendered text surfaces by
+        (text, size, color, antialias, face). Most text on the screens (titles, HUD)
+        stays the same for many frames, so it is rendered once instead of every frame.
+        The least recently used surfaces are dropped when the surfaces take more than
+        `max_bytes`. The returned surfaces are shared and must not be drawn on.
+
+        :param max_bytes: Memory cap of the cached text surfaces.
+        """
+        self.max_bytes = max_bytes
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, size, face=None):
+        """
+        :param face: Font file, or None for the pygame default font.
+        """
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.Font(face, size)
+        return font
+
+    def render(self, text, size, color, antialias=True, face=None):
+        """Same as font.render(text, antialias, color), but cached."""
+        key = (text, size, tuple(color), antialias, face)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.font(size, face).render(text, antialias, color)
+        self.surfaces[key] = surface
+        self.bytes += _surface_bytes(surface)
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes -= _surface_bytes(evicted)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.fonts.clear()
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "surfaces": len(self.surfaces),
+            "bytes": self.bytes,
+            "fonts": len(self.fonts),
+        }
+
+
+def _surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+# Shared by all screens and games
+TEXT_CACHE = TextCache()
+
+
+if __name__ == "__main__":
+    # Renders the game HUD like TouchDots.draw does, uncached and cached
+    parser = argparse.ArgumentParser(description="Benchmark of the text cache.")
+    parser.add_argument("--frames", type=int, default=3000)
+    args = parser.parse_args()
+
+    pygame.init()
+    surface = pygame.Surface((1792, 1008))
+    white = (255, 255, 255)
+
+    def uncached(frame):
+        font = pygame.font.SysFont(None, 50)
+        surface.blit(
+            font.render(f"Dots: 3 - Time: {frame // 60}s", True, white), (10, 10)
+        )
+
+    def cached(frame):
+        text = TEXT_CACHE.render(f"Dots: 3 - Time: {frame // 60}s", 50, white)
+        surface.blit(text, (10, 10))
+
+    for name, draw in (("SysFont + render", uncached), ("TextCache", cached)):
+        start = time.perf_counter()
+        for frame in range(args.frames):
+            draw(frame)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / args.frames * 1e6:.0f} us per frame")
+    print(TEXT_CACHE.get_stats())
@@ -0,0 +1,298 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+from utils.calibration import compute_transform_matrix
+from utils.finger_tracking_mediapipe import FingerTracker
+from utils.hybrid_finger_tracker import HybridFingerTracker
+
+SCREEN_WIDTH = 1792
+SCREEN_HEIGHT = 1008
+
+# Benchmark FingerTracker on recorded videos instead of a live webcam.
+#
+# Calibration file (JSON), e.g. written down from a calibration run:
+#   {"calibration_points": [[x, y], [x, y], [x, y], [x, y]],
+#    "screen_width": 1792, "screen_height": 1008}
+# The points are the blackboard corners (top left, top right, bottom right,
+# bottom left) in pixels of the recorded video.
+#
+# Ground truth file (CSV) with the fingertip in pixels of the recorded video:
+#   video,frame,camera_x,camera_y
+# Frames are counted from 0. Leave camera_x and camera_y empty for frames
+# without a visible finger. The video column may be left empty if only one
+# video is benchmarked.
+
+
+def load_calibration(filename):
+    with open(filename) as f:
+        calibration = json.load(f)
+    return (
+        [tuple(point) for point in calibration["calibration_points"]],
+        calibration.get("screen_width", SCREEN_WIDTH),
+        calibration.get("screen_height", SCREEN_HEIGHT),
+    )
+
+
+def load_ground_truth(filename):
+    """Returns {(video, frame): (camera_x, camera_y) or None}."""
+    ground_truth = {}
+    with open(filename, newline="") as f:
+        for row in csv.DictReader(f):
+            if row["camera_x"] and row["camera_y"]:
+                position = (float(row["camera_x"]), float(row["camera_y"]))
+            else:
+                position = None
+            ground_truth[(row.get("video") or "", int(row["frame"]))] = position
+    return ground_truth
+
+
+def parse_resolution(value):
+    """Parses "640x480" into (640, 480). "native" keeps the video resolution (None)."""
+    if value == "native":
+        return None
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def read_frames(video, resolution, max_frames):
+    """Decodes (and resizes) the frames of a video up front, so decoding is not timed."""
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise IOError(f"Could not open {video}")
+    frames = []
+    native_size = None
+    while max_frames is None or len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        native_size = (frame.shape[1], frame.shape[0])
+        if resolution is not None and resolution != native_size:
+            frame = cv2.resize(frame, resolution, interpolation=cv2.INTER_AREA)
+        frames.append(frame)
+    cap.release()
+    return frames, native_size
+
+
+def benchmark_video(frames, native_size, settings, calibration, ground_truth, video):
+    """
+    Runs a new FingerTracker over the frames of one video.
+
+    :return: Dictionary of per-frame latencies, detections and pixel errors.
+    """
+    width, height = frames[0].shape[1], frames[0].shape[0]
+    scale_x, scale_y = width / native_size[0], height / native_size[1]
+
+    transform_matrix = None
+    calibration_points = None
+    screen_width, screen_height = SCREEN_WIDTH, SCREEN_HEIGHT
+    if calibration is not None:
+        points, screen_width, screen_height = calibration
+        # The calibration was clicked in the native video resolution
+        calibration_points = [(int(x * scale_x), int(y * scale_y)) for x, y in points]
+        transform_matrix = compute_transform_matrix(
+            calibration_points, screen_width, screen_height
+        )
+
+    tracker = FingerTracker(
+        transform_matrix=transform_matrix,
+        screen_width=screen_width,
+        screen_height=screen_height,
+        calibration_points=calibration_points,
+        use_roi=settings["roi"],
+        roi_scale=settings["roi_scale"],
+        model_complexity=settings["model_complexity"],
+        min_detection_confidence=settings["detection_confidence"],
+        min_tracking_confidence=settings["tracking_confidence"],
+    )
+    if settings["detect_every"] > 1:
+        tracker = HybridFingerTracker(tracker, detect_every=settings["detect_every"])
+
+    latencies = []
+    detections = 0
+    errors = []
+    missed = 0
+    false_positives = 0
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        finger_data = tracker.get_finger_position(frame)
+        latencies.append(time.perf_counter() - start)
+        if finger_data:
+            detections += 1
+
+        # The video column may hold the path, the file name or nothing
+        keys = [(video, i), (os.path.basename(video), i), ("", i)]
+        key = next((key for key in keys if key in ground_truth), None)
+        if key is None:
+            continue
+        expected = ground_truth[key]
+        if expected is None:
+            false_positives += finger_data is not None
+        elif finger_data is None:
+            missed += 1
+        else:
+            # Compare in pixels of the recorded video
+            errors.append(
+                math.hypot(
+                    finger_data[2] / scale_x - expected[0],
+                    finger_data[3] / scale_y - expected[1],
+                )
+            )
+    tracker.close()
+    return {
+        "latencies": latencies,
+        "detections": detections,
+        "errors": errors,
+        "missed": missed,
+        "false_positives": false_positives,
+    }
+
+
+def summarize(settings, results):
+    latencies = np.concatenate([r["latencies"] for r in results]) * 1000
+    errors = np.concatenate([r["errors"] for r in results])
+    n_frames = len(latencies)
+    summary = {
+        "model_complexity": settings["model_complexity"],
+        "detection_confidence": settings["detection_confidence"],
+        "tracking_confidence": settings["tracking_confidence"],
+        "resolution": settings["resolution"],
+        "roi": settings["roi"],
+        "roi_scale": settings["roi_scale"],
+        "detect_every": settings["detect_every"],
+        "frames": n_frames,
+        "fps": n_frames / (latencies.sum() / 1000),
+        "latency_p50_ms": np.percentile(latencies, 50),
+        "latency_p95_ms": np.percentile(latencies, 95),
+        "latency_p99_ms": np.percentile(latencies, 99),
+        "detection_rate": sum(r["detections"] for r in results) / n_frames,
+    }
+    if len(errors) or any(r["missed"] or r["false_positives"] for r in results):
+        summary.update(
+            {
+                "error_mean_px": errors.mean() if len(errors) else float("nan"),
+                "error_p95_px": (
+                    np.percentile(errors, 95) if len(errors) else float("nan")
+                ),
+                "missed": sum(r["missed"] for r in results),
+                "false_positives": sum(r["false_positives"] for r in results),
+            }
+        )
+    return summary
+
+
+def print_summary(summary):
+    line = (
+        f"complexity {summary['model_complexity']}, "
+        f"confidence {summary['detection_confidence']}/{summary['tracking_confidence']}, "
+        f"{summary['resolution']}, roi {'on' if summary['roi'] else 'off'} "
+        f"x{summary['roi_scale']}, detect every {summary['detect_every']}: "
+        f"{summary['fps']:.1f} FPS, latency p50 {summary['latency_p50_ms']:.1f} / "
+        f"p95 {summary['latency_p95_ms']:.1f} / p99 {summary['latency_p99_ms']:.1f} ms, "
+        f"detected {summary['detection_rate']:.1%}"
+    )
+    if "error_mean_px" in summary:
+        line += (
+            f", error {summary['error_mean_px']:.1f} px (p95 {summary['error_p95_px']:.1f}), "
+            f"{summary['missed']} missed, {summary['false_positives']} false positives"
+        )
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the finger tracker on recorded videos. "
+        "Every combination of the given settings is run."
+    )
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--calibration", help="JSON file with the calibration points")
+    parser.add_argument("--ground-truth", help="CSV file with fingertip positions")
+    parser.add_argument("--model-complexity", type=int, nargs="+", default=[1])
+    parser.add_argument("--detection-confidence", type=float, nargs="+", default=[0.7])
+    parser.add_argument("--tracking-confidence", type=float, nargs="+", default=[0.7])
+    parser.add_argument(
+        "--resolution",
+        nargs="+",
+        default=["native"],
+        help='Input resolutions like "640x480", or "native"',
+    )
+    parser.add_argument(
+        "--roi",
+        choices=["on", "off"],
+        nargs="+",
+        default=["on"],
+        help="Crop to the calibrated blackboard (needs --calibration)",
+    )
+    parser.add_argument("--roi-scale", type=float, nargs="+", default=[1.0])
+    parser.add_argument(
+        "--detect-every",
+        type=int,
+        nargs="+",
+        default=[1],
+        help="Frames per hand detection, optical flow in between (1 = detect every frame)",
+    )
+    parser.add_argument("--max-frames", type=int, help="Frames per video")
+    parser.add_argument("--csv", help="Write the results to this CSV file")
+    args = parser.parse_args()
+
+    calibration = load_calibration(args.calibration) if args.calibration else None
+    ground_truth = load_ground_truth(args.ground_truth) if args.ground_truth else {}
+
+    summaries = []
+    for resolution in args.resolution:
+        videos = {
+            video: read_frames(video, parse_resolution(resolution), args.max_frames)
+            for video in args.videos
+        }
+        for (
+            complexity,
+            detection,
+            tracking,
+            roi,
+            roi_scale,
+            detect_every,
+        ) in itertools.product(
+            args.model_complexity,
+            args.detection_confidence,
+            args.tracking_confidence,
+            args.roi,
+            args.roi_scale,
+            args.detect_every,
+        ):
+            settings = {
+                "model_complexity": complexity,
+                "detection_confidence": detection,
+                "tracking_confidence": tracking,
+                "resolution": resolution,
+                "roi": roi == "on",
+                "roi_scale": roi_scale,
+                "detect_every": detect_every,
+            }
+            results = [
+                benchmark_video(
+                    frames, native_size, settings, calibration, ground_truth, video
+                )
+                for video, (frames, native_size) in videos.items()
+                if frames
+            ]
+            if not results:
+                print("No frames could be read.")
+                break
+            summary = summarize(settings, results)
+            print_summary(summary)
+            summaries.append(summary)
+
+    if args.csv and summaries:
+        fieldnames = list(dict.fromkeys(k for s in summaries for k in s))
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(summaries)
+        print(f"Results written to {args.csv}")
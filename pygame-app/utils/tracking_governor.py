@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import deque
+
+# Tracking quality tiers, from best to cheapest.
+#   model_complexity: MediaPipe hand landmark model (1 = accurate, 0 = fast)
+#   roi_scale: Downsampling of the detection input
+#   max_inference_fps: Upper limit of tracked frames per second (None = every frame)
+QUALITY_TIERS = [
+    {
+        "name": "high",
+        "model_complexity": 1,
+        "roi_scale": 1.0,
+        "max_inference_fps": None,
+    },
+    {
+        "name": "medium",
+        "model_complexity": 0,
+        "roi_scale": 1.0,
+        "max_inference_fps": None,
+    },
+    {"name": "low", "model_complexity": 0, "roi_scale": 0.5, "max_inference_fps": None},
+    {
+        "name": "minimal",
+        "model_complexity": 0,
+        "roi_scale": 0.5,
+        "max_inference_fps": 15,
+    },
+]
+
+
+class TrackingGovernor:
+    def __init__(
+        self,
+        tiers=QUALITY_TIERS,
+        start_tier=0,
+        target_fps=25,
+        frame_budget=1.5 / 60,
+        check_interval=2.0,
+        upgrade_after=10.0,
+    ):
+        """
+        Adapts the finger tracking quality to the speed of the PC. Every
+        `check_interval` seconds it compares the mean inference time of the tracker
+        with the time per frame at `target_fps` and the slow game frames with
+        `frame_budget`. It steps down a tier if either is exceeded, and steps back
+        up after `upgrade_after` seconds with headroom. An upgrade that has to be
+        reverted doubles the wait for the next one.
+
+        observe() is called by the tracking thread, report_frame_time() by the game loop.
+
+        :param tiers: Quality tiers from best to cheapest (see QUALITY_TIERS).
+        :param start_tier: Index of the tier to start with.
+        :param target_fps: Finger positions per second the tracker should deliver.
+        :param frame_budget: Time in seconds a game frame may take (without waiting for the next frame).
+        :param check_interval: Seconds between two decisions.
+        :param upgrade_after: Seconds with headroom before a better tier is tried.
+        """
+        self.tiers = tiers
+        self.tier = min(start_tier, len(tiers) - 1)
+        self.target_period = 1.0 / target_fps
+        self.frame_budget = frame_budget
+        self.check_interval = check_interval
+        self.upgrade_after = upgrade_after
+        self.upgrade_wait = upgrade_after
+
+        self._lock = threading.Lock()
+        self._inference_times = []
+        self._frame_times = deque(maxlen=600)
+        self._last_check = None
+        self._last_change = None
+        self._headroom_since = None
+        self._last_change_was_upgrade = False
+        self._skip_next = False
+
+        # Inference time of tier i - 1 relative to tier i, measured around changes
+        self.cost_ratio = {}
+        self._before_change = None  # (tier, mean inference time) before the last change
+
+        # Session summary
+        self.tier_seconds = {}
+        self.changes = []
+        self._start = None
+
+    def current_tier(self):
+        return self.tiers[self.tier]
+
+    def report_frame_time(self, seconds):
+        """Reports the time the game loop needed for one frame."""
+        with self._lock:
+            self._frame_times.append(seconds)
+
+    def observe(self, inference_time, now=None):
+        """
+        Reports the inference time of one tracked frame.
+
+        :return: The new tier if the quality has to change, otherwise None.
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self._start is None:
+            self._start = self._last_check = self._last_change = now
+        if self._skip_next:
+            # The first frame after a change includes loading the new model
+            self._skip_next = False
+            return None
+        self._inference_times.append(inference_time)
+        if now - self._last_check < self.check_interval:
+            return None
+
+        inference = sum(self._inference_times) / len(self._inference_times)
+        self._inference_times = []
+        with self._lock:
+            frame_times = sorted(self._frame_times)
+            self._frame_times.clear()
+        # 90th percentile, a few slow frames are fine
+        slow_frames = (
+            frame_times[int(0.9 * (len(frame_times) - 1))] if frame_times else 0.0
+        )
+        self._account(now)
+        if self._before_change is not None:
+            other, other_inference = self._before_change
+            self._before_change = None
+            better, worse = min(other, self.tier), max(other, self.tier)
+            better_inference = inference if better == self.tier else other_inference
+            worse_inference = inference if worse == self.tier else other_inference
+            self.cost_ratio[worse] = better_inference / max(worse_inference, 1e-6)
+
+        overloaded = inference > self.target_period or slow_frames > self.frame_budget
+        if overloaded:
+            self._headroom_since = None
+            if self.tier < len(self.tiers) - 1:
+                if self._last_change_was_upgrade and now - self._last_change < (
+                    self.upgrade_wait
+                ):
+                    # The better tier was too expensive after all
+                    self.upgrade_wait *= 2
+                reason = (
+                    f"inference {inference * 1000:.0f} ms, "
+                    f"frame {slow_frames * 1000:.0f} ms"
+                )
+                return self._change(self.tier + 1, now, reason, inference)
+            return None
+
+        # Headroom: the better tier (as far as its cost is known) fits into the budget
+        better = self.tier - 1
+        expected = inference * self.cost_ratio.get(self.tier, 2.0)
+        headroom = (
+            better >= 0
+            and expected < 0.8 * self.target_period
+            and slow_frames < 0.8 * self.frame_budget
+        )
+        if not headroom:
+            self._headroom_since = None
+            return None
+        if self._headroom_since is None:
+            self._headroom_since = now
+        if now - self._headroom_since >= self.upgrade_wait:
+            return self._change(better, now, "headroom", inference)
+        return None
+
+    def _account(self, now):
+        name = self.tiers[self.tier]["name"]
+        self.tier_seconds[name] = self.tier_seconds.get(name, 0.0) + (
+            now - self._last_check
+        )
+        self._last_check = now
+
+    def _change(self, tier, now, reason, inference):
+        self._before_change = (self.tier, inference)
+        self._last_change_was_upgrade = tier < self.tier
+        self.tier = tier
+        self._last_change = now
+        self._headroom_since = None
+        self._skip_next = True
+        name = self.tiers[tier]["name"]
+        self.changes.append(
+            {"time": round(now - self._start, 1), "tier": name, "reason": reason}
+        )
+        print(f"Tracking quality: {name} ({reason})")
+        return self.tiers[tier]
+
+    def summary(self):
+        """Chosen tiers of the session, for the game log."""
+        if self._start is not None:
+            self._account(time.perf_counter())
+        return {
+            "tier": self.tiers[self.tier]["name"],
+            "seconds_per_tier": {
+                name: round(seconds, 1) for name, seconds in self.tier_seconds.items()
+            },
+            "changes": self.changes,
+        }
@@ -0,0 +1,257 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+from utils.frame_ring import FrameRingBuffer
+
+# Newest finger position found by the worker. capture_time is the
+# time.perf_counter() at which the camera frame was read.
+FingerPosition = namedtuple(
+    "FingerPosition",
+    ["seq", "capture_time", "mapped_x", "mapped_y", "camera_x", "camera_y"],
+)
+
+
+class TrackingWorker:
+    def __init__(self, cap, finger_tracker, preview=True, governor=None, ring_slots=6):
+        """
+        Runs webcam capture and finger tracking in background threads, so the game
+        loop only has to poll the newest finger position.
+
+        One thread reads camera frames as fast as the camera delivers them, the other
+        runs the finger tracker on the newest frame. Frames that are replaced before
+        the tracker gets to them are dropped (latest frame wins).
+
+        The frames are decoded directly into a FrameRingBuffer in shared memory; the
+        tracker works on views of it. Only the preview frame is copied, into buffers
+        of the worker, because the game screen draws on it after the camera may
+        have overwritten the slot.
+
+        :param cap: An opened cv2.VideoCapture.
+        :param finger_tracker: FingerTracker used on every processed frame.
+        :param preview: Keep the newest processed frame (with the finger marked) for a debug window.
+        :param governor: Optional TrackingGovernor that adapts the tracking quality.
+        :param ring_slots: Frames kept in the ring buffer, they have to last while a
+            frame is tracked.
+        """
+        self.cap = cap
+        self.finger_tracker = finger_tracker
+        self.preview = preview
+        self.governor = governor
+        self.min_inference_interval = 0.0
+        self.ring_slots = ring_slots
+        self.ring = None  # Created for the first frame (its size is not known before)
+
+        self._condition = threading.Condition()
+        self._running = False
+        self._threads = []
+
+        # Handoff between the capture and the tracking thread: the newest frame in
+        # the ring buffer and the newest frame taken by the tracking thread
+        self._frame_seq = 0
+        self._taken_seq = 0
+
+        # Results of the tracking thread
+        self._position = None
+        # Triple buffer of the preview: the frame held by the game screen, the
+        # newest published frame and the one the tracking thread writes
+        self._preview_buffers = [None, None, None]
+        self._preview_published = None
+        self._preview_taken = None
+        self._preview_seq = 0
+
+        # Statistics
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self._capture_times = deque(maxlen=60)
+        self._process_times = deque(maxlen=60)
+        self._inference_latencies = deque(maxlen=60)
+
+    def start(self):
+        if self.governor is not None:
+            self._apply_tier(self.governor.current_tier())
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="Capture", daemon=True),
+            threading.Thread(target=self._tracking_loop, name="Tracking", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stops both threads and frees the ring buffer. The capture is not released."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        alive = [thread.name for thread in self._threads if thread.is_alive()]
+        self._threads = []
+        if alive:
+            # E.g. blocked in cap.read(), it would fail on a closed ring buffer
+            print(
+                f"Tracking worker threads {', '.join(alive)} did not stop, "
+                "the frame ring buffer is freed at exit"
+            )
+            return
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def _capture_loop(self):
+        while self._running:
+            if self.ring is None:
+                ret, frame = self.cap.read()
+                capture_time = time.perf_counter()
+                if ret:
+                    self.ring = FrameRingBuffer(
+                        frame.shape, frame.dtype, slots=self.ring_slots
+                    )
+                    seq = self.ring.write(frame, capture_time)
+            else:
+                # Decode directly into the next slot of the ring buffer
+                result = self.ring.read_from(self.cap)
+                ret = result is not None
+                if ret:
+                    seq, capture_time = result
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._condition:
+                if self._frame_seq != self._taken_seq:
+                    # The previous frame was never tracked
+                    self.frames_dropped += 1
+                self._frame_seq = seq
+                self.frames_captured += 1
+                self._capture_times.append(capture_time)
+                self._condition.notify()
+
+    def _tracking_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._frame_seq != self._taken_seq or not self._running
+                )
+                if not self._running:
+                    return
+                self._taken_seq = self._frame_seq
+
+            frame_data = self.ring.get(self._taken_seq)
+            if frame_data is None:
+                continue
+            seq, capture_time, frame = frame_data
+
+            start = time.perf_counter()
+            finger_data = self.finger_tracker.get_finger_position(frame)
+            done = time.perf_counter()
+
+            if not self.ring.is_valid(seq):
+                # The camera overwrote the frame during the tracking
+                with self._condition:
+                    self.frames_dropped += 1
+                continue
+
+            preview_index = None
+            if self.preview:
+                preview_index = self._copy_preview(frame, seq, finger_data)
+                if preview_index is None:
+                    # The camera overwrote the frame during the copy
+                    with self._condition:
+                        self.frames_dropped += 1
+                    continue
+
+            with self._condition:
+                if finger_data:
+                    self._position = FingerPosition(seq, capture_time, *finger_data)
+                if preview_index is not None:
+                    self._preview_published = preview_index
+                    self._preview_seq = seq
+                self.frames_processed += 1
+                self._process_times.append(done)
+                self._inference_latencies.append(done - start)
+
+            if self.governor is not None:
+                tier = self.governor.observe(done - start, done)
+                if tier is not None:
+                    self._apply_tier(tier)
+            # Limit the inference rate, newer frames replace the skipped ones
+            delay = start + self.min_inference_interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def _copy_preview(self, frame, seq, finger_data):
+        """
+        Copies a tracked frame into the preview buffer that is neither held by the
+        game screen nor the newest one, and marks the finger on the copy.
+
+        :return: Index of the buffer, or None if the frame was overwritten meanwhile.
+        """
+        with self._condition:
+            index = next(
+                i
+                for i in range(len(self._preview_buffers))
+                if i not in (self._preview_taken, self._preview_published)
+            )
+        buffer = self._preview_buffers[index]
+        if buffer is None or buffer.shape != frame.shape:
+            buffer = self._preview_buffers[index] = np.empty_like(frame)
+        buffer[...] = frame
+        if not self.ring.is_valid(seq):
+            return None
+        if finger_data:
+            # Draw a red circle in the camera feed where the finger is
+            cv2.circle(buffer, (finger_data[2], finger_data[3]), 10, (0, 0, 255), -1)
+        return index
+
+    def _apply_tier(self, tier):
+        """Applies a quality tier (see utils/tracking_governor.py) in the tracking thread."""
+        self.finger_tracker.set_quality(tier["model_complexity"], tier["roi_scale"])
+        max_fps = tier["max_inference_fps"]
+        self.min_inference_interval = 1.0 / max_fps if max_fps else 0.0
+
+    def get_position(self):
+        """
+        Returns the newest FingerPosition, or None if no finger was found yet.
+        Compare its seq with the previous one to tell whether it is new.
+        """
+        with self._condition:
+            return self._position
+
+    def get_preview_frame(self):
+        """
+        Returns (frame, seq) of the newest tracked camera frame, or (None, 0).
+        The frame belongs to the caller (e.g. to draw on it) until the next call,
+        the worker does not write it meanwhile.
+        """
+        with self._condition:
+            if self._preview_published is None:
+                return None, 0
+            self._preview_taken = self._preview_published
+            return self._preview_buffers[self._preview_taken], self._preview_seq
+
+    def get_stats(self):
+        """Capture and tracking rates, mean inference latency and frame counters."""
+        with self._condition:
+            capture_times = list(self._capture_times)
+            process_times = list(self._process_times)
+            latencies = list(self._inference_latencies)
+            return {
+                "capture_fps": _rate(capture_times),
+                "tracker_fps": _rate(process_times),
+                "inference_ms": (
+                    1000 * sum(latencies) / len(latencies) if latencies else 0.0
+                ),
+                "frames_captured": self.frames_captured,
+                "frames_processed": self.frames_processed,
+                "frames_dropped": self.frames_dropped,
+            }
+
+
+def _rate(times):
+    if len(times) < 2 or times[-1] == times[0]:
+        return 0.0
+    return (len(times) - 1) / (times[-1] - times[0])
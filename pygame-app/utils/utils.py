@@ -1,19 +1,19 @@
 import pygame
 from pathlib import Path
 
+from utils.text_cache import TEXT_CACHE
+
 # Path to the base directory of the project
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
 def render_text(surface, text, font_size, color, position):
-    font = pygame.font.SysFont(None, font_size)
-    text_surf = font.render(text, True, color)
+    text_surf = TEXT_CACHE.render(text, font_size, color)
     surface.blit(text_surf, position)
 
 
 def render_centered_text(surface, text, font_size, color, position):
-    font = pygame.font.SysFont(None, font_size)
-    text_surface = font.render(text, True, color)
+    text_surface = TEXT_CACHE.render(text, font_size, color)
 
     # Get the rect of the text surface
     text_rect = text_surface.get_rect(center=position)
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import threading
+import time
+
+import websockets
+
+# Delivery states of an OutgoingMessage
+QUEUED = "queued"
+SENT = "sent"
+FAILED = "failed"  # connection closed before or while sending
+DROPPED = "dropped"  # client not connected or its queue is full
+
+# Clients identify as "<device>:<station>", e.g. "BoardESP:2". A plain
+# "BoardESP" belongs to the default station.
+DEFAULT_STATION = ""
+STATION_SEPARATOR = ":"
+
+# Port the ESP firmware connects to (WS_SERVER_PORT)
+DEFAULT_PORT = 8765
+
+
+def parse_client_id(client_id):
+    """Splits a client identifier into (device, station)."""
+    device, _, station = client_id.partition(STATION_SEPARATOR)
+    return device, station
+
+
+def make_client_id(device, station=DEFAULT_STATION):
+    """Builds the identifier of a device of a station."""
+    if station == DEFAULT_STATION:
+        return device
+    return f"{device}{STATION_SEPARATOR}{station}"
+
+
+class OutgoingMessage:
+    """Handle to a message handed to the server; reports its delivery status."""
+
+    def __init__(self, client_id, message):
+        self.client_id = client_id
+        self.message = message
+        self.status = QUEUED
+        self._done = threading.Event()
+
+    def set_status(self, status):
+        self.status = status
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Blocks until the message is delivered or given up. Returns the final status."""
+        self._done.wait(timeout)
+        return self.status
+
+
+class WebSocketServer:
+    def __init__(
+        self,
+        on_message=None,
+        host="0.0.0.0",
+        port=DEFAULT_PORT,
+        max_queue_size=100,
+        allowed_devices=None,
+    ):
+        """
+        Websocket server for the ESP clients of one or more stations, running its own
+        event loop in a background thread.
+
+        Messages are routed by the station in the client identifier to the handler
+        registered with register_station. Messages of stations without a handler go
+        to on_message. Handlers are called as handler(client_id, message) with
+        str for text frames and bytes for binary frames.
+
+        :param on_message: Handler for stations that have not been registered (optional).
+        :param host: Host to listen on.
+        :param port: Port to listen on.
+        :param max_queue_size: Maximum number of unsent messages per client.
+        :param allowed_devices: Device names that may connect (e.g. ["BoardESP", "KneeESP"]).
+            None allows all.
+        """
+        self.on_message = on_message
+        self.host = host
+        self.port = port
+        self.max_queue_size = max_queue_size
+        self.allowed_devices = allowed_devices
+
+        # Only modified on the event loop thread
+        self.connected_clients = {}  # client_id -> websocket
+        self.send_queues = {}  # client_id -> asyncio.Queue
+
+        self.stations = {}  # station -> handler
+        self.unrouted_messages = 0
+
+        self.loop = None
+        self.thread = None
+        self.running = threading.Event()  # set once the server accepts connections
+        self.error = None  # why the server could not start
+
+    def register_station(self, station, on_message):
+        """Routes all messages of the clients of a station to on_message."""
+        self.stations[station] = on_message
+
+    def unregister_station(self, station):
+        self.stations.pop(station, None)
+
+    def start(self, timeout=5.0):
+        """
+        Starts the server in a daemon thread and waits until it accepts connections.
+
+        :param timeout: Seconds to wait for the server to listen.
+        :raises OSError: If the server cannot listen on its port, e.g. because the
+            game of another station on this PC already uses it (see --port).
+        """
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._run, name="WebSocketServer", daemon=True
+        )
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.running.wait(0.05):
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise OSError(
+                    f"WebSocket server could not listen on {self.host}:{self.port}: "
+                    f"{self.error or 'timed out'}"
+                )
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except OSError as e:
+            # Reported by start()
+            self.error = e
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        server = await websockets.serve(self._handle_client, self.host, self.port)
+        self.running.set()
+        print(f"WebSocket server running on ws://{self.host}:{self.port}")
+        await server.wait_closed()
+
+    async def _handle_client(self, websocket):
+        identifier = await websocket.recv()  # First message is the identifier
+        device, station = parse_client_id(identifier)
+        if self.allowed_devices is not None and device not in self.allowed_devices:
+            print(f"Client {identifier} is not allowed, closing connection")
+            await websocket.close()
+            return
+        client_id = make_client_id(device, station)
+
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if client_id in self.connected_clients:
+            print(f"Client {client_id} connected again, replacing old connection")
+        self._drop_pending(client_id)
+        self.connected_clients[client_id] = websocket
+        self.send_queues[client_id] = queue
+        sender = asyncio.create_task(self._send_loop(client_id, websocket, queue))
+        print(f"Client connected: {client_id}")
+        try:
+            async for message in websocket:
+                handler = self.stations.get(station, self.on_message)
+                if handler is None:
+                    self.unrouted_messages += 1
+                    continue
+                try:
+                    handler(client_id, message)
+                except Exception as e:
+                    # A malformed message must not close the connection
+                    print(f"Failed to handle message from {client_id}: {e}")
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            print(f"Client disconnected: {client_id}")
+            sender.cancel()
+            # A reconnect of the same client may already have replaced this connection
+            if self.connected_clients.get(client_id) is websocket:
+                self.connected_clients.pop(client_id)
+                self.send_queues.pop(client_id)
+                self._fail_queue(queue)
+
+    async def _send_loop(self, client_id, websocket, queue):
+        """Sender task of one client: sends its queued messages one after the other."""
+        while True:
+            outgoing = await queue.get()
+            try:
+                await websocket.send(json.dumps(outgoing.message))
+                outgoing.set_status(SENT)
+                print(f"Sent to {client_id}: {outgoing.message}")
+            except websockets.ConnectionClosed:
+                outgoing.set_status(FAILED)
+                print(f"Failed to send to {client_id}: Connection closed")
+            except asyncio.CancelledError:
+                outgoing.set_status(FAILED)
+                raise
+
+    def _enqueue(self, outgoing):
+        queue = self.send_queues.get(outgoing.client_id)
+        if queue is None:
+            outgoing.set_status(DROPPED)
+            print(f"Client {outgoing.client_id} not found")
+            return
+        try:
+            queue.put_nowait(outgoing)
+        except asyncio.QueueFull:
+            outgoing.set_status(DROPPED)
+            print(f"Send queue of {outgoing.client_id} is full, dropping message")
+
+    def _drop_pending(self, client_id):
+        queue = self.send_queues.pop(client_id, None)
+        if queue is not None:
+            self._fail_queue(queue)
+
+    @staticmethod
+    def _fail_queue(queue):
+        while not queue.empty():
+            queue.get_nowait().set_status(FAILED)
+
+    def send_message(self, client_id, message):
+        """
+        Hands a message over to the server's event loop and returns immediately.
+        Can be called from any thread.
+
+        :return: OutgoingMessage whose status tells whether it was delivered.
+        """
+        outgoing = OutgoingMessage(client_id, message)
+        if self.loop is None or self.loop.is_closed():
+            outgoing.set_status(DROPPED)
+            print("WebSocket server is not running")
+            return outgoing
+        self.loop.call_soon_threadsafe(self._enqueue, outgoing)
+        return outgoing
+
+    def connected_client_ids(self, station=None):
+        """Identifiers of the connected clients, optionally only of one station."""
+        return [
+            client_id
+            for client_id in list(self.connected_clients)
+            if station is None or parse_client_id(client_id)[1] == station
+        ]
+
+    def queue_depth(self, client_id=None):
+        """Number of messages waiting to be sent, for one client or for all clients."""
+        queues = (
+            list(self.send_queues.values())
+            if client_id is None
+            else [self.send_queues.get(client_id)]
+        )
+        return sum(queue.qsize() for queue in queues if queue is not None)